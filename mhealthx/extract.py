@@ -200,6 +200,265 @@ def run_openSMILE(audio_file, command, flag1, flags, flagn, args, closing,
     return feature_row, feature_table
 
 
+def run_openSMILE_batch(audio_files, record_ids, command, config, table_stem,
+                        number_of_workers=None, flagn='-csvoutput',
+                        closing='-nologfile 1', files_per_run=None):
+    """
+    Run openSMILE on many audio files with a pool of workers, writing one table.
+
+    Each worker runs SMILExtract once on its share of the audio files,
+    with a configuration file that processes all of them
+    (see xio.write_openSMILE_batch_config()), rather than starting
+    SMILExtract once per audio file. If that run fails, the worker runs
+    SMILExtract on each of its audio files separately, so that one
+    unreadable file does not lose the features of the others. The output
+    files are then parsed in bulk into one feature table indexed by
+    record ID. At most one worker runs per CPU.
+
+    Parameters
+    ----------
+    audio_files : list of strings
+        full paths to the input audio files
+    record_ids : list of strings
+        record ID of each audio file (feature table index)
+    command : string
+        name of command: "SMILExtract"
+    config : string
+        openSMILE configuration file
+    table_stem : string
+        output table file (with or without .csv extension)
+    number_of_workers : integer
+        number of concurrent SMILExtract processes (default: CPU count)
+    flagn : string
+        openSMILE's CSV output flag for the configuration file
+    closing : string
+        closing string in command
+    files_per_run : integer
+        maximum number of audio files per SMILExtract run, to bound memory
+        (default: all of a worker's audio files in one run)
+
+    Returns
+    -------
+    feature_frame : pandas DataFrame
+        openSMILE features (columns) for each record ID (rows);
+        missing audio files have no row, and audio files that openSMILE
+        failed to process have a row of NaN
+    feature_table : string
+        output table file (full path)
+
+    Examples
+    --------
+    >>> import os
+    >>> import tempfile
+    >>> from mhealthx.extract import run_openSMILE_batch
+    >>> command = 'SMILExtract'
+    >>> config = os.path.join('/software', 'openSMILE-2.1.0', 'config', 'IS13_ComParE.conf')
+    >>> audio_files = ['/desk/a.wav', '/desk/b.wav']
+    >>> record_ids = ['a', 'b']
+    >>> table_stem = os.path.join(tempfile.mkdtemp(), 'phonation_batch')
+    >>> feature_frame, feature_table = run_openSMILE_batch(audio_files, record_ids, command, config, table_stem)
+
+    """
+    import os
+    import subprocess
+    import multiprocessing
+    from multiprocessing.pool import ThreadPool
+    import pandas as pd
+
+    from mhealthx.xio import write_openSMILE_batch_config
+    from mhealthx.registry import make_schema, FeatureTable
+
+    if len(audio_files) != len(record_ids):
+        raise IOError("there should be one record ID per audio file")
+    if table_stem.endswith('.csv'):
+        feature_table = table_stem
+    else:
+        feature_table = table_stem + '.csv'
+
+    # Divide existing audio files among workers:
+    records = [(audio_file, str(record_id))
+               for audio_file, record_id in zip(audio_files, record_ids)
+               if os.path.isfile(audio_file)]
+    if number_of_workers is None:
+        number_of_workers = multiprocessing.cpu_count()
+    number_of_workers = max(1, min(number_of_workers, len(records)))
+
+    def run_smile(run_stem, run_records):
+        # Run SMILExtract once on audio files, one output file per file:
+        outputs = ['{0}_{1}.csv'.format(run_stem, irecord)
+                   for irecord in range(len(run_records))]
+        for output in outputs:
+            if os.path.isfile(output):
+                os.remove(output)
+        run_files = [audio_file for audio_file, record_id in run_records]
+        run_ids = [record_id for audio_file, record_id in run_records]
+        batch_config = write_openSMILE_batch_config(config, run_files,
+                                                    outputs, run_ids,
+                                                    run_stem + '.conf',
+                                                    flagn.lstrip('-'))
+        with open(os.devnull, 'w') as devnull:
+            returncode = subprocess.call([command, '-C', batch_config] +
+                                         closing.split(),
+                                         stdout=devnull, stderr=devnull)
+        os.remove(batch_config)
+        return returncode, outputs
+
+    def run_worker(iworker):
+        # Run SMILExtract on the worker's audio files (in runs of up to
+        # files_per_run files), or on each file of a failed run:
+        worker_records = records[iworker::number_of_workers]
+        worker_stem = feature_table[:-4] + '_worker{0}'.format(iworker)
+        run_size = files_per_run or max(1, len(worker_records))
+        worker_outputs = []
+        for start in range(0, len(worker_records), run_size):
+            run_records = worker_records[start:start + run_size]
+            run_stem = '{0}_run{1}'.format(worker_stem, start)
+            returncode, outputs = run_smile(run_stem, run_records)
+            if returncode != 0 and len(run_records) > 1:
+                for output in outputs:
+                    if os.path.isfile(output):
+                        os.remove(output)
+                outputs = []
+                for irecord, record in enumerate(run_records):
+                    outputs.extend(run_smile('{0}_{1}'.format(run_stem,
+                                                              irecord),
+                                             [record])[1])
+            worker_outputs.extend(outputs)
+        return worker_outputs
+
+    # Run workers concurrently (each waits on its SMILExtract processes):
+    pool = ThreadPool(number_of_workers)
+    try:
+        worker_outputs = pool.map(run_worker, range(number_of_workers))
+    finally:
+        pool.close()
+        pool.join()
+
+    # Parse all output files in bulk:
+    frames = []
+    for outputs in worker_outputs:
+        for output in outputs:
+            if os.path.isfile(output):
+                frames.append(pd.read_csv(output, sep=";"))
+                os.remove(output)
+
+    # Write rows into one feature table (openSMILE's columns depend on
+    # its configuration file, so the table's schema is made from its
+    # output, without registering it):
+    if frames:
+        smile_frame = pd.concat(frames, ignore_index=True)
+        names = smile_frame.pop('name').astype(str).str.strip("'")
+        index = [record_id for audio_file, record_id in records]
+        table = FeatureTable('openSMILE', len(index), index=index,
+                             schema=make_schema(smile_frame.columns))
+        irecords = dict((record_id, irecord)
+                        for irecord, record_id in enumerate(index))
+        table.write_records(smile_frame.values,
+                            [irecords[name] for name in names])
+        feature_frame = table.to_frame('recordId')
+    else:
+        feature_frame = pd.DataFrame()
+        feature_frame.index.name = 'recordId'
+
+    # Write one feature table:
+    try:
+        feature_frame.to_csv(feature_table)
+    except IOError as e:
+        import traceback; traceback.print_exc()
+        print("I/O error({0}): {1}".format(e.errno, e.strerror))
+        feature_table = None
+
+    return feature_frame, feature_table
+
+
+def run_voice_features(audio_file, row, table_stem, save_rows=False,
+                       sample_rate=16000, command='ffmpeg', trim=False):
+    """
+    Extract native voice features from an audio file and store a feature row.
+
+    A fast path to run_openSMILE() for a GeMAPS-like subset of features
+    (see extractors/voice.py): the audio file is decoded in memory
+    (see xio.decode_audio()), without openSMILE or intermediate files.
+
+    Parameters
+    ----------
+    audio_file : string
+        full path to the input audio file
+    row : pandas Series
+        row to prepend, unaltered, to feature row
+    table_stem : string
+        prepend to output table file
+    save_rows : Boolean
+        save individual rows rather than write to a single feature table?
+    sample_rate : integer
+        number of samples per second to decode
+    command : string
+        name of the ffmpeg command
+    trim : Boolean
+        trim leading and trailing silence first (see
+        extractors.voice.trim_silence()), and store the trimmed
+        boundaries (seconds) as 'trim_start' and 'trim_end'?
+
+    Returns
+    -------
+    feature_row : pandas Series
+        row combining the original row with a row of voice feature values
+        (NaN for audio too short for one frame of voice_features())
+    feature_table : string
+        output table file (full path)
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from mhealthx.extract import run_voice_features
+    >>> audio_file = '/desk/temp/audio_audio.m4a'
+    >>> row = pd.Series({'a':[1], 'b':[2], 'c':[3]})
+    >>> table_stem = './phonation'
+    >>> save_rows = True
+    >>> feature_row, feature_table = run_voice_features(audio_file, row, table_stem, save_rows)
+    >>> feature_row, feature_table = run_voice_features(audio_file, row, table_stem, save_rows, trim=True)
+
+    """
+    import os
+
+    from mhealthx.xio import decode_audio
+    from mhealthx.extract import make_row_table
+    from mhealthx.registry import FeatureTable
+    from mhealthx.extractors.voice import trim_silence
+
+    feature_row = None
+    feature_table = None
+    if os.path.isfile(audio_file):
+        try:
+            data, sample_rate = decode_audio(audio_file, sample_rate,
+                                             command)
+        except IOError as e:
+            import traceback; traceback.print_exc()
+            print("filename = ", audio_file)
+        else:
+            if trim:
+                data, start, end = trim_silence(data, sample_rate)
+
+            # Extract different features from the data into a row of data
+            # (NaN for clips too short for one frame):
+            table = FeatureTable('voice', 1)
+            try:
+                table.extract(0, data, sample_rate)
+            except IOError as e:
+                print("{0}: {1}".format(audio_file, e))
+            row_data = table.to_frame()
+            if trim:
+                row_data['trim_start'] = start / float(sample_rate)
+                row_data['trim_end'] = end / float(sample_rate)
+
+            # Write feature row to a table or append to a feature table:
+            feature_row, feature_table = make_row_table(
+                os.path.splitext(audio_file)[0], table_stem, save_rows,
+                row, row_data, feature_row=None)
+
+    return feature_row, feature_table
+
+
 def run_pyGait(data, t, sample_rate, duration, threshold, order, cutoff,
                distance, row, file_path, table_stem, save_rows=False):
     """
@@ -243,6 +502,8 @@ def run_pyGait(data, t, sample_rate, duration, threshold, order, cutoff,
         row combining the original row with a row of pyGait feature values
     feature_table : string
         output table file (full path)
+        (feature_row and feature_table are None for records skipped by
+        the quality gate, see run_quality_gate())
 
     Examples
     --------
@@ -269,52 +530,281 @@ def run_pyGait(data, t, sample_rate, duration, threshold, order, cutoff,
     >>> feature_row, feature_table = run_pyGait(py, t, sample_rate, duration, threshold, order, cutoff, distance, row, file_path, table_stem, save_rows)
 
     """
-    import pandas as pd
+    from mhealthx.extractors.pyGait import heel_strikes
+    from mhealthx.extract import make_row_table, skipped
+    from mhealthx.registry import FeatureTable
 
-    from mhealthx.extractors.pyGait import heel_strikes, gait
-    from mhealthx.extract import make_row_table
+    # Skip records that failed the quality gate (see run_quality_gate()):
+    if skipped(data):
+        feature_row, feature_table = None, None
+    else:
+        # Extract features from data:
+        strikes, strike_indices = heel_strikes(data, sample_rate, threshold,
+                                               order, cutoff, False, t)
 
-    # Extract features from data:
-    strikes, strike_indices = heel_strikes(data, sample_rate, threshold,
-                                           order, cutoff, False, t)
-
-    number_of_steps, cadence, velocity, avg_step_length, avg_stride_length,\
-    step_durations, avg_step_duration, sd_step_durations, strides, \
-    stride_durations, avg_number_of_strides, avg_stride_duration, \
-    sd_stride_durations, step_regularity, stride_regularity, \
-    symmetry = gait(strikes, data, duration, distance)
-
-    # Create row of data:
-    row_data = pd.DataFrame({'number_of_steps': number_of_steps,
-                             'cadence': cadence,
-                             'velocity': velocity,
-                             'avg_step_length': avg_step_length,
-                             'avg_stride_length': avg_stride_length,
-                             'avg_step_duration': avg_step_duration,
-                             'sd_step_durations': sd_step_durations,
-                             'avg_number_of_strides': avg_number_of_strides,
-                             'avg_stride_duration': avg_stride_duration,
-                             'sd_stride_durations': sd_stride_durations,
-                             'step_regularity': step_regularity,
-                             'stride_regularity': stride_regularity,
-                             'symmetry': symmetry},
-                            index=[0])
+        # Create row of data:
+        table = FeatureTable('pyGait', 1)
+        table.extract(0, strikes, data, duration, distance)
+        row_data = table.to_frame()
+
+        # Write feature row to a table or append to a feature table:
+        feature_row, feature_table = make_row_table(file_path, table_stem,
+                                                    save_rows, row, row_data,
+                                                    feature_row=None)
 
-    # Write feature row to a table or append to a feature table:
-    feature_row, feature_table = make_row_table(file_path, table_stem,
-                                                save_rows, row, row_data,
-                                                feature_row=None)
     return feature_row, feature_table
 
 
-def run_signal_features(data, row, file_path, table_stem, save_rows=False):
+def run_pyGait_sweep(data, t, sample_rate, duration, thresholds, orders,
+                     cutoffs, distance, row, file_path, table_stem,
+                     save_rows=False):
+    """
+    Run pyGait feature extraction over a grid of heel strike parameters.
+
+    Steps ::
+        1. Estimate heel strikes for every (threshold, order, cutoff),
+           sharing filtering and FFT work across the grid
+           (see pyGait.heel_strikes_sweep()).
+        2. Extract pyGait features for each parameter set, sharing one
+           autocorrelation of the data.
+        3. Construct a tidy table with one row per parameter set
+           (the original row's values, the parameters, and the features).
+        4. Write the table, or append its rows to a feature table.
+
+    Parameters
+    ----------
+    data : numpy array
+        accelerometer data along any (preferably forward walking) axis
+    t : list or numpy array
+        accelerometer time points
+    sample_rate : float
+        sample rate of accelerometer reading (Hz)
+    duration : float
+        duration of accelerometer reading (s)
+    thresholds : list of floats
+        ratios to the maximum value of the anterior-posterior acceleration
+    orders : list of integers
+        orders of the Butterworth filter
+    cutoffs : list of floats
+        cutoff frequencies of the Butterworth filter (Hz)
+    distance : float
+        estimate of distance traversed
+    row : pandas Series
+        row to prepend, unaltered, to each feature row
+    file_path : string
+        path to accelerometer file (from row)
+    table_stem : string
+        prepend to output table file
+    save_rows : Boolean
+        save a table per file rather than write to a single feature table?
+
+    Returns
+    -------
+    sweep_table : pandas DataFrame
+        one row per parameter set: row values, threshold, order, cutoff,
+        and pyGait features (NaN if fewer than four heel strikes)
+    feature_table : string
+        output table file (full path)
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from mhealthx.xio import read_accel_json
+    >>> from mhealthx.extract import run_pyGait_sweep
+    >>> input_file = '/Users/arno/DriveWork/mhealthx/mpower_sample_data/accel_walking_outbound.json.items-6dc4a144-55c3-4e6d-982c-19c7a701ca243282023468470322798.tmp'
+    >>> start = 150
+    >>> device_motion = False
+    >>> t, axyz, gxyz, uxyz, rxyz, sample_rate, duration = read_accel_json(input_file, start, device_motion)
+    >>> ax, ay, az = axyz
+    >>> thresholds = [0.1, 0.2, 0.3]
+    >>> orders = [2, 4]
+    >>> cutoffs = [3, 5]
+    >>> distance = None
+    >>> row = pd.Series({'a':[1], 'b':[2], 'c':[3]})
+    >>> file_path = '/fake/path'
+    >>> table_stem = './walking_sweep'
+    >>> save_rows = True
+    >>> sweep_table, feature_table = run_pyGait_sweep(ay, t, sample_rate, duration, thresholds, orders, cutoffs, distance, row, file_path, table_stem, save_rows)
+    >>> # Each row has the features of run_pyGait() with its parameters:
+    >>> import tempfile
+    >>> import numpy as np
+    >>> from mhealthx.extract import run_pyGait
+    >>> from mhealthx.extractors.pyGait import gait_feature_names
+    >>> t = np.arange(3000) / 100.0
+    >>> data = np.sin(2 * np.pi * 1.8 * t) + 0.3 * np.random.randn(3000)
+    >>> table_stem = tempfile.mkdtemp()
+    >>> sweep_table, feature_table = run_pyGait_sweep(data, t, 100, 30, [0.2], [4], [5], None, None, 'sweep', table_stem, True)
+    >>> feature_row, feature_table = run_pyGait(data.copy(), t, 100, 30, 0.2, 4, 5, None, None, 'row', table_stem, True)
+    >>> bool(np.allclose(sweep_table[gait_feature_names].values[0].astype(float), feature_row[gait_feature_names].values[0].astype(float), equal_nan=True))
+    True
+
+    """
+    import os
+    import numpy as np
+    import pandas as pd
+
+    from mhealthx.extractors.pyGait import heel_strikes_sweep, \
+        gait_features, gait_feature_names
+    from mhealthx.signals import autocorrelate
+    from mhealthx.xio import row_to_table
+
+    # Estimate heel strikes for every parameter set:
+    sweep = heel_strikes_sweep(data, sample_rate, thresholds, orders,
+                               cutoffs)
+
+    # Autocorrelation of the demeaned data (as heel_strikes() leaves
+    # the data for gait() in run_pyGait()), shared by all parameter sets:
+    data = np.asarray(data, dtype=np.float64)
+    data = data - np.mean(data)
+    coefficients, N = autocorrelate(data, unbias=2, normalize=2,
+                                    plot_test=False)
+
+    # Extract features for each parameter set:
+    rows = []
+    for threshold, order, cutoff, strikes, strike_indices in sweep:
+        if np.size(strikes) < 4:
+            values = [np.nan] * len(gait_feature_names)
+        else:
+            values = gait_features(strikes, data, duration, distance,
+                                   coefficients)
+        rows.append([threshold, order, cutoff] + values)
+
+    # Construct a tidy table, one row per parameter set:
+    sweep_table = pd.DataFrame(rows, columns=['threshold', 'order',
+                                              'cutoff'] + gait_feature_names)
+    if isinstance(row, pd.Series) and not row.empty:
+        row_table = pd.DataFrame([row.values] * len(rows), columns=row.index)
+        sweep_table = pd.concat([row_table, sweep_table], axis=1)
+
+    # Write the table or append its rows to a feature table:
+    if save_rows:
+        if not file_path.endswith('.csv'):
+            file_path = file_path + '.csv'
+        feature_table = os.path.join(table_stem, os.path.basename(file_path))
+    elif table_stem.endswith('.csv'):
+        feature_table = table_stem
+    else:
+        feature_table = table_stem + '.csv'
+    try:
+        if save_rows:
+            sweep_table.to_csv(feature_table)
+        else:
+            for irow in range(len(sweep_table)):
+                row_to_table(sweep_table.iloc[irow], feature_table)
+    except IOError as e:
+        import traceback; traceback.print_exc()
+        print("I/O error({0}): {1}".format(e.errno, e.strerror))
+        feature_table = None
+
+    return sweep_table, feature_table
+
+
+def run_pyGait_batch(datas, sample_rates, durations, threshold, order,
+                     cutoff, distances, record_ids, table_stem):
+    """
+    Run pyGait feature extraction on many records, writing one table.
+
+    Steps ::
+        1. Estimate heel strikes for each record.
+        2. Extract pyGait features for all records at once
+           (see pyGait.gait_batch()).
+        3. Construct one feature table indexed by record ID and write it.
+
+    Parameters
+    ----------
+    datas : list of numpy arrays
+        accelerometer data along any (preferably forward walking) axis,
+        for each record
+    sample_rates : float or list of floats
+        sample rate of each accelerometer reading (Hz)
+    durations : float or list of floats
+        duration of each accelerometer reading (s)
+    threshold : float
+        ratio to the maximum value of the anterior-posterior acceleration
+    order : integer
+        order of the Butterworth filter
+    cutoff : integer
+        cutoff frequency of the Butterworth filter (Hz)
+    distances : float or list of floats
+        estimate of distance traversed in each record (or None)
+    record_ids : list of strings
+        record ID of each record (feature table index)
+    table_stem : string
+        output table file (with or without .csv extension)
+
+    Returns
+    -------
+    feature_frame : pandas DataFrame
+        pyGait features (columns) for each record ID (rows)
+    feature_table : string
+        output table file (full path)
+
+    Examples
+    --------
+    >>> import os
+    >>> import tempfile
+    >>> import numpy as np
+    >>> from mhealthx.extract import run_pyGait_batch
+    >>> t = np.arange(3000) / 100.0
+    >>> datas = [np.sin(2 * np.pi * f * t) + 0.3 * np.random.randn(3000) for f in [1.6, 1.8, 2.0]]
+    >>> record_ids = ['a', 'b', 'c']
+    >>> table_stem = os.path.join(tempfile.mkdtemp(), 'walking_batch')
+    >>> feature_frame, feature_table = run_pyGait_batch(datas, 100, 30, 0.2, 4, 5, None, record_ids, table_stem)
+
+    """
+    import numpy as np
+
+    from mhealthx.extractors.pyGait import heel_strikes, gait_batch
+    from mhealthx.registry import FeatureTable
+
+    # Demean each record (as heel_strikes() leaves the data for gait()
+    # in run_pyGait()):
+    sample_rates = np.broadcast_to(np.asarray(sample_rates, np.float64),
+                                   (len(datas),))
+    datas = [np.array(data, dtype=np.float64) for data in datas]
+    datas = [data - np.mean(data) for data in datas]
+
+    # Estimate heel strikes for each record (empty if no peaks are found):
+    strike_indices = []
+    for data, sample_rate in zip(datas, sample_rates):
+        strikes, indices = heel_strikes(data.copy(), sample_rate,
+                                        threshold, order, cutoff)
+        strike_indices.append(indices)
+
+    # Extract features for all records at once into one feature table:
+    table = FeatureTable('pyGait', len(record_ids), index=record_ids)
+    table.write_records(gait_batch(strike_indices, sample_rates, durations,
+                                   distances, datas))
+
+    # Write one feature table:
+    feature_frame = table.to_frame('recordId')
+    if table_stem.endswith('.csv'):
+        feature_table = table_stem
+    else:
+        feature_table = table_stem + '.csv'
+    try:
+        feature_frame.to_csv(feature_table)
+    except IOError as e:
+        import traceback; traceback.print_exc()
+        print("I/O error({0}): {1}".format(e.errno, e.strerror))
+        feature_table = None
+
+    return feature_frame, feature_table
+
+
+def run_signal_features(data, row, file_path, table_stem, save_rows=False,
+                        channels=None):
     """
     Extract various features from time series data.
 
+    Multichannel data (such as x, y, z accelerometer axes) are processed
+    in one vectorized call and stored as one wide row, with each column
+    name prefixed by its channel name (such as 'x_avg').
+
     Parameters
     ----------
     data : numpy array of floats
-        time series data
+        time series data (or channels x samples, or list of channels)
     row : pandas Series
         row to prepend, unaltered, to feature row
     file_path : string
@@ -323,6 +813,9 @@ def run_signal_features(data, row, file_path, table_stem, save_rows=False):
         prepend to output table file
     save_rows : Boolean
         save individual rows rather than write to a single feature table?
+    channels : list of strings
+        names of multichannel data channels (default: x, y, z for
+        three channels, otherwise channel numbers)
 
     Returns
     -------
@@ -330,6 +823,8 @@ def run_signal_features(data, row, file_path, table_stem, save_rows=False):
         row combining the original row with a row of signal feature values
     feature_table : string
         output table file (full path)
+        (feature_row and feature_table are None for records skipped by
+        the quality gate, see run_quality_gate())
 
     Examples
     --------
@@ -346,53 +841,79 @@ def run_signal_features(data, row, file_path, table_stem, save_rows=False):
     >>> table_stem = './walking'
     >>> save_rows = True
     >>> feature_row, feature_table = run_signal_features(data, row, file_path, table_stem, save_rows)
+    >>> feature_row, feature_table = run_signal_features(axyz, row, file_path, table_stem, save_rows)
 
     """
+    import numpy as np
     import pandas as pd
 
-    from mhealthx.signals import signal_features
-    from mhealthx.extract import make_row_table
+    from mhealthx.signals import signal_features, signal_feature_names
+    from mhealthx.extract import make_row_table, channel_names, skipped
+    from mhealthx.registry import FeatureTable
 
-    # Extract different features from the data:
-    num, min, max, rng, avg, std, med, mad, kurt, skew, cvar, lower25, \
-    upper25, inter50, rms, entropy, tk_energy = signal_features(data)
-
-    # Create row of data:
-    row_data = pd.DataFrame({'num': num,
-                             'min': min,
-                             'max': max,
-                             'rng': rng,
-                             'avg': avg,
-                             'std': std,
-                             'med': med,
-                             'mad': mad,
-                             'kurt': kurt,
-                             'skew': skew,
-                             'cvar': cvar,
-                             'lower25': lower25,
-                             'upper25': upper25,
-                             'inter50': inter50,
-                             'rms': rms,
-                             'entropy': entropy,
-                             'tk_energy': tk_energy},
-                            index=[0])
+    # Skip records that failed the quality gate (see run_quality_gate()):
+    if skipped(data):
+        feature_row, feature_table = None, None
+    else:
+        # Extract different features from the data (all channels at once):
+        features = signal_features(np.asarray(data, dtype=np.float64))
+
+        # Create row of data:
+        if np.ndim(data) > 1:
+            channels = channel_names(len(features[0]), channels)
+            columns = {}
+            for name, values in zip(signal_feature_names, features):
+                for channel, value in zip(channels, values):
+                    columns[channel + '_' + name] = value
+            row_data = pd.DataFrame(columns, index=[0],
+                                    columns=[channel + '_' + name
+                                             for channel in channels
+                                             for name in signal_feature_names])
+        else:
+            table = FeatureTable('signal', 1)
+            table.write(0, features)
+            row_data = table.to_frame()
+
+        # Write feature row to a table or append to a feature table:
+        feature_row, feature_table = make_row_table(file_path, table_stem,
+                                                    save_rows, row, row_data,
+                                                    feature_row=None)
 
-    # Write feature row to a table or append to a feature table:
-    feature_row, feature_table = make_row_table(file_path, table_stem,
-                                                save_rows, row, row_data,
-                                                feature_row=None)
     return feature_row, feature_table
 
 
-def run_sdf_features(data, number_of_symbols, row, file_path, table_stem, save_rows):
+def run_sdf_features(data, number_of_symbols, row, file_path, table_stem,
+                     save_rows, channels=None, depth=1):
     """
     Extract symbolic dynamic filtering features.
 
+    Multichannel data (such as x, y, z accelerometer axes) are processed
+    in one vectorized call and stored as one wide row, with each column
+    name prefixed by its channel name (such as 'x_SDF eigenvector 1').
+
+    For depth > 1, only the stationary probabilities of observed words
+    are written, each in a column named by its symbols
+    (such as 'SDF word 1-3-2'), rather than all number_of_symbols**depth.
+
     Parameters
     ----------
     data : numpy array
+        time series data (or channels x samples, or list of channels)
     number_of_symbols : integer
         number of symbols for symbolic dynamic filtering method
+    row : pandas Series
+        row to prepend, unaltered, to feature row
+    file_path : string
+        path to accelerometer file (from row)
+    table_stem : string
+        prepend to output table file
+    save_rows : Boolean
+        save individual rows rather than write to a single feature table?
+    channels : list of strings
+        names of multichannel data channels (default: x, y, z for
+        three channels, otherwise channel numbers)
+    depth : integer
+        number of consecutive symbols per state (see sdf_features())
 
     Returns
     -------
@@ -400,6 +921,8 @@ def run_sdf_features(data, number_of_symbols, row, file_path, table_stem, save_r
         row combining the original row with a row of SDF feature values
     feature_table : string
         output table file (full path)
+        (feature_row and feature_table are None for records skipped by
+        the quality gate, see run_quality_gate())
 
     Examples
     --------
@@ -417,30 +940,103 @@ def run_sdf_features(data, number_of_symbols, row, file_path, table_stem, save_r
     >>> table_stem = './walking'
     >>> save_rows = True
     >>> feature_row, feature_table = run_sdf_features(data, number_of_symbols, row, file_path, table_stem, save_rows)
+    >>> feature_row, feature_table = run_sdf_features(axyz, number_of_symbols, row, file_path, table_stem, save_rows)
+    >>> feature_row, feature_table = run_sdf_features(axyz, number_of_symbols, row, file_path, table_stem, save_rows, depth=3)
 
     """
+    import numpy as np
     import pandas as pd
 
-    from mhealthx.extract import make_row_table
+    from mhealthx.extract import make_row_table, channel_names, skipped
     from mhealthx.extractors.symbolic_dynamic_filtering import sdf_features
 
-    sdf = sdf_features(data, number_of_symbols, pi_matrix_flag=False)
+    # Skip records that failed the quality gate (see run_quality_gate()):
+    if skipped(data):
+        feature_row, feature_table = None, None
+    else:
+        # Extract features from the data (all channels at once):
+        data = np.asarray(data, dtype=np.float64)
+        sdf = sdf_features(data, number_of_symbols, pi_matrix_flag=False,
+                           depth=depth)
+
+        # Headers and values of each channel's features (for depth > 1,
+        # only the observed words of the sparse rows):
+        channel_features = []
+        if depth > 1:
+            sdf.sort_indices()
+            shape = (number_of_symbols,) * depth
+            for ichannel in range(sdf.shape[0]):
+                entries = slice(sdf.indptr[ichannel],
+                                sdf.indptr[ichannel + 1])
+                words = np.unravel_index(sdf.indices[entries], shape)
+                headers = ['SDF word ' + '-'.join(str(symbol + 1)
+                                                  for symbol in word)
+                           for word in zip(*words)]
+                channel_features.append((headers, sdf.data[entries]))
+        else:
+            headers = ['SDF eigenvector 1'] + \
+                      ['SDF eigenvalue ' + str(isdf + 1)
+                       for isdf in range(1, sdf.shape[-1])]
+            for values in np.atleast_2d(sdf):
+                channel_features.append((headers, values))
+
+        # Create row of data:
+        if data.ndim > 1:
+            channels = channel_names(len(channel_features), channels)
+            columns = [channel + '_' + hdr
+                       for channel, (headers, values)
+                       in zip(channels, channel_features)
+                       for hdr in headers]
+            values = np.concatenate([values for headers, values
+                                     in channel_features])
+        else:
+            columns, values = channel_features[0]
+        row_data = pd.DataFrame([values], columns=columns, index=[0])
 
-    # Create row of data:
-    row_data = pd.DataFrame({'SDF eigenvector 1': sdf[0]}, index=[0])
-    for isdf in range(1, len(sdf)):
-        hdr = 'SDF eigenvalue ' + str(isdf + 1)
-        df = pd.DataFrame({hdr: sdf[isdf]}, index=[0])
-        row_data = pd.concat([row_data, df], axis=1,
-                             join_axes=[row_data.index])
+        # Write feature row to a table or append to a feature table:
+        feature_row, feature_table = make_row_table(file_path, table_stem,
+                                                    save_rows, row, row_data,
+                                                    feature_row=None)
 
-    # Write feature row to a table or append to a feature table:
-    feature_row, feature_table = make_row_table(file_path, table_stem,
-                                                save_rows, row, row_data,
-                                                feature_row=None)
     return feature_row, feature_table
 
 
+def channel_names(number_of_channels, channels=None):
+    """
+    Names of multichannel data channels, to prefix feature table columns.
+
+    Parameters
+    ----------
+    number_of_channels : integer
+        number of channels
+    channels : list of strings
+        names of channels (default: x, y, z for three channels,
+        otherwise channel numbers starting from 1)
+
+    Returns
+    -------
+    channels : list of strings
+        names of channels
+
+    Examples
+    --------
+    >>> from mhealthx.extract import channel_names
+    >>> channel_names(3)
+    ['x', 'y', 'z']
+
+    """
+    if channels is None:
+        if number_of_channels == 3:
+            channels = ['x', 'y', 'z']
+        else:
+            channels = [str(ichannel + 1)
+                        for ichannel in range(number_of_channels)]
+    elif len(channels) != number_of_channels:
+        raise IOError("there should be one name per channel")
+
+    return list(channels)
+
+
 def run_tap_features(xtaps, ytaps, t, threshold,
                      row, file_path, table_stem, save_rows=False):
     """
@@ -488,106 +1084,13 @@ def run_tap_features(xtaps, ytaps, t, threshold,
     >>> feature_row, feature_table = run_tap_features(xtaps, ytaps, t, threshold, row, file_path, table_stem, save_rows)
 
     """
-    import pandas as pd
-
-    from mhealthx.extractors.tapping import compute_tap_features
     from mhealthx.extract import make_row_table
+    from mhealthx.registry import FeatureTable
 
-    # Extract different features from the data:
-    T = compute_tap_features(xtaps, ytaps, t, threshold)
-
-    # Create row of data:
-    row_data = pd.DataFrame({'num_taps': T.num_taps,
-                             'num_taps_left': T.num_taps_left,
-                             'num_taps_right': T.num_taps_right,
-                             'time_rng': T.time_rng,
-                             'intertap_gap10': T.intertap_gap10,
-                             'intertap_gap25': T.intertap_gap25,
-                             'intertap_gap50': T.intertap_gap50,
-                             'intertap_num': T.intertap_num,
-                             'intertap_min': T.intertap_min,
-                             'intertap_max': T.intertap_max,
-                             'intertap_rng': T.intertap_rng,
-                             'intertap_avg': T.intertap_avg,
-                             'intertap_std': T.intertap_std,
-                             'intertap_med': T.intertap_med,
-                             'intertap_mad': T.intertap_mad,
-                             'intertap_kurt': T.intertap_kurt,
-                             'intertap_skew': T.intertap_skew,
-                             'intertap_cvar': T.intertap_cvar,
-                             'intertap_lower25': T.intertap_lower25,
-                             'intertap_upper25': T.intertap_upper25,
-                             'intertap_inter50': T.intertap_inter50,
-                             'intertap_rms': T.intertap_rms,
-                             'intertap_entropy': T.intertap_entropy,
-                             'intertap_tk_energy': T.intertap_tk_energy,
-                             'xL_num': T.xL_num,
-                             'xL_min': T.xL_min,
-                             'xL_max': T.xL_max,
-                             'xL_rng': T.xL_rng,
-                             'xL_avg': T.xL_avg,
-                             'xL_std': T.xL_std,
-                             'xL_med': T.xL_med,
-                             'xL_mad': T.xL_mad,
-                             'xL_kurt': T.xL_kurt,
-                             'xL_skew': T.xL_skew,
-                             'xL_cvar': T.xL_cvar,
-                             'xL_lower25': T.xL_lower25,
-                             'xL_upper25': T.xL_upper25,
-                             'xL_inter50': T.xL_inter50,
-                             'xL_rms': T.xL_rms,
-                             'xL_entropy': T.xL_entropy,
-                             'xL_tk_energy': T.xL_tk_energy,
-                             'xR_num': T.xR_num,
-                             'xR_min': T.xR_min,
-                             'xR_max': T.xR_max,
-                             'xR_rng': T.xR_rng,
-                             'xR_avg': T.xR_avg,
-                             'xR_std': T.xR_std,
-                             'xR_med': T.xR_med,
-                             'xR_mad': T.xR_mad,
-                             'xR_kurt': T.xR_kurt,
-                             'xR_skew': T.xR_skew,
-                             'xR_cvar': T.xR_cvar,
-                             'xR_lower25': T.xR_lower25,
-                             'xR_upper25': T.xR_upper25,
-                             'xR_inter50': T.xR_inter50,
-                             'xR_rms': T.xR_rms,
-                             'xR_entropy': T.xR_entropy,
-                             'xR_tk_energy': T.xR_tk_energy,
-                             'driftL_min': T.driftL_min,
-                             'driftL_max': T.driftL_max,
-                             'driftL_rng': T.driftL_rng,
-                             'driftL_avg': T.driftL_avg,
-                             'driftL_std': T.driftL_std,
-                             'driftL_med': T.driftL_med,
-                             'driftL_mad': T.driftL_mad,
-                             'driftL_kurt': T.driftL_kurt,
-                             'driftL_skew': T.driftL_skew,
-                             'driftL_cvar': T.driftL_cvar,
-                             'driftL_lower25': T.driftL_lower25,
-                             'driftL_upper25': T.driftL_upper25,
-                             'driftL_inter50': T.driftL_inter50,
-                             'driftL_rms': T.driftL_rms,
-                             'driftL_entropy': T.driftL_entropy,
-                             'driftL_tk_energy': T.driftL_tk_energy,
-                             'driftR_min': T.driftR_min,
-                             'driftR_max': T.driftR_max,
-                             'driftR_rng': T.driftR_rng,
-                             'driftR_avg': T.driftR_avg,
-                             'driftR_std': T.driftR_std,
-                             'driftR_med': T.driftR_med,
-                             'driftR_mad': T.driftR_mad,
-                             'driftR_kurt': T.driftR_kurt,
-                             'driftR_skew': T.driftR_skew,
-                             'driftR_cvar': T.driftR_cvar,
-                             'driftR_lower25': T.driftR_lower25,
-                             'driftR_upper25': T.driftR_upper25,
-                             'driftR_inter50': T.driftR_inter50,
-                             'driftR_rms': T.driftR_rms,
-                             'driftR_entropy': T.driftR_entropy,
-                             'driftR_tk_energy': T.driftR_tk_energy},
-                            index=[0])
+    # Extract different features from the data into a row of data:
+    table = FeatureTable('tap', 1)
+    table.extract(0, xtaps, ytaps, t, threshold)
+    row_data = table.to_frame()
 
     # Write feature row to a table or append to a feature table:
     feature_row, feature_table = make_row_table(file_path, table_stem,
@@ -596,6 +1099,73 @@ def run_tap_features(xtaps, ytaps, t, threshold,
     return feature_row, feature_table
 
 
+def run_tap_features_batch(xtaps, ytaps, t, threshold, record_ids,
+                           table_stem):
+    """
+    Run touch screen tap feature extraction on many records, writing one table.
+
+    Features of all records are computed at once
+    (see tapping.tap_features_batch()), rather than one record at a time.
+
+    Parameters
+    ----------
+    xtaps : list of numpy arrays of integers
+        x coordinates of touch screen where tapped, for each record
+    ytaps : list of numpy arrays of integers
+        y coordinates of touch screen where tapped, for each record
+    t : list of numpy arrays of floats
+        time points of taps, for each record
+    threshold : integer
+        x offset threshold for left/right press event (pixels)
+    record_ids : list of strings
+        record ID of each record (feature table index)
+    table_stem : string
+        output table file (with or without .csv extension)
+
+    Returns
+    -------
+    feature_frame : pandas DataFrame
+        tap features (columns) for each record ID (rows)
+    feature_table : string
+        output table file (full path)
+
+    Examples
+    --------
+    >>> import os
+    >>> import tempfile
+    >>> import numpy as np
+    >>> from mhealthx.extract import run_tap_features_batch
+    >>> xtaps = [np.round(200 * np.random.random(n)) for n in [100, 50, 80]]
+    >>> ytaps = [np.round(300 * np.random.random(n)) for n in [100, 50, 80]]
+    >>> t = [np.linspace(1, n, n) / 30.0 for n in [100, 50, 80]]
+    >>> record_ids = ['a', 'b', 'c']
+    >>> table_stem = os.path.join(tempfile.mkdtemp(), 'tapping_batch')
+    >>> feature_frame, feature_table = run_tap_features_batch(xtaps, ytaps, t, 20, record_ids, table_stem)
+
+    """
+    from mhealthx.extractors.tapping import tap_features_batch
+    from mhealthx.registry import FeatureTable
+
+    # Extract features for all records at once into one feature table:
+    table = FeatureTable('tap', len(record_ids), index=record_ids)
+    table.write_records(tap_features_batch(xtaps, ytaps, t, threshold))
+
+    # Write one feature table:
+    feature_frame = table.to_frame('recordId')
+    if table_stem.endswith('.csv'):
+        feature_table = table_stem
+    else:
+        feature_table = table_stem + '.csv'
+    try:
+        feature_frame.to_csv(feature_table)
+    except IOError as e:
+        import traceback; traceback.print_exc()
+        print("I/O error({0}): {1}".format(e.errno, e.strerror))
+        feature_table = None
+
+    return feature_frame, feature_table
+
+
 def run_quality(gx, gy, gz, row, file_path, table_stem, save_rows=False):
     """
     Extract various features from time series data.
@@ -644,18 +1214,13 @@ def run_quality(gx, gy, gz, row, file_path, table_stem, save_rows=False):
     >>> feature_row, feature_table = run_quality(gx, gy, gz, row, file_path, table_stem, save_rows)
 
     """
-    import pandas as pd
-
-    from mhealthx.signals import accelerometer_signal_quality
     from mhealthx.extract import make_row_table
+    from mhealthx.registry import FeatureTable
 
-    # Compute different quality measures from the data:
-    min_mse, vertical = accelerometer_signal_quality(gx, gy, gz)
-
-    # Create row of data:
-    row_data = pd.DataFrame({'min_mse': min_mse,
-                             'vertical': vertical},
-                             index=[0])
+    # Compute different quality measures from the data into a row of data:
+    table = FeatureTable('quality', 1)
+    table.extract(0, gx, gy, gz)
+    row_data = table.to_frame()
 
     # Write feature row to a table or append to a feature table:
     feature_row, feature_table = make_row_table(file_path, table_stem,
@@ -664,6 +1229,148 @@ def run_quality(gx, gy, gz, row, file_path, table_stem, save_rows=False):
     return feature_row, feature_table
 
 
+def run_quality_gate(gx, gy, gz, max_mse, row, file_path, table_stem,
+                     save_rows=False):
+    """
+    Compute accelerometer quality and decide whether to extract features.
+
+    The quality row (min_mse, vertical, passed, skip_reason) is written
+    for every record, so the reason for skipping a record is recorded.
+
+    Parameters
+    ----------
+    gx : list
+        x-axis gravity acceleration
+    gy : list
+        y-axis gravity acceleration
+    gz : list
+        z-axis gravity acceleration
+    max_mse : float
+        maximum minimum mean squared error to pass the gate
+        (None: all records pass)
+    row : pandas Series
+        row to prepend, unaltered, to feature row
+    file_path : string
+        path to accelerometer file (from row)
+    table_stem : string
+        prepend to output table file
+    save_rows : Boolean
+        save individual rows rather than write to a single feature table?
+
+    Returns
+    -------
+    passed : Boolean
+        good enough to extract features?
+    skip_reason : string
+        why the record failed the gate (empty string if it passed)
+    feature_row : pandas Series
+        row combining the original row with a row of quality measures
+    feature_table : string
+        output table file (full path)
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> from mhealthx.extract import run_quality_gate
+    >>> gx, gy = 0.1 * np.random.randn(2, 100)
+    >>> gz = -1 + 0.1 * np.random.randn(100)
+    >>> row = pd.Series({'a':[1], 'b':[2], 'c':[3]})
+    >>> file_path = 'walking_record'
+    >>> table_stem = tempfile.mkdtemp()
+    >>> save_rows = True
+    >>> passed, skip_reason, feature_row, feature_table = run_quality_gate(gx, gy, gz, 0.1, row, file_path, table_stem, save_rows)
+
+    """
+    from mhealthx.extract import make_row_table
+    from mhealthx.registry import FeatureTable
+
+    # Compute quality and decide whether to pass the record:
+    table = FeatureTable('quality_gate', 1)
+    table.extract(0, gx, gy, gz, max_mse)
+    row_data = table.to_frame()
+    passed = bool(table.data['passed'][0])
+    skip_reason = str(table.data['skip_reason'][0])
+
+    # Write feature row to a table or append to a feature table:
+    feature_row, feature_table = make_row_table(file_path, table_stem,
+                                                save_rows, row, row_data,
+                                                feature_row=None)
+    return passed, skip_reason, feature_row, feature_table
+
+
+def run_gated_projection(passed, ax, ay, az, uw, ux, uy, uz):
+    """
+    Project walk accelerometer axes on walk direction if quality passed.
+
+    Parameters
+    ----------
+    passed : Boolean
+        passed the quality gate (see run_quality_gate())?
+    ax, ay, az : lists or numpy arrays
+        accelerometer data along the x, y and z axes
+    uw, ux, uy, uz : lists or numpy arrays
+        attitude quaternion components
+
+    Returns
+    -------
+    px, py, pz : numpy arrays
+        accelerometer data projected on the walk direction
+        (see pyGait.project_walk_direction_attitude()),
+        or None for records that failed the quality gate
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extract import run_gated_projection
+    >>> ax, ay, az = np.random.randn(3, 100)
+    >>> px, py, pz = run_gated_projection(False, ax, ay, az, 1, 0, 0, 0)
+    >>> px is None
+    True
+
+    """
+    from mhealthx.extractors.pyGait import project_walk_direction_attitude
+
+    if passed:
+        px, py, pz = project_walk_direction_attitude(ax, ay, az,
+                                                     uw, ux, uy, uz)
+    else:
+        px, py, pz = None, None, None
+
+    return px, py, pz
+
+
+def skipped(data):
+    """
+    Data of a record skipped by the quality gate (None, or lists of None)?
+
+    Parameters
+    ----------
+    data : numpy array, list or None
+        input data of a feature extractor
+
+    Returns
+    -------
+    skip : Boolean
+
+    Examples
+    --------
+    >>> from mhealthx.extract import skipped
+    >>> skipped([None, None, None])
+    True
+
+    """
+    if data is None:
+        skip = True
+    elif isinstance(data, (list, tuple)):
+        skip = any(channel is None for channel in data)
+    else:
+        skip = False
+
+    return skip
+
+
 # ============================================================================
 if __name__ == '__main__':
 
@@ -45,8 +45,17 @@ Authors:
 Copyright 2015,  Sage Bionetworks (http://sagebase.org), Apache v2.0 License
 """
 
+# Names of the scalar gait features, in feature table column order:
+gait_feature_names = ['number_of_steps', 'cadence', 'velocity',
+                      'avg_step_length', 'avg_stride_length',
+                      'avg_step_duration', 'sd_step_durations',
+                      'avg_number_of_strides', 'avg_stride_duration',
+                      'sd_stride_durations', 'step_regularity',
+                      'stride_regularity', 'symmetry']
 
-def walk_direction_attitude(ax, ay, az, uw, ux, uy, uz, plot_test=False):
+
+def walk_direction_attitude(ax, ay, az, uw, ux, uy, uz, plot_test=False,
+                            out=None):
     """
     Estimate local walk (not cardinal) directions by rotation with attitudes.
 
@@ -70,11 +79,14 @@ def walk_direction_attitude(ax, ay, az, uw, ux, uy, uz, plot_test=False):
         z of attitude quaternion
     plot_test : Boolean
         plot rotated vectors?
+    out : numpy array of floats
+        optional preallocated output array (number of time points x 3)
 
     Returns
     -------
-    directions : list of lists of three floats
+    directions : numpy array of floats
         unit vector of local walk (not cardinal) direction at each time point
+        (number of time points x 3)
 
     Examples
     --------
@@ -92,41 +104,18 @@ def walk_direction_attitude(ax, ay, az, uw, ux, uy, uz, plot_test=False):
     """
     import numpy as np
 
-    def quaternion_rotation_matrix(q):
-        """Rotation matrix from a quaternion"""
-        r11 = q[0]**2 + q[1]**2 - q[2]**2 - q[3]**2
-        r12 = 2 * q[1] * q[2] + 2 * q[0] * q[3]
-        r13 = 2 * q[1] * q[3] - 2 * q[0] * q[2]
-        r21 = 2 * q[1] * q[2] - 2 * q[0] * q[3]
-        r22 = q[0]**2 - q[1]**2 + q[2]**2 - q[3]**2
-        r23 = 2 * q[2] * q[3] + 2 * q[0] * q[1]
-        r31 = 2 * q[1] * q[3] + 2 * q[0] * q[2]
-        r32 = 2 * q[2] * q[3] - 2 * q[0] * q[1]
-        r33 = q[0]**2 - q[1]**2 - q[2]**2 + q[3]**2
-
-        rot = np.array(((r11, r12, r13), (r21, r22, r23), (r31, r32, r33)))
-
-        return rot
-
-    def rotate_with_attitude(attitude, acceleration):
-        """Rotate acceleration with attitude quaternion"""
-        rot = quaternion_rotation_matrix(attitude)
-        rotated = np.dot(rot, acceleration)
+    from mhealthx.kernels import get_kernel
 
-        return rotated
-
-    directions = []
-    for i, x in enumerate(ax):
-        attitude = [uw[i], ux[i], uy[i], uz[i]]
-        acceleration = [x, ay[i], az[i]]
-        directions.append(rotate_with_attitude(attitude, acceleration))
+    # Rotate all acceleration vectors with their attitude quaternions:
+    rotate_with_quaternions = get_kernel('rotate_with_quaternions')
+    attitudes = np.column_stack((uw, ux, uy, uz))
+    accelerations = np.column_stack((ax, ay, az))
+    directions = rotate_with_quaternions(attitudes, accelerations, out=out)
 
     # Plot vectors:
     if plot_test:
         from mhealthx.utilities import plot_vectors
-        dx = [x[0] for x in directions]
-        dy = [x[1] for x in directions]
-        dz = [x[2] for x in directions]
+        dx, dy, dz = directions.T
         title = 'Acceleration vectors + attitude-rotated vectors'
         plot_vectors(ax, ay, az, dx, dy, dz, title)
 
@@ -198,26 +187,30 @@ def walk_direction_preheel(ax, ay, az, t, sample_rate,
     import numpy as np
 
     from mhealthx.extractors.pyGait import heel_strikes
-    from mhealthx.signals import compute_interpeak
+    from mhealthx.signals import compute_interpeak, windowed_argmax
+    from mhealthx.spectral import SpectralContext
 
     # Sum of absolute values across accelerometer axes:
     data = np.abs(ax) + np.abs(ay) + np.abs(az)
 
+    # Demean data up front (heel_strikes() expects demeaned data), and
+    # share spectra of a demeaned copy between both interpeak estimates
+    # below, so they do not depend on heel_strikes() modifying data:
+    data = data - np.mean(data)
+    spectral = SpectralContext(data, sample_rate, demean=True)
+
     # Find maximum peaks of smoothed data:
     plot_test2 = False
     dummy, ipeaks_smooth = heel_strikes(data, sample_rate, threshold,
-                                        order, cutoff, plot_test2, t)
+                                        order, cutoff, plot_test2, t,
+                                        spectral)
 
     # Compute number of samples between peaks using the real part of the FFT:
-    interpeak = compute_interpeak(data, sample_rate)
-    decel = np.int(np.round(stride_fraction * interpeak))
+    interpeak = compute_interpeak(data, sample_rate, spectral)
+    decel = int(np.round(stride_fraction * interpeak))
 
     # Find maximum peaks close to maximum peaks of smoothed data:
-    ipeaks = []
-    for ipeak_smooth in ipeaks_smooth:
-        ipeak = np.argmax(data[ipeak_smooth - decel:ipeak_smooth + decel])
-        ipeak += ipeak_smooth - decel
-        ipeaks.append(ipeak)
+    ipeaks = windowed_argmax(data, ipeaks_smooth, decel).tolist()
 
     # Plot peaks and deceleration phase of stride:
     if plot_test:
@@ -259,20 +252,24 @@ def walk_direction_preheel(ax, ay, az, t, sample_rate,
     return direction
 
 
-def project_axes(vectors, unit_vectors):
+def project_axes(vectors, unit_vectors, out=None):
     """
     Project vectors on unit vectors.
 
     Parameters
     ----------
-    vectors : list of lists of x, y, z coordinates or numpy array equivalent
-    unit_vectors : list of lists of x, y, z coordinates (or numpy arrays)
-        unit vectors to project vectors onto
+    vectors : numpy array of floats (or list of lists of x, y, z coordinates)
+        number of vectors x 3
+    unit_vectors : numpy array of floats (or list of lists of x, y, z)
+        unit vectors to project vectors onto (number of vectors x 3),
+        or a single unit vector (3) to project all vectors onto
+    out : numpy array of floats
+        optional preallocated output array (number of vectors x 3)
 
     Returns
     -------
-    projection_vectors : list of lists of x, y, z coordinates
-        vectors projected onto unit vectors
+    projection_vectors : numpy array of floats
+        vectors projected onto unit vectors (number of vectors x 3)
 
     Examples
     --------
@@ -282,8 +279,8 @@ def project_axes(vectors, unit_vectors):
     >>> device_motion = True
     >>> start = 150
     >>> t, axyz, gxyz, uxyz, rxyz, sample_rate, duration = read_accel_json(input_file, start, device_motion)
-    >>> vectors = zip(axyz[0], axyz[1], axyz[2])
-    >>> vectors = [vectors[0], vectors[1], vectors[2]]
+    >>> import numpy as np
+    >>> vectors = np.transpose(axyz)[0:3]
     >>> from mhealthx.extractors.pyGait import project_axes
     >>> unit_vectors = [1, 1, 1]
     >>> projection_vectors = project_axes(vectors, unit_vectors)
@@ -291,12 +288,15 @@ def project_axes(vectors, unit_vectors):
     """
     import numpy as np
 
-    projection_vectors = []
-    for i, v in enumerate(vectors):
-        unit_vector = np.asarray(unit_vectors[i])
-        magnitude = np.asarray(v).dot(unit_vector)
-        projection_vector = magnitude * unit_vector
-        projection_vectors.append(projection_vector.tolist())
+    vectors = np.asarray(vectors, dtype=np.float64)
+    unit_vectors = np.asarray(unit_vectors, dtype=np.float64)
+    if unit_vectors.ndim == 1:
+        unit_vectors = unit_vectors[np.newaxis, :]
+
+    # Row-wise dot products, then scale each unit vector:
+    magnitudes = np.einsum('ni,ni->n', vectors, unit_vectors)
+    projection_vectors = np.multiply(magnitudes[:, np.newaxis], unit_vectors,
+                                     out=out)
 
     return projection_vectors
 
@@ -345,16 +345,18 @@ def project_walk_direction_attitude(ax, ay, az, uw, ux, uy, uz):
     >>> px, py, pz = project_walk_direction_attitude(ax, ay, az, uw, ux, uy, uz)
 
     """
+    import numpy as np
+
     from mhealthx.extractors.pyGait import walk_direction_attitude, \
         project_axes
 
+    vectors = np.column_stack((ax, ay, az))
     directions = walk_direction_attitude(ax, ay, az, uw, ux, uy, uz)
 
-    vectors = project_axes(zip(ax, ay, az), directions)
-
-    px = [x[0] for x in vectors]
-    py = [x[1] for x in vectors]
-    pz = [x[2] for x in vectors]
+    # Project into one buffer whose rows are the contiguous px, py, pz:
+    buffer = np.empty((3, vectors.shape[0]))
+    project_axes(vectors, directions, out=buffer.T)
+    px, py, pz = buffer
 
     return px, py, pz
 
@@ -415,24 +417,26 @@ def project_walk_direction_preheel(ax, ay, az, t, sample_rate,
     >>> px, py, pz = project_walk_direction_preheel(ax, ay, az, t, sample_rate, stride_fraction, threshold, order, cutoff)
 
     """
+    import numpy as np
+
     from mhealthx.extractors.pyGait import walk_direction_preheel, \
         project_axes
 
-    directions = walk_direction_preheel(ax, ay, az, t, sample_rate,
+    vectors = np.column_stack((ax, ay, az))
+    direction = walk_direction_preheel(ax, ay, az, t, sample_rate,
                                        stride_fraction, threshold, order,
                                        cutoff, False)
 
-    vectors = project_axes(zip(ax, ay, az), directions)
-
-    px = [x[0] for x in vectors]
-    py = [x[1] for x in vectors]
-    pz = [x[2] for x in vectors]
+    # Project into one buffer whose rows are the contiguous px, py, pz:
+    buffer = np.empty((3, vectors.shape[0]))
+    project_axes(vectors, direction, out=buffer.T)
+    px, py, pz = buffer
 
     return px, py, pz
 
 
 def heel_strikes(data, sample_rate, threshold=0.2, order=4, cutoff=5,
-                 plot_test=False, t=None):
+                 plot_test=False, t=None, spectral=None):
     """
     Estimate heel strike times between sign changes in accelerometer data.
 
@@ -475,13 +479,16 @@ def heel_strikes(data, sample_rate, threshold=0.2, order=4, cutoff=5,
         plot heel strikes?
     t : list or numpy array
         accelerometer time points
+    spectral : SpectralContext or None
+        cached spectra of data (see mhealthx.spectral), to share
+        with other estimators computed from the same (demeaned) data
 
     Returns
     -------
     strikes : numpy array of floats
-        heel strike timings
+        heel strike timings (empty if no peaks are found)
     strike_indices : list of integers
-        heel strike timing indices
+        heel strike timing indices (empty if no peaks are found)
 
     Examples
     --------
@@ -505,7 +512,8 @@ def heel_strikes(data, sample_rate, threshold=0.2, order=4, cutoff=5,
 
     from mhealthx.signals import compute_interpeak
     from mhealthx.signals import butter_lowpass_filter, \
-                                 crossings_nonzero_pos2neg
+                                 crossings_nonzero_pos2neg, windowed_argmax
+    from mhealthx.kernels import get_kernel
 
     # Demean data (not in iGAIT):
     data -= np.mean(data)
@@ -521,24 +529,18 @@ def heel_strikes(data, sample_rate, threshold=0.2, order=4, cutoff=5,
     # Find the peaks of AP acceleration preceding the transitional positions,
     # and greater than the product of a threshold and the maximum value of
     # the AP acceleration:
-    strike_indices_smooth = []
     filter_threshold = np.abs(threshold * np.max(filtered))
-    for i in range(1, np.size(transitions)):
-        segment = range(transitions[i-1], transitions[i])
-        imax = np.argmax(filtered[segment])
-        if filtered[segment[imax]] > filter_threshold:
-            strike_indices_smooth.append(segment[imax])
+    segment_argmax = get_kernel('segment_argmax')
+    imaxes = segment_argmax(filtered, transitions)
+    strike_indices_smooth = imaxes[filtered[imaxes] > filter_threshold]
 
     # Compute number of samples between peaks using the real part of the FFT:
-    interpeak = compute_interpeak(data, sample_rate)
-    decel = np.int(interpeak / 2)
+    interpeak = compute_interpeak(data, sample_rate, spectral)
+    decel = int(interpeak / 2)
 
     # Find maximum peaks close to maximum peaks of smoothed data:
-    strike_indices = []
-    for ismooth in strike_indices_smooth:
-        istrike = np.argmax(data[ismooth - decel:ismooth + decel])
-        istrike = istrike + ismooth - decel
-        strike_indices.append(istrike)
+    strike_indices = windowed_argmax(data, strike_indices_smooth,
+                                     decel).tolist()
 
     if plot_test:
         from pylab import plt
@@ -561,14 +563,343 @@ def heel_strikes(data, sample_rate, threshold=0.2, order=4, cutoff=5,
         plt.legend(loc='lower left', shadow=True)
         plt.show()
 
-    strikes = np.asarray(strike_indices)
-    strikes -= strikes[0]
+    strikes = np.asarray(strike_indices, dtype=np.float64)
+    if strikes.size:
+        strikes -= strikes[0]
     strikes = strikes / sample_rate
 
     return strikes, strike_indices
 
 
-def gait_regularity_symmetry(data, step_period, stride_period):
+def heel_strikes_sweep(data, sample_rate, thresholds, orders, cutoffs):
+    """
+    Estimate heel strikes for every combination of heel_strikes() parameters.
+
+    Work is shared across the parameter grid: the data are demeaned and
+    the number of samples between peaks (compute_interpeak()) is computed
+    once, the data are filtered and their crossings and segment maxima are
+    found once per (order, cutoff), and only the threshold comparison and
+    peak refinement are repeated for each threshold.
+
+    Parameters
+    ----------
+    data : numpy array
+        accelerometer data along any (preferably forward walking) axis
+    sample_rate : float
+        sample rate of accelerometer reading (Hz)
+    thresholds : list of floats
+        ratios to the maximum value of the anterior-posterior acceleration
+    orders : list of integers
+        orders of the Butterworth filter
+    cutoffs : list of floats
+        cutoff frequencies of the Butterworth filter (Hz)
+
+    Returns
+    -------
+    sweep : list of tuples
+        (threshold, order, cutoff, strikes, strike_indices) for each
+        combination of parameters, with strikes and strike_indices
+        as returned by heel_strikes()
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.pyGait import heel_strikes_sweep
+    >>> t = np.arange(3000) / 100.0
+    >>> data = np.sin(2 * np.pi * 1.8 * t) + 0.3 * np.random.randn(3000)
+    >>> sweep = heel_strikes_sweep(data, 100, [0.1, 0.2, 0.4], [2, 4], [3, 5])
+    >>> len(sweep)
+    12
+
+    """
+    import numpy as np
+
+    from mhealthx.signals import compute_interpeak
+    from mhealthx.signals import butter_lowpass_filter, \
+                                 crossings_nonzero_pos2neg, windowed_argmax
+    from mhealthx.spectral import SpectralContext
+    from mhealthx.kernels import get_kernel
+
+    # Demean data (not in iGAIT), leaving the input unchanged:
+    data = np.asarray(data, dtype=np.float64)
+    data = data - np.mean(data)
+
+    # Number of samples between peaks (independent of the filter):
+    interpeak = compute_interpeak(data, sample_rate,
+                                  SpectralContext(data, sample_rate))
+    decel = int(interpeak / 2)
+
+    segment_argmax = get_kernel('segment_argmax')
+    sweep = []
+    for order in orders:
+        for cutoff in cutoffs:
+            filtered = butter_lowpass_filter(data, sample_rate, cutoff, order)
+            transitions = crossings_nonzero_pos2neg(filtered)
+            imaxes = segment_argmax(filtered, transitions)
+            peaks = filtered[imaxes]
+            max_filtered = np.max(filtered)
+
+            for threshold in thresholds:
+                filter_threshold = np.abs(threshold * max_filtered)
+                strike_indices_smooth = imaxes[peaks > filter_threshold]
+                strike_indices = windowed_argmax(data, strike_indices_smooth,
+                                                 decel).tolist()
+
+                strikes = np.asarray(strike_indices, dtype=np.float64)
+                if strikes.size:
+                    strikes -= strikes[0]
+                strikes = strikes / sample_rate
+
+                sweep.append((threshold, order, cutoff, strikes,
+                              strike_indices))
+
+    return sweep
+
+
+class HeelStrikeDetector(object):
+    """
+    Detect heel strikes online, from consecutive blocks of accelerometer data.
+
+    This follows heel_strikes(), but keeps its state across blocks so that
+    memory and latency are bounded by the block size (plus half the number
+    of samples between peaks), for long recordings and live streams:
+
+        - The low-pass Butterworth filter carries its state across blocks
+          (scipy.signal.sosfilt with zi), so the filtered signal is the
+          same as filtering the concatenated blocks.
+        - Positive-to-negative crossings and the maximum of the filtered
+          data in the (open) segment since the last crossing are tracked
+          across block boundaries.
+        - Each peak is refined to the maximum of the raw data within
+          half the number of samples between peaks, as soon as the
+          samples after the peak have arrived.
+
+    Unlike heel_strikes(), which sees the whole recording, data are
+    demeaned by the running mean of all samples received so far (or by a
+    fixed offset), a peak must exceed threshold times the maximum filtered
+    value received so far, and the number of samples between peaks is
+    given, or estimated from the first block (see compute_interpeak()).
+
+    Parameters
+    ----------
+    sample_rate : float
+        sample rate of accelerometer reading (Hz)
+    threshold : float
+        ratio to the maximum value of the anterior-posterior acceleration
+    order : integer
+        order of the Butterworth filter
+    cutoff : integer
+        cutoff frequency of the Butterworth filter (Hz)
+    interpeak : integer
+        number of samples between peaks (if None, estimated from the
+        first block, which should then span several strides)
+    offset : float
+        fixed value to subtract from the data (if None, the running mean)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.pyGait import HeelStrikeDetector
+    >>> t = np.arange(3000) / 100.0
+    >>> data = np.sin(2 * np.pi * 1.8 * t) + 0.3 * np.random.randn(3000)
+    >>> detector = HeelStrikeDetector(100, threshold=0.2, order=4, cutoff=5)
+    >>> for block in np.array_split(data, 30):
+    ...     strikes, strike_indices = detector.update(block)
+    >>> strikes, strike_indices = detector.finish()
+
+    """
+    def __init__(self, sample_rate, threshold=0.2, order=4, cutoff=5,
+                 interpeak=None, offset=None):
+        import numpy as np
+
+        from mhealthx.signals import butter_lowpass_sos
+
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.offset = offset
+        if interpeak is None:
+            self.decel = None
+        else:
+            self.decel = int(interpeak / 2)
+        self.nsamples = 0
+
+        self._sos = butter_lowpass_sos(sample_rate, cutoff, order)
+        self._zi = np.zeros((self._sos.shape[0], 2))
+        self._sum = 0.0
+        self._max_filtered = -np.inf
+
+        # Last filtered sample (not yet known to be a crossing or not):
+        self._tail = np.zeros(0)
+        # Open segment since the last crossing: [index, filtered maximum,
+        # refinement window or None]:
+        self._segment = None
+        # Refinement windows still waiting for samples, each:
+        # [peak index, window end, index of maximum, maximum, time]:
+        self._pending = []
+        # Last decel + 1 samples and time points of the previous blocks:
+        self._history = np.zeros(0)
+        self._t_history = np.zeros(0)
+
+    def update(self, data, t=None):
+        """
+        Process the next block of accelerometer data.
+
+        Parameters
+        ----------
+        data : list or numpy array of floats
+            next block of accelerometer data (such as the forward axis)
+        t : list or numpy array of floats
+            time points of the block (if None, sample index / sample_rate)
+
+        Returns
+        -------
+        strikes : numpy array of floats
+            times of heel strikes completed with this block
+        strike_indices : numpy array of integers
+            sample indices (from the first block) of these heel strikes
+        """
+        import numpy as np
+        from scipy.signal import sosfilt
+
+        from mhealthx.signals import compute_interpeak, windowed_argmax
+        from mhealthx.kernels import get_kernel
+
+        data = np.asarray(data, dtype=np.float64)
+        if t is None:
+            t = (self.nsamples + np.arange(data.size)) / \
+                np.float64(self.sample_rate)
+        else:
+            t = np.asarray(t, dtype=np.float64)
+        n0 = self.nsamples
+        n1 = n0 + data.size
+        if data.size == 0:
+            return self._emit(n1)
+
+        # Demean data with a running mean (or fixed offset):
+        self._sum += np.sum(data)
+        if self.offset is None:
+            offset = self._sum / n1
+        else:
+            offset = self.offset
+        demeaned = data - offset
+        if self.decel is None:
+            # (Too few samples leave no non-zero peak frequency:)
+            try:
+                with np.errstate(divide='ignore'):
+                    interpeak = compute_interpeak(demeaned, self.sample_rate)
+            except (OverflowError, ValueError):
+                interpeak = 0
+            self.decel = int(interpeak / 2)
+            if self.decel < 1:
+                raise IOError("first block is too short to estimate "
+                              "the number of samples between peaks")
+
+        # Low-pass filter, continuing from the previous block's state:
+        filtered, self._zi = sosfilt(self._sos, demeaned, zi=self._zi)
+        self._max_filtered = max(self._max_filtered, np.max(filtered))
+        filter_threshold = np.abs(self.threshold * self._max_filtered)
+
+        # Extend earlier refinement windows with this block:
+        entries = list(self._pending)
+        if self._segment is not None:
+            entries.append(self._segment[2])
+        for entry in entries:
+            if entry[1] > n0:
+                part = data[:min(entry[1], n1) - n0]
+                i = np.argmax(part)
+                if part[i] > entry[3]:
+                    entry[2:5] = [n0 + i, part[i], t[i]]
+
+        # Positive-to-negative crossings (the last sample of the block
+        # waits for the next block to decide):
+        values = np.concatenate((self._tail, filtered))
+        start = n0 - self._tail.size
+        positive = values > 0
+        crossings = np.flatnonzero(positive[:-1] & ~positive[1:])
+        self._tail = values[-1:]
+        values = values[:-1]
+
+        # Maxima of the segments closed by these crossings, and of the
+        # new open segment:
+        closed = []
+        if crossings.size:
+            head = values[:crossings[0]]
+            if self._segment is not None:
+                if head.size and np.max(head) > self._segment[1]:
+                    i = np.argmax(head)
+                    self._segment = [start + i, head[i], None]
+                closed.append(self._segment)
+            segment_argmax = get_kernel('segment_argmax')
+            for i in segment_argmax(values, crossings):
+                closed.append([start + i, values[i], None])
+            last = values[crossings[-1]:]
+            i = np.argmax(last)
+            self._segment = [start + crossings[-1] + i, last[i], None]
+        elif self._segment is not None and values.size:
+            i = np.argmax(values)
+            if values[i] > self._segment[1]:
+                self._segment = [start + i, values[i], None]
+
+        # Start refinement windows for new peaks above threshold:
+        new = [x for x in closed if x[1] > filter_threshold and x[2] is None]
+        if self._segment is not None and self._segment[2] is None:
+            new.append(self._segment)
+        if new:
+            raw = np.concatenate((self._history, data))
+            traw = np.concatenate((self._t_history, t))
+            raw_start = n0 - self._history.size
+            centers = np.array([x[0] for x in new]) - raw_start
+            imaxes = windowed_argmax(raw, centers, self.decel)
+            for x, i in zip(new, imaxes):
+                x[2] = [x[0], x[0] + self.decel, raw_start + i, raw[i],
+                        traw[i]]
+        self._pending.extend([x[2] for x in closed
+                              if x[1] > filter_threshold])
+
+        # Keep the last decel + 1 samples for the next block's windows:
+        keep = self.decel + 1
+        self._history = np.concatenate((self._history, data))[-keep:]
+        self._t_history = np.concatenate((self._t_history, t))[-keep:]
+        self.nsamples = n1
+
+        return self._emit(n1)
+
+    def finish(self):
+        """
+        Complete the remaining heel strikes at the end of the data
+        (the segment after the last crossing is discarded, as in
+        heel_strikes()).
+
+        Returns
+        -------
+        strikes : numpy array of floats
+            times of the remaining heel strikes
+        strike_indices : numpy array of integers
+            sample indices (from the first block) of these heel strikes
+        """
+        strikes, strike_indices = self._emit(float('inf'))
+        self._segment = None
+
+        return strikes, strike_indices
+
+    def _emit(self, end):
+        """Heel strikes whose refinement windows end by sample end."""
+        import numpy as np
+
+        ndone = 0
+        while ndone < len(self._pending) and self._pending[ndone][1] <= end:
+            ndone += 1
+        done = self._pending[:ndone]
+        self._pending = self._pending[ndone:]
+
+        strikes = np.array([x[4] for x in done], dtype=np.float64)
+        strike_indices = np.array([x[2] for x in done], dtype=np.int64)
+
+        return strikes, strike_indices
+
+
+def gait_regularity_symmetry(data, step_period, stride_period,
+                             coefficients=None):
     """
     Compute step and stride regularity and symmetry from accelerometer data.
 
@@ -601,6 +932,9 @@ def gait_regularity_symmetry(data, step_period, stride_period):
         step period
     stride_period : integer
         stride period
+    coefficients : numpy array
+        autocorrelation coefficients of data, if already computed
+        (autocorrelate(data, unbias=2, normalize=2))
 
     Returns
     -------
@@ -630,17 +964,18 @@ def gait_regularity_symmetry(data, step_period, stride_period):
 
     from mhealthx.signals import autocorrelate
 
-    coefficients, N = autocorrelate(data, unbias=2, normalize=2,
-                                    plot_test=False)
+    if coefficients is None:
+        coefficients, N = autocorrelate(data, unbias=2, normalize=2,
+                                        plot_test=False)
 
-    step_regularity = coefficients[step_period]
-    stride_regularity = coefficients[stride_period]
+    step_regularity = coefficients[int(step_period)]
+    stride_regularity = coefficients[int(stride_period)]
     symmetry = np.abs(stride_regularity - step_regularity)
 
     return step_regularity, stride_regularity, symmetry
 
 
-def gait(strikes, data, duration, distance=None):
+def gait(strikes, data, duration, distance=None, coefficients=None):
     """
     Extract gait features from estimated heel strikes and accelerometer data.
 
@@ -662,6 +997,9 @@ def gait(strikes, data, duration, distance=None):
         duration of accelerometer reading (s)
     distance : float
         distance traversed
+    coefficients : numpy array
+        autocorrelation coefficients of data, if already computed
+        (see gait_regularity_symmetry())
 
     Returns
     -------
@@ -752,7 +1090,8 @@ def gait(strikes, data, duration, distance=None):
     stride_period = 1 / avg_stride_duration
 
     step_regularity, stride_regularity, symmetry = \
-        gait_regularity_symmetry(data, step_period, stride_period)
+        gait_regularity_symmetry(data, step_period, stride_period,
+                                 coefficients)
 
     # Set distance-based measures to None if distance not set:
     if distance:
@@ -769,3 +1108,178 @@ def gait(strikes, data, duration, distance=None):
         avg_step_duration, sd_step_durations, strides, stride_durations, \
         avg_number_of_strides, avg_stride_duration, sd_stride_durations, \
         step_regularity, stride_regularity, symmetry
+
+
+def gait_features(strikes, data, duration, distance=None, coefficients=None):
+    """
+    Extract gait() features in feature table column order.
+
+    Parameters
+    ----------
+    strikes : numpy array
+        heel strike timings
+    data : list or numpy array
+        accelerometer data along forward axis
+    duration : float
+        duration of accelerometer reading (s)
+    distance : float
+        units of length (so speed is in the same units)
+    coefficients : numpy array
+        autocorrelation coefficients of data (see gait())
+
+    Returns
+    -------
+    features : list of floats
+        features ordered as gait_feature_names
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.pyGait import gait_features
+    >>> t = np.arange(3000) / 100.0
+    >>> data = np.sin(2 * np.pi * 1.8 * t)
+    >>> strikes = np.arange(0.3, 29, 0.55)
+    >>> features = gait_features(strikes, data, 30, 90)
+    >>> len(features)
+    13
+
+    """
+    from mhealthx.extractors.pyGait import gait
+
+    number_of_steps, cadence, velocity, avg_step_length, avg_stride_length,\
+    step_durations, avg_step_duration, sd_step_durations, strides, \
+    stride_durations, avg_number_of_strides, avg_stride_duration, \
+    sd_stride_durations, step_regularity, stride_regularity, \
+    symmetry = gait(strikes, data, duration, distance, coefficients)
+
+    features = [number_of_steps, cadence, velocity, avg_step_length,
+                avg_stride_length, avg_step_duration, sd_step_durations,
+                avg_number_of_strides, avg_stride_duration,
+                sd_stride_durations, step_regularity, stride_regularity,
+                symmetry]
+
+    return features
+
+
+def gait_batch(strike_indices, sample_rates, durations, distances=None,
+               datas=None):
+    """
+    Extract gait() features from the heel strikes of many records at once.
+
+    Strikes of all records are stored in one ragged array, and step and
+    stride durations, cadence and their statistics are computed for all
+    records with segmented (vectorized) reductions. If data are supplied,
+    regularity and symmetry are computed from one batched autocorrelation
+    of all records (see autocorrelate_batch()).
+
+    Parameters
+    ----------
+    strike_indices : list of lists or numpy arrays of integers,
+                     or RaggedArray
+        heel strike timing indices of each record (see heel_strikes())
+    sample_rates : float or list of floats
+        sample rate of each record's accelerometer reading (Hz)
+    durations : float or list of floats
+        duration of each record's accelerometer reading (s)
+    distances : float or list of floats
+        distance traversed in each record (if None, distance-based
+        features are NaN)
+    datas : list of lists or numpy arrays of floats
+        accelerometer data along forward axis for each record
+        (if None, regularity and symmetry features are NaN)
+
+    Returns
+    -------
+    features : numpy array of floats
+        number of records x number of features, columns ordered as in
+        gait_feature_names (NaN where a feature is undefined, such as
+        stride features of records with fewer than four heel strikes)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.pyGait import gait_batch
+    >>> strike_indices = [[10, 62, 110, 161, 213, 262], [5, 60, 118, 170]]
+    >>> features = gait_batch(strike_indices, 100, [3.0, 2.0])
+    >>> features.shape
+    (2, 13)
+
+    """
+    import numpy as np
+
+    from mhealthx.ragged import RaggedArray
+    from mhealthx.signals import autocorrelate_batch
+
+    if isinstance(strike_indices, RaggedArray):
+        strikes = strike_indices
+    else:
+        strikes = RaggedArray.from_arrays(strike_indices)
+    nrecords = len(strikes)
+    lengths = strikes.lengths
+
+    sample_rates = np.broadcast_to(np.asarray(sample_rates, np.float64),
+                                   (nrecords,))
+    durations = np.broadcast_to(np.asarray(durations, np.float64),
+                                (nrecords,))
+
+    # Strike times (s) relative to each record's first strike:
+    firsts = np.repeat(strikes.values[strikes.offsets[:-1][lengths > 0]],
+                       lengths[lengths > 0])
+    strikes = RaggedArray((strikes.values - firsts) /
+                          np.repeat(sample_rates, lengths), strikes.offsets)
+
+    # Step durations:
+    step_durations = strikes.diff()
+    avg_step_duration = step_durations.mean()
+    sd_step_durations = step_durations.std()
+
+    number_of_steps = lengths.astype(np.float64)
+    cadence = number_of_steps / durations
+
+    # Stride durations of alternating heel strikes (even and odd strikes):
+    stride_durations = strikes.diff(2)
+    even = stride_durations.positions() % 2 == 0
+    stride_durations1 = stride_durations.select(even)
+    stride_durations2 = stride_durations.select(~even)
+
+    avg_number_of_strides = number_of_steps / 2
+    avg_stride_duration = (stride_durations1.mean() +
+                           stride_durations2.mean()) / 2
+    sd_stride_durations = (stride_durations1.std() +
+                           stride_durations2.std()) / 2
+
+    # Regularity and symmetry from a batched autocorrelation:
+    step_regularity = np.full(nrecords, np.nan)
+    stride_regularity = np.full(nrecords, np.nan)
+    if datas is not None:
+        coefficients, N = autocorrelate_batch(datas, unbias=2, normalize=2)
+        irecords = np.arange(nrecords)
+        for regularity, duration in [(step_regularity, avg_step_duration),
+                                     (stride_regularity,
+                                      avg_stride_duration)]:
+            defined = np.isfinite(duration) & (duration > 0)
+            lags = np.zeros(nrecords, dtype=np.int64)
+            lags[defined] = (1 / duration[defined]).astype(np.int64)
+            defined &= lags < N
+            regularity[defined] = coefficients[irecords[defined],
+                                               lags[defined]]
+    symmetry = np.abs(stride_regularity - step_regularity)
+
+    # Distance-based measures (NaN if distance not set):
+    if distances is None:
+        distances = np.nan
+    distances = np.broadcast_to(np.asarray(distances, np.float64),
+                                (nrecords,)).copy()
+    distances[distances == 0] = np.nan
+    velocity = distances / durations
+    avg_step_length = number_of_steps / distances
+    avg_stride_length = avg_number_of_strides / distances
+
+    features = np.column_stack((number_of_steps, cadence, velocity,
+                                avg_step_length, avg_stride_length,
+                                avg_step_duration, sd_step_durations,
+                                avg_number_of_strides, avg_stride_duration,
+                                sd_stride_durations, step_regularity,
+                                stride_regularity, symmetry))
+
+    return features
@@ -53,10 +53,10 @@ def max_entropy_partition(data, number_of_symbols):
 
     # Change into long vector:
     data = data.flatten()
+    if data.size < number_of_symbols:
+        raise IOError("data should have at least number_of_symbols values")
 
-    # Sort and partition data:
-    data = np.sort(data)
-    len_data = np.float(len(data))
+    len_data = float(len(data))
 
     #-------------------------------------------------------------------------
     # This code follows the article, resulting in K+1 partitions
@@ -74,13 +74,17 @@ def max_entropy_partition(data, number_of_symbols):
     # This code matches the Matlab code output, resulting in K-1 partitions
     #-------------------------------------------------------------------------
     npartitions = number_of_symbols - 1
-    partition = np.zeros(npartitions)
+    ipartition = [int(np.floor(ipart * len_data / number_of_symbols)) - 1
+                  for ipart in range(1, npartitions + 1)]
 
-    for ipart in range(1, npartitions + 1):
-        partition[ipart - 1] = data[np.floor(ipart * len_data /
-                                             number_of_symbols) - 1]
+    # Select (rather than sort) the values at these positions of the
+    # sorted data:
+    if ipartition:
+        partition = np.partition(data, ipartition)[ipartition]
+    else:
+        partition = np.zeros(0)
 
-    return partition
+    return partition.astype(np.float64)
 
 
 def generate_symbol_sequence(data, partition):
@@ -94,7 +98,8 @@ def generate_symbol_sequence(data, partition):
 
     Returns
     -------
-    symbols : numpy array
+    symbols : numpy array of integers
+        symbol (1 to len(partition) + 1) of each data value
 
     Examples
     --------
@@ -105,18 +110,15 @@ def generate_symbol_sequence(data, partition):
     >>> number_of_symbols = 4
     >>> partition = max_entropy_partition(data, number_of_symbols)
     >>> symbols = generate_symbol_sequence(data, partition)
-    array([ 4.,  1.,  3.,  4.,  2.,  3.,  4.,  3.,  4.,  2.,  1.,  2.])
+    array([4, 1, 3, 4, 2, 3, 4, 3, 4, 2, 1, 2])
 
     """
-    import numpy as np
+    from mhealthx.kernels import get_kernel
 
-    partition = np.hstack((partition, np.Inf))
-    symbols = np.zeros(len(data))
-    for i1 in range(len(data)):
-        for i2 in range(len(partition)):
-            if partition[i2] > data[i1]:
-                symbols[i1] = i2 + 1
-                break
+    # Symbol i + 1 for data in [partition[i-1], partition[i]), found by
+    # binary search of the (sorted) partition:
+    symbolize = get_kernel('symbolize')
+    symbols = symbolize(data, partition)
 
     return symbols
 
@@ -160,36 +162,137 @@ def analyze_symbol_sequence(symbols, number_of_states, morph_matrix_flag):
     """
     import numpy as np
 
-    morph_matrix = np.zeros((number_of_states, number_of_states))
-    pvec = np.zeros(number_of_states)
+    from mhealthx.kernels import get_kernel
 
-    for isymbol in range(1, len(symbols)):
-        index1 = symbols[isymbol - 1] - 1
-        index2 = symbols[isymbol] - 1
-        pvec[index1] += 1
-        if morph_matrix_flag:
-            morph_matrix[index2, index1] += 1
+    # Count transitions [next state, current state] and current states:
+    count_transitions = get_kernel('count_transitions')
+    morph_matrix, pvec = count_transitions(symbols, number_of_states)
+    if not morph_matrix_flag:
+        morph_matrix = np.zeros((number_of_states, number_of_states))
 
     # Normalize the computed vector:
     pvec = pvec / np.sum(pvec)
 
-    # Normalize each row of Matrix to make it a stochastic matrix:
+    # Normalize each row of Matrix to make it a stochastic matrix
+    # (empty rows take the state probability vector):
     if morph_matrix_flag:
-        for istate in range(number_of_states):
-            row_sum = np.sum(morph_matrix[istate, :])
-            if row_sum == 0:
-                morph_matrix[istate, :] = pvec
-            else:
-                morph_matrix[istate, :] /= row_sum
+        row_sums = np.sum(morph_matrix, axis=1)
+        empty = row_sums == 0
+        row_sums[empty] = 1
+        morph_matrix /= row_sums[:, np.newaxis]
+        morph_matrix[empty, :] = pvec
 
     return morph_matrix, pvec
 
 
-def sdf_features(data, number_of_symbols, pi_matrix_flag=False):
+def analyze_word_sequence(symbols, number_of_symbols, depth, max_iter=1000,
+                          tolerance=1e-12):
+    """
+    Estimate the state transition matrix and stationary state probability
+    vector of a depth-D Markov machine, whose states are words of depth
+    consecutive symbols.
+
+    Each word is encoded as an integer (its symbols as base
+    number_of_symbols digits), and only observed words are kept as states,
+    so memory is proportional to the number of observed words rather than
+    to number_of_symbols**depth. Transitions between consecutive
+    (overlapping) words are counted into a sparse matrix, and the
+    stationary vector is found by sparse power iteration.
+
+    Parameters
+    ----------
+    symbols : numpy array of integers
+        symbol sequence (1 to number_of_symbols)
+    number_of_symbols : integer
+        number of symbols
+    depth : integer
+        number of consecutive symbols per state (word)
+    max_iter : integer
+        maximum number of power iterations
+    tolerance : float
+        stop iterating when the stationary vector changes less than this
+        (sum of absolute differences)
+
+    Returns
+    -------
+    states : numpy array of integers
+        integer codes of the observed words (sorted)
+    morph_matrix : scipy.sparse.csr_matrix
+        transition probabilities [next state, current state] between
+        observed states (each observed current state's column sums to 1)
+    pvec : numpy array of floats
+        stationary probability of each observed state
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.symbolic_dynamic_filtering import analyze_word_sequence
+    >>> symbols = np.array([1, 2, 1, 2, 2, 1, 2, 1, 1, 2])
+    >>> states, morph_matrix, pvec = analyze_word_sequence(symbols, 2, 2)
+    >>> states
+    array([0, 1, 2, 3])
+
+    """
+    import numpy as np
+    from scipy.sparse import coo_matrix
+
+    symbols = np.asarray(symbols, dtype=np.int64) - 1
+    nwords = symbols.size - depth + 1
+    if nwords < 2:
+        raise IOError("symbol sequence should be longer than depth")
+
+    # Integer code of each word of depth consecutive symbols:
+    words = np.zeros(nwords, dtype=np.int64)
+    for ishift in range(depth):
+        words = words * number_of_symbols + symbols[ishift:ishift + nwords]
+
+    # Observed states (sparse accumulator: only observed words):
+    states, istates = np.unique(words, return_inverse=True)
+    nstates = states.size
+    current = istates[:-1]
+    following = istates[1:]
+
+    # Count transitions (duplicates are summed) and normalize columns:
+    counts = coo_matrix((np.ones(current.size), (following, current)),
+                        shape=(nstates, nstates)).tocsr()
+    state_counts = np.bincount(current, minlength=nstates).astype(np.float64)
+    outgoing = state_counts > 0
+    scale = np.zeros(nstates)
+    scale[outgoing] = 1 / state_counts[outgoing]
+    morph_matrix = counts.multiply(scale[np.newaxis, :]).tocsr()
+
+    # Stationary vector by power iteration of the lazy chain
+    # (I + P) / 2, starting from the observed state frequencies;
+    # probability in states without outgoing transitions restarts
+    # from the observed frequencies:
+    frequencies = np.bincount(istates, minlength=nstates) / float(nwords)
+    pvec = frequencies
+    for iteration in range(max_iter):
+        stepped = morph_matrix.dot(pvec) + \
+            np.sum(pvec[~outgoing]) * frequencies
+        updated = 0.5 * (pvec + stepped)
+        updated /= np.sum(updated)
+        change = np.sum(np.abs(updated - pvec))
+        pvec = updated
+        if change < tolerance:
+            break
+
+    return states, morph_matrix, pvec
+
+
+def sdf_features(data, number_of_symbols, pi_matrix_flag=False,
+                 partition=None, depth=1, axis=None):
     """
     Extract symbolic dynamic filtering features from time series data.
 
-    NOTE: Currently the number of states is set to the number of symbols.
+    NOTE: For depth 1, the number of states is set to the number of symbols.
+    For depth D > 1, states are words of D consecutive symbols
+    (see analyze_word_sequence()).
+
+    For multichannel data (such as x, y, z accelerometer axes),
+    each channel along all but the sample axis is treated as a separate
+    recording, and the features of all channels are computed at once
+    (see sdf_feature_matrix()).
 
     Parameters
     ----------
@@ -198,10 +301,22 @@ def sdf_features(data, number_of_symbols, pi_matrix_flag=False):
         number of symbols for symbolic dynamic filtering method
     pi_matrix_flag : Boolean
         feature as vectorized morph matrix (default: False)?
+    partition : numpy array
+        partition to symbolize data with, such as one learned from a
+        population by SDFModel (default: max_entropy_partition(data))
+    depth : integer
+        number of consecutive symbols per state (D-Markov machine depth);
+        for depth > 1, the feature is the stationary state probability
+        vector over all number_of_symbols**depth words, as a sparse row
+        storing only the observed words (pi_matrix_flag is not supported)
+    axis : integer
+        for multichannel data, the axis of the samples (default: last)
 
     Returns
     -------
-    feature : numpy array
+    feature : numpy array (scipy.sparse.csr_matrix for depth > 1)
+        one feature vector, or for multichannel data,
+        one row per channel (channels x features)
 
     Examples
     --------
@@ -213,30 +328,361 @@ def sdf_features(data, number_of_symbols, pi_matrix_flag=False):
     >>> pi_matrix_flag = False
     >>> feature = sdf_features(data, number_of_symbols, pi_matrix_flag)
     array([ 0.18181818,  0.18181818,  0.27272727,  0.36363636])
+    >>> axyz = np.random.random((3, 1000))
+    >>> sdf_features(axyz, number_of_symbols).shape
+    (3, 4)
+    >>> sdf_features(axyz, number_of_symbols, depth=3).shape
+    (3, 64)
     """
     import numpy as np
+    from scipy.sparse import csr_matrix, vstack
 
     from mhealthx.extractors.symbolic_dynamic_filtering import \
         max_entropy_partition, generate_symbol_sequence, \
-        analyze_symbol_sequence
+        analyze_symbol_sequence, analyze_word_sequence, \
+        sdf_feature_matrix, sdf_features
+
+    if depth > 1 and pi_matrix_flag:
+        raise IOError("pi_matrix_flag is only supported for depth 1")
+
+    # Multichannel data: one row of features per channel:
+    if axis is not None or np.ndim(data) > 1:
+        if axis is None:
+            axis = -1
+        channels = np.moveaxis(np.asarray(data, dtype=np.float64), axis, -1)
+        channels = channels.reshape(-1, channels.shape[-1])
+        if depth > 1:
+            feature = vstack([sdf_features(channel, number_of_symbols,
+                                           partition=partition, depth=depth)
+                              for channel in channels], format='csr')
+        else:
+            feature = sdf_feature_matrix(channels, number_of_symbols,
+                                         pi_matrix_flag, partition)
+    else:
+        # Generate partitions:
+        if partition is None:
+            partition = max_entropy_partition(data, number_of_symbols)
+
+        # Generate symbols:
+        symbols = generate_symbol_sequence(data, partition)
+
+        # Feature as stationary probability vector of all possible words
+        # (a sparse row: only observed words are stored):
+        if depth > 1:
+            states, morph_matrix, pvec = \
+                analyze_word_sequence(symbols, number_of_symbols, depth)
+            feature = csr_matrix((pvec, (np.zeros(states.size, np.int64),
+                                         states)),
+                                 shape=(1, number_of_symbols**depth))
+        else:
+            # morph_matrix is the estimated Morph Matrix, and
+            # pvec is the eigenvector corresponding to the eigenvalue 1:
+            morph_matrix, pvec = analyze_symbol_sequence(symbols,
+                                                         number_of_symbols,
+                                                         pi_matrix_flag)
+
+            # Feature as vectorized morph matrix:
+            if pi_matrix_flag:
+                b = np.transpose(morph_matrix)
+                feature = b.flatten()
+            # Feature as state transition probability vector store:
+            else:
+                feature = pvec
+
+    return feature
 
-    # Generate partitions:
-    partition = max_entropy_partition(data, number_of_symbols)
 
-    # Generate symbols:
-    symbols = generate_symbol_sequence(data, partition)
+def sdf_feature_matrix(data, number_of_symbols, pi_matrix_flag=False,
+                       partition=None):
+    """
+    Extract sdf_features() from each row of a 2-D array at once.
+
+    Each row is treated as sdf_features() treats a whole recording
+    (with its own maximum entropy partition, unless a partition is given),
+    and partitioning, symbolization and transition counting are each done
+    for all rows at once, so rows may be channels of a record or windows
+    of a recording (see windowed_sdf_features()).
 
-    # morph_matrix is the estimated Morph Matrix, and
-    # pvec is the eigenvector corresponding to the eigenvalue 1:
-    morph_matrix, pvec = analyze_symbol_sequence(symbols, number_of_symbols,
-                                                 pi_matrix_flag)
+    Parameters
+    ----------
+    data : numpy array
+        number of rows x number of samples
+    number_of_symbols : integer
+        number of symbols for symbolic dynamic filtering method
+    pi_matrix_flag : Boolean
+        feature as vectorized morph matrix (default: False)?
+    partition : numpy array
+        partition shared by all rows (default: each row's
+        maximum entropy partition)
+
+    Returns
+    -------
+    features : numpy array
+        number of rows x number of features (number_of_symbols,
+        or number_of_symbols squared if pi_matrix_flag)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.symbolic_dynamic_filtering import sdf_feature_matrix
+    >>> axyz = np.random.random((3, 1000))
+    >>> features = sdf_feature_matrix(axyz, 4)
+    >>> features.shape
+    (3, 4)
+
+    """
+    import numpy as np
+
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim != 2:
+        raise IOError("data should be a two-dimensional array")
+    nrows, nsamples = data.shape
+    nstates = number_of_symbols
+
+    # Symbols (1 to number_of_symbols) of each row
+    # (as generate_symbol_sequence()), with a shared partition or
+    # each row's maximum entropy partition (as max_entropy_partition()):
+    if partition is not None:
+        partition = np.asarray(partition, dtype=np.float64)
+        symbols = np.searchsorted(partition, data, side='right') + 1
+    else:
+        if nsamples < nstates:
+            raise IOError("rows should have at least number_of_symbols "
+                          "values")
+        ipartition = [int(np.floor(ipart * nsamples / nstates)) - 1
+                      for ipart in range(1, nstates)]
+        symbols = np.ones(data.shape, dtype=np.int64)
+        if ipartition:
+            partitions = np.partition(data, ipartition, axis=1)[:, ipartition]
+            for ipart in range(nstates - 1):
+                symbols += data >= partitions[:, ipart:ipart + 1]
+
+    # Count states and transitions of all rows at once
+    # (as analyze_symbol_sequence()):
+    rows = np.arange(nrows)[:, np.newaxis]
+    pvecs = np.bincount((rows * nstates + symbols[:, :-1] - 1).ravel(),
+                        minlength=nrows * nstates)
+    pvecs = pvecs.reshape(nrows, nstates).astype(np.float64)
+    pvecs /= np.sum(pvecs, axis=1)[:, np.newaxis]
 
-    # Feature as vectorized morph matrix:
     if pi_matrix_flag:
-        b = np.transpose(morph_matrix)
-        feature = b.flatten()
-    # Feature as state transition probability vector store:
+        codes = rows * nstates**2 + \
+                (symbols[:, 1:] - 1) * nstates + symbols[:, :-1] - 1
+        morph_matrices = np.bincount(codes.ravel(),
+                                     minlength=nrows * nstates**2)
+        morph_matrices = morph_matrices.reshape(nrows, nstates, nstates)
+        morph_matrices = morph_matrices.astype(np.float64)
+
+        # Normalize each row of each matrix (empty rows take the
+        # state probability vector):
+        row_sums = np.sum(morph_matrices, axis=2)
+        empty = row_sums == 0
+        row_sums[empty] = 1
+        morph_matrices /= row_sums[:, :, np.newaxis]
+        irow, istate = np.nonzero(empty)
+        morph_matrices[irow, istate, :] = pvecs[irow]
+
+        features = np.transpose(morph_matrices, (0, 2, 1))
+        features = features.reshape(nrows, nstates**2)
     else:
-        feature = pvec
+        features = pvecs
 
-    return feature
+    return features
+
+
+def windowed_sdf_features(data, number_of_symbols, window_size, step=1,
+                          pi_matrix_flag=False):
+    """
+    Extract symbolic dynamic filtering features from each window of data.
+
+    Each window is treated as sdf_features() treats a whole recording
+    (with its own maximum entropy partition), but windows are strided views
+    of data, and partitioning, symbolization and transition counting are
+    each done for all windows at once (see sdf_feature_matrix()).
+
+    Parameters
+    ----------
+    data : list or numpy array
+        time series data
+    number_of_symbols : integer
+        number of symbols for symbolic dynamic filtering method
+    window_size : integer
+        number of samples per window
+    step : integer
+        number of samples between the starts of consecutive windows
+    pi_matrix_flag : Boolean
+        feature as vectorized morph matrix (default: False)?
+
+    Returns
+    -------
+    features : numpy array
+        number of windows x number of features (number_of_symbols,
+        or number_of_symbols squared if pi_matrix_flag)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.symbolic_dynamic_filtering import windowed_sdf_features
+    >>> data = np.random.random(1000)
+    >>> number_of_symbols = 4
+    >>> features = windowed_sdf_features(data, number_of_symbols, 200, 100)
+    >>> features.shape
+    (9, 4)
+
+    """
+    from mhealthx.signals import sliding_windows
+    from mhealthx.extractors.symbolic_dynamic_filtering import \
+        sdf_feature_matrix
+
+    windows = sliding_windows(data, window_size, step)
+    features = sdf_feature_matrix(windows, number_of_symbols, pi_matrix_flag)
+
+    return features
+
+
+class SDFModel(object):
+    """
+    Symbolic dynamic filtering with a partition learned from a population.
+
+    sdf_features() partitions each record by its own maximum entropy
+    partition, so symbols (and features) are record-specific. An SDFModel
+    learns the partition once, from a sample of data pooled across records
+    and participants (fit), can save and load it (save, load), and
+    extracts features of new records with that partition (transform),
+    so that features are comparable across participants.
+
+    Parameters
+    ----------
+    number_of_symbols : integer
+        number of symbols for symbolic dynamic filtering method
+    pi_matrix_flag : Boolean
+        feature as vectorized morph matrix (default: False)?
+    partition : numpy array
+        previously learned partition (if None, call fit())
+    depth : integer
+        number of consecutive symbols per state (see sdf_features())
+
+    Examples
+    --------
+    >>> import os
+    >>> import tempfile
+    >>> import numpy as np
+    >>> from mhealthx.extractors.symbolic_dynamic_filtering import SDFModel
+    >>> population = [np.random.random(1000) for x in range(10)]
+    >>> model = SDFModel(number_of_symbols=4).fit(population)
+    >>> feature = model.transform(np.random.random(500))
+    >>> model_file = os.path.join(tempfile.mkdtemp(), 'sdf_model.json')
+    >>> model.save(model_file)
+    >>> model = SDFModel.load(model_file)
+
+    """
+    def __init__(self, number_of_symbols, pi_matrix_flag=False,
+                 partition=None, depth=1):
+        import numpy as np
+
+        if depth > 1 and pi_matrix_flag:
+            raise IOError("pi_matrix_flag is only supported for depth 1")
+
+        self.number_of_symbols = number_of_symbols
+        self.pi_matrix_flag = pi_matrix_flag
+        self.depth = depth
+        if partition is None:
+            self.partition = None
+        else:
+            self.partition = np.asarray(partition, dtype=np.float64)
+
+    def fit(self, data):
+        """
+        Learn the maximum entropy partition of a population sample.
+
+        Parameters
+        ----------
+        data : numpy array, or list of numpy arrays
+            sample of data (such as several records, pooled)
+
+        Returns
+        -------
+        self : SDFModel
+        """
+        import numpy as np
+
+        from mhealthx.extractors.symbolic_dynamic_filtering import \
+            max_entropy_partition
+
+        if isinstance(data, list):
+            data = np.concatenate([np.asarray(x, dtype=np.float64).ravel()
+                                   for x in data])
+        self.partition = max_entropy_partition(data, self.number_of_symbols)
+
+        return self
+
+    def transform(self, data):
+        """
+        Extract symbolic dynamic filtering features with the learned
+        partition (see sdf_features()).
+
+        Parameters
+        ----------
+        data : numpy array
+            time series data
+
+        Returns
+        -------
+        feature : numpy array (scipy.sparse.csr_matrix for depth > 1)
+        """
+        import numpy as np
+
+        from mhealthx.extractors.symbolic_dynamic_filtering import \
+            sdf_features
+
+        if self.partition is None:
+            raise IOError("fit() or load() the SDFModel partition first")
+
+        return sdf_features(np.asarray(data, dtype=np.float64).ravel(),
+                            self.number_of_symbols, self.pi_matrix_flag,
+                            self.partition, self.depth)
+
+    def save(self, output_file):
+        """
+        Save the model (number of symbols, flag, partition and depth)
+        as json.
+
+        Parameters
+        ----------
+        output_file : string
+            json file
+        """
+        import json
+
+        if self.partition is None:
+            raise IOError("fit() the SDFModel partition first")
+
+        model = {'number_of_symbols': self.number_of_symbols,
+                 'pi_matrix_flag': self.pi_matrix_flag,
+                 'partition': self.partition.tolist(),
+                 'depth': self.depth}
+        with open(output_file, 'w') as f:
+            json.dump(model, f)
+
+    @classmethod
+    def load(cls, input_file):
+        """
+        Load a model saved by save() (models saved without a depth
+        have depth 1).
+
+        Parameters
+        ----------
+        input_file : string
+            json file
+
+        Returns
+        -------
+        model : SDFModel
+        """
+        import json
+
+        with open(input_file, 'r') as f:
+            model = json.load(f)
+
+        return cls(model['number_of_symbols'], model['pi_matrix_flag'],
+                   model['partition'], model.get('depth', 1))
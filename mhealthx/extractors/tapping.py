@@ -98,12 +98,12 @@ def compute_intertap_gap(intervals):
 
     n = len(intervals)
 
-    fast10 = intervals[0:np.round(0.10 * n)]
-    fast25 = intervals[0:np.round(0.25 * n)]
-    fast50 = intervals[0:np.round(0.50 * n)]
-    slow10 = intervals[n - np.round(0.10 * n):n]
-    slow25 = intervals[n - np.round(0.25 * n):n]
-    slow50 = intervals[n - np.round(0.50 * n):n]
+    fast10 = intervals[0:int(np.round(0.10 * n))]
+    fast25 = intervals[0:int(np.round(0.25 * n))]
+    fast50 = intervals[0:int(np.round(0.50 * n))]
+    slow10 = intervals[n - int(np.round(0.10 * n)):n]
+    slow25 = intervals[n - int(np.round(0.25 * n)):n]
+    slow50 = intervals[n - int(np.round(0.50 * n)):n]
 
     delta10 = np.mean(fast10) - np.mean(slow10)
     delta25 = np.mean(fast25) - np.mean(slow25)
@@ -149,17 +149,76 @@ def compute_drift(x, y):
     return drift
 
 
-class TapFeatures:
-    """Class to add tap features."""
-    # Initialize object method:
-    def __init__(self):
+# Statistics computed for each group of tap values, in order
+# (as mhealthx.signals.signal_feature_names):
+tap_statistic_names = ['num', 'min', 'max', 'rng', 'avg', 'std', 'med',
+                       'mad', 'kurt', 'skew', 'cvar', 'lower25', 'upper25',
+                       'inter50', 'rms', 'entropy', 'tk_energy']
+
+# Groups of tap values summarized by tap_statistic_names, in order:
+tap_groups = ['intertap', 'xL', 'xR', 'driftL', 'driftR']
+
+# Names of the features in tapping feature tables, in order
+# (drift statistics exclude the number of drift values):
+tap_feature_names = ['num_taps', 'num_taps_left', 'num_taps_right',
+                     'time_rng', 'intertap_gap10', 'intertap_gap25',
+                     'intertap_gap50'] + \
+                    [group + '_' + name
+                     for group in tap_groups
+                     for name in tap_statistic_names
+                     if not (group.startswith('drift') and name == 'num')]
+
+
+class TapFeatures(object):
+    """
+    Tap features of one tapping record (see compute_tap_features()).
+
+    Each record is a separate instance, so records can be computed
+    concurrently, and features are stored in slots rather than
+    a per-instance dictionary.
+
+    Examples
+    --------
+    >>> from mhealthx.extractors.tapping import TapFeatures
+    >>> T = TapFeatures()
+    >>> T.num_taps = 100
+    >>> T.to_dict()['num_taps']
+    100
+
+    """
+    __slots__ = tap_feature_names + ['driftL_num', 'driftR_num',
+                                     'threshold']
+
+    def __init__(self, threshold=None):
+        """
+        Initialize attributes of object (features are NaN until computed).
+        """
+        for name in self.__slots__:
+            setattr(self, name, float('nan'))
+        self.threshold = threshold
+
+    def to_array(self):
         """
-        Initialize attributes of object:
+        Features ordered as tap_feature_names.
+
+        Returns
+        -------
+        features : numpy array of floats
         """
-        self.xtaps = None
-        self.ytaps = None
-        self.t = None
-        self.threshold = None
+        import numpy as np
+
+        return np.array([getattr(self, name) for name in tap_feature_names],
+                        dtype=np.float64)
+
+    def to_dict(self):
+        """
+        Features keyed (and ordered) by tap_feature_names.
+
+        Returns
+        -------
+        features : dictionary
+        """
+        return dict((name, getattr(self, name)) for name in tap_feature_names)
 
 
 def compute_tap_features(xtaps, ytaps, t, threshold=20):
@@ -168,6 +227,10 @@ def compute_tap_features(xtaps, ytaps, t, threshold=20):
 
     Arno translated Elias's R code to Python.
 
+    Statistics of the intertap intervals, left and right tap positions
+    and left and right drifts are computed together from one buffer
+    (see mhealthx.signals.segmented_signal_features()).
+
     Parameters
     ----------
     xtaps : numpy array of integers
@@ -181,8 +244,8 @@ def compute_tap_features(xtaps, ytaps, t, threshold=20):
 
     Return
     ------
-    T : class
-        many features stored in TapFeatures class
+    T : TapFeatures
+        many features stored in a TapFeatures record
 
     Examples
     --------
@@ -193,14 +256,15 @@ def compute_tap_features(xtaps, ytaps, t, threshold=20):
     >>> t = np.linspace(1, 100, 100) / 5.0
     >>> threshold = 20
     >>> T = compute_tap_features(xtaps, ytaps, t, threshold)
+    >>> features = T.to_array()
 
     """
     import numpy as np
 
     from mhealthx.extractors.tapping import compute_drift, \
-        compute_tap_intervals, compute_intertap_gap
-    from mhealthx.extractors.tapping import TapFeatures as T
-    from mhealthx.signals import signal_features
+        compute_tap_intervals, compute_intertap_gap, TapFeatures, \
+        tap_groups, tap_statistic_names
+    from mhealthx.signals import segmented_signal_features
 
     if isinstance(xtaps, list):
         xtaps = np.array(xtaps)
@@ -209,6 +273,8 @@ def compute_tap_features(xtaps, ytaps, t, threshold=20):
     if isinstance(t, list):
         t = np.array(t)
 
+    T = TapFeatures(threshold)
+
     # Intertap intervals:
     ipress, intervals = compute_tap_intervals(xtaps, t, threshold)
 
@@ -240,45 +306,306 @@ def compute_tap_features(xtaps, ytaps, t, threshold=20):
     # Time:
     T.time_rng = t[-1] - t[0]
 
-    # Intertap interval statistics:
-    T.intertap_num, T.intertap_min, T.intertap_max, T.intertap_rng, \
-    T.intertap_avg, T.intertap_std, T.intertap_med, T.intertap_mad, \
-    T.intertap_kurt, T.intertap_skew, T.intertap_cvar, T.intertap_lower25, \
-    T.intertap_upper25, T.intertap_inter50, T.intertap_rms, \
-    T.intertap_entropy, T.intertap_tk_energy = signal_features(intervals)
-
-    # Tap statistics:
-    T.xL_num, T.xL_min, T.xL_max, T.xL_rng, T.xL_avg, T.xL_std, \
-    T.xL_med, T.xL_mad, T.xL_kurt, T.xL_skew, T.xL_cvar, \
-    T.xL_lower25, T.xL_upper25, T.xL_inter50, T.xL_rms, \
-    T.xL_entropy, T.xL_tk_energy = signal_features(xL)
-
-    T.xR_num, T.xR_min, T.xR_max, T.xR_rng, T.xR_avg, T.xR_std, \
-    T.xR_med, T.xR_mad, T.xR_kurt, T.xR_skew, T.xR_cvar, \
-    T.xR_lower25, T.xR_upper25, T.xR_inter50, T.xR_rms, \
-    T.xR_entropy, T.xR_tk_energy = signal_features(xR)
-
-    # T.yL_num, T.yL_min, T.yL_max, T.yL_rng, T.yL_avg, T.yL_std, \
-    # T.yL_med, T.yL_mad, T.yL_kurt, T.yL_skew, T.yL_cvar, \
-    # T.yL_lower25, T.yL_upper25, T.yL_inter50, T.yL_rms, \
-    # T.yL_entropy, T.yL_tk_energy = signal_features(yL)
-
-    # T.yR_num, T.yR_min, T.yR_max, T.yR_rng, T.yR_avg, T.yR_std, \
-    # T.yR_med, T.yR_mad, T.yR_kurt, T.yR_skew, T.yR_cvar, \
-    # T.yR_lower25, T.yR_upper25, T.yR_inter50, T.yR_rms, \
-    # T.yR_entropy, T.yR_tk_energy = signal_features(yR)
-
-    # Drift statistics:
-    T.driftL_num, T.driftL_min, T.driftL_max, T.driftL_rng, T.driftL_avg, \
-    T.driftL_std, T.driftL_med, T.driftL_mad, T.driftL_kurt, T.driftL_skew, \
-    T.driftL_cvar, T.driftL_lower25, T.driftL_upper25, T.driftL_inter50, \
-    T.driftL_rms, T.driftL_entropy, T.driftL_tk_energy = \
-        signal_features(driftL)
-
-    T.driftR_num, T.driftR_min, T.driftR_max, T.driftR_rng, T.driftR_avg, \
-    T.driftR_std, T.driftR_med, T.driftR_mad, T.driftR_kurt, T.driftR_skew, \
-    T.driftR_cvar, T.driftR_lower25, T.driftR_upper25, T.driftR_inter50, \
-    T.driftR_rms, T.driftR_entropy, T.driftR_tk_energy = \
-        signal_features(driftR)
-
-    return T
\ No newline at end of file
+    # Intertap interval, tap and drift statistics, all from one buffer
+    # (y statistics are not computed):
+    groups = [intervals, xL, xR, driftL, driftR]
+    offsets = np.zeros(len(groups) + 1, dtype=np.int64)
+    np.cumsum([np.size(group) for group in groups], out=offsets[1:])
+    statistics = segmented_signal_features(np.concatenate(groups), offsets)
+    for group, group_statistics in zip(tap_groups, statistics):
+        for name, value in zip(tap_statistic_names, group_statistics):
+            setattr(T, group + '_' + name, value)
+
+    return T
+
+
+def tap_features_batch(xtaps, ytaps, t, threshold=20):
+    """
+    Extract compute_tap_features() features from many records at once.
+
+    Taps of all records are stored in ragged arrays, and press events,
+    intertap intervals, left/right splits, drifts and their statistics
+    are computed for all records with segmented (vectorized) operations
+    (see mhealthx.signals.segmented_signal_features()).
+
+    Parameters
+    ----------
+    xtaps : list of lists or numpy arrays of integers, or RaggedArray
+        x coordinates of touch screen where tapped, for each record
+    ytaps : list of lists or numpy arrays of integers, or RaggedArray
+        y coordinates of touch screen where tapped, for each record
+    t : list of lists or numpy arrays of floats, or RaggedArray
+        time points of taps, for each record
+    threshold : integer
+        x offset threshold for left/right press event (pixels)
+
+    Returns
+    -------
+    features : numpy array of floats
+        number of records x number of features, columns ordered as in
+        tap_feature_names (NaN where a feature is undefined, such as
+        statistics of records without press events)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.tapping import tap_features_batch
+    >>> xtaps = [np.round(200 * np.random.random(n)) for n in [100, 50, 80]]
+    >>> ytaps = [np.round(300 * np.random.random(n)) for n in [100, 50, 80]]
+    >>> t = [np.linspace(1, n, n) / 5.0 for n in [100, 50, 80]]
+    >>> features = tap_features_batch(xtaps, ytaps, t, 20)
+    >>> features.shape
+    (3, 90)
+
+    """
+    import numpy as np
+
+    from mhealthx.ragged import RaggedArray
+    from mhealthx.signals import segmented_signal_features
+    from mhealthx.extractors.tapping import tap_feature_names, tap_groups, \
+        tap_statistic_names
+
+    if not isinstance(xtaps, RaggedArray):
+        xtaps = RaggedArray.from_arrays(xtaps)
+    if not isinstance(ytaps, RaggedArray):
+        ytaps = RaggedArray.from_arrays(ytaps)
+    if not isinstance(t, RaggedArray):
+        t = RaggedArray.from_arrays(t)
+    if not (np.array_equal(xtaps.offsets, ytaps.offsets) and
+            np.array_equal(xtaps.offsets, t.offsets)):
+        raise IOError("xtaps, ytaps and t should have the same lengths")
+    nrecords = len(xtaps)
+    columns = {}
+
+    # Find left/right finger "press" events (as compute_tap_intervals()):
+    lengths = np.repeat(xtaps.lengths, xtaps.lengths)
+    ipairs = np.nonzero(xtaps.positions() < lengths - 1)[0]
+    press = np.zeros(xtaps.values.size, dtype=bool)
+    press[ipairs] = np.abs(xtaps.values[ipairs + 1] -
+                           xtaps.values[ipairs]) > threshold
+
+    # Filter data:
+    xtaps = xtaps.select(press)
+    ytaps = ytaps.select(press)
+    t = t.select(press)
+    full = xtaps.lengths > 0
+    firsts = xtaps.offsets[:-1][full]
+    lasts = xtaps.offsets[1:][full] - 1
+
+    # Intertap intervals:
+    intervals = t.diff()
+
+    # Delta between fastest and slowest intertap intervals
+    # (as compute_intertap_gap(), from prefix sums of intervals):
+    sums = np.concatenate(([0], np.cumsum(intervals.values)))
+    starts = intervals.offsets[:-1]
+    ends = intervals.offsets[1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for percent in [10, 25, 50]:
+            n = np.round(percent / 100.0 * intervals.lengths).astype(np.int64)
+            fast = (sums[starts + n] - sums[starts]) / n
+            slow = (sums[ends] - sums[ends - n]) / n
+            columns['intertap_gap' + str(percent)] = fast - slow
+
+    # Left and right taps and drift:
+    mean_x = np.repeat(xtaps.mean(), xtaps.lengths)
+    left = xtaps.values < mean_x
+    right = xtaps.values >= mean_x
+    xL = xtaps.select(left)
+    yL = ytaps.select(left)
+    xR = xtaps.select(right)
+    yR = ytaps.select(right)
+    driftL = RaggedArray(np.sqrt(xL.diff().values**2 + yL.diff().values**2),
+                         xL.diff().offsets)
+    driftR = RaggedArray(np.sqrt(xR.diff().values**2 + yR.diff().values**2),
+                         xR.diff().offsets)
+
+    # Number of taps:
+    columns['num_taps'] = xtaps.lengths
+    columns['num_taps_left'] = xL.lengths
+    columns['num_taps_right'] = xR.lengths
+
+    # Time:
+    columns['time_rng'] = np.full(nrecords, np.nan)
+    columns['time_rng'][full] = t.values[lasts] - t.values[firsts]
+
+    # Intertap interval, tap and drift statistics of all records
+    # from one buffer (segments ordered by group, then record):
+    groups = [intervals, xL, xR, driftL, driftR]
+    values = np.concatenate([group.values for group in groups])
+    offsets = np.zeros(len(groups) * nrecords + 1, dtype=np.int64)
+    np.cumsum(np.concatenate([group.lengths for group in groups]),
+              out=offsets[1:])
+    statistics = segmented_signal_features(values, offsets)
+    statistics = statistics.reshape(len(groups), nrecords, -1)
+    for group, group_statistics in zip(tap_groups, statistics):
+        for name, column in zip(tap_statistic_names, group_statistics.T):
+            columns[group + '_' + name] = column
+
+    features = np.column_stack([columns[name] for name in tap_feature_names])
+    features = features.astype(np.float64)
+
+    return features
+
+
+class TapFeatureAccumulator(object):
+    """
+    Incremental compute_tap_features() of tap events as they arrive.
+
+    Each tap updates running statistics in constant time, and a snapshot
+    of the features of the session so far can be taken at any time,
+    also in constant time (see mhealthx.streaming.RunningStatistics).
+
+    NOTE: compute_tap_features() splits left and right taps by the mean
+    x coordinate of the whole session. Here, each press event is split by
+    the mean x coordinate of press events up to and including it (the first
+    warmup press events are held until the warmup-th press event), so
+    left/right and drift features may differ for early taps. Press events
+    only depend on differences between consecutive taps, so a tap is known
+    to be a press event when the next tap arrives. Intertap interval,
+    tap and drift medians, quartiles and median absolute deviations are
+    P-squared estimates; other statistics are exact.
+
+    Parameters
+    ----------
+    threshold : integer
+        x offset threshold for left/right press event (pixels)
+    warmup : integer
+        number of press events before splitting left and right taps
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.tapping import TapFeatureAccumulator
+    >>> xtaps = np.round(200 * np.random.random(100))
+    >>> ytaps = np.round(300 * np.random.random(100))
+    >>> t = np.linspace(1, 100, 100) / 5.0
+    >>> accumulator = TapFeatureAccumulator(threshold=20)
+    >>> for x, y, time in zip(xtaps, ytaps, t):
+    ...     accumulator.update(x, y, time)
+    >>> T = accumulator.snapshot()
+    >>> T.num_taps > 0
+    True
+
+    """
+    def __init__(self, threshold=20, warmup=4):
+        from mhealthx.streaming import RunningStatistics
+        from mhealthx.extractors.tapping import tap_groups
+
+        self.threshold = threshold
+        self.warmup = warmup
+        self.pending = []
+        self.previous = None
+        self.num_taps = 0
+        self.num_taps_left = 0
+        self.num_taps_right = 0
+        self.sum_x = 0.0
+        self.first_time = None
+        self.last_time = None
+        self.last_left = None
+        self.last_right = None
+        self.interval_sums = [0.0]
+        self.statistics = dict((group, RunningStatistics())
+                               for group in tap_groups)
+
+    def update(self, xtaps, ytaps, t):
+        """
+        Add one or more tap events.
+
+        Parameters
+        ----------
+        xtaps : float or numpy array of floats
+            x coordinate(s) of touch screen where tapped
+        ytaps : float or numpy array of floats
+            y coordinate(s) of touch screen where tapped
+        t : float or numpy array of floats
+            time point(s) of taps
+        """
+        import numpy as np
+
+        for x, y, time in zip(np.atleast_1d(xtaps), np.atleast_1d(ytaps),
+                              np.atleast_1d(t)):
+            # The previous tap is a press event if this tap is
+            # more than threshold pixels from it along x:
+            if self.previous is not None and \
+                    np.abs(x - self.previous[0]) > self.threshold:
+                self._press(*self.previous)
+            self.previous = (float(x), float(y), float(time))
+
+    def _press(self, x, y, time):
+        """Update features with a press event."""
+        # Intertap intervals:
+        if self.first_time is None:
+            self.first_time = time
+        else:
+            interval = time - self.last_time
+            self.statistics['intertap'].update(interval)
+            self.interval_sums.append(self.interval_sums[-1] + interval)
+        self.last_time = time
+
+        # Left and right taps and drift (after warmup press events):
+        self.num_taps += 1
+        self.sum_x += x
+        self.pending.append((x, y))
+        if self.num_taps >= self.warmup:
+            for x, y in self.pending:
+                self._split(x, y)
+            self.pending = []
+
+    def _split(self, x, y):
+        """Update left or right tap and drift features with a press event."""
+        import math
+
+        if x < self.sum_x / self.num_taps:
+            self.num_taps_left += 1
+            self.statistics['xL'].update(x)
+            if self.last_left is not None:
+                self.statistics['driftL'].update(
+                    math.hypot(x - self.last_left[0], y - self.last_left[1]))
+            self.last_left = (x, y)
+        else:
+            self.num_taps_right += 1
+            self.statistics['xR'].update(x)
+            if self.last_right is not None:
+                self.statistics['driftR'].update(
+                    math.hypot(x - self.last_right[0], y - self.last_right[1]))
+            self.last_right = (x, y)
+
+    def snapshot(self):
+        """
+        Features of the tap events so far.
+
+        Returns
+        -------
+        T : TapFeatures
+            many features stored in a TapFeatures record
+        """
+        import numpy as np
+
+        from mhealthx.extractors.tapping import TapFeatures, tap_groups, \
+            tap_statistic_names
+
+        T = TapFeatures(self.threshold)
+        T.num_taps = self.num_taps
+        T.num_taps_left = self.num_taps_left
+        T.num_taps_right = self.num_taps_right
+        if self.first_time is not None:
+            T.time_rng = self.last_time - self.first_time
+
+        # Delta between fastest and slowest intertap intervals
+        # (as compute_intertap_gap(), from prefix sums of intervals):
+        sums = self.interval_sums
+        n = len(sums) - 1
+        for percent in [10, 25, 50]:
+            k = int(np.round(percent / 100.0 * n))
+            if k:
+                gap = (sums[k] - sums[0]) / k - (sums[n] - sums[n - k]) / k
+                setattr(T, 'intertap_gap' + str(percent), gap)
+
+        # Intertap interval, tap and drift statistics:
+        for group in tap_groups:
+            features = self.statistics[group].features()
+            for name, value in zip(tap_statistic_names, features):
+                setattr(T, group + '_' + name, value)
+
+        return T
@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+"""
+This program implements some voice feature extraction methods.
+
+A subset of openSMILE's GeMAPS-like features computed natively
+(without subprocesses or intermediate files) from decoded audio
+(see xio.decode_audio()): frame energy, zero-crossing rate, spectral
+centroid and rolloff, autocorrelation pitch, harmonics-to-noise ratio,
+and jitter and shimmer, all computed over strided frame views
+of a recording in one batch.
+
+Authors:
+    - mhealthx contributors, 2026
+
+Copyright 2026,  Sage Bionetworks (http://sagebase.org), Apache v2.0 License
+
+"""
+
+voice_feature_names = ['duration', 'voiced_fraction',
+                       'energy_mean', 'energy_sd',
+                       'zcr_mean', 'zcr_sd',
+                       'spectral_centroid_mean', 'spectral_centroid_sd',
+                       'spectral_rolloff_mean', 'spectral_rolloff_sd',
+                       'F0_mean', 'F0_sd', 'HNR_mean',
+                       'jitter_local', 'shimmer_local']
+
+
+def frame_audio(data, sample_rate, frame_length=0.04, frame_step=0.01):
+    """
+    Strided view of audio data as overlapping frames.
+
+    Parameters
+    ----------
+    data : numpy array of floats
+        audio samples (such as from xio.decode_audio())
+    sample_rate : integer
+        number of samples per second
+    frame_length : float
+        duration of each frame (seconds)
+    frame_step : float
+        duration between the starts of consecutive frames (seconds)
+
+    Returns
+    -------
+    frames : numpy array of floats
+        number of frames x samples per frame (read-only view of data)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.voice import frame_audio
+    >>> frames = frame_audio(np.random.randn(16000), 16000)
+    >>> frames.shape
+    (97, 640)
+
+    """
+    from mhealthx.signals import sliding_windows
+
+    frames = sliding_windows(data, int(round(frame_length * sample_rate)),
+                             max(int(round(frame_step * sample_rate)), 1))
+
+    return frames
+
+
+def frame_energy(frames):
+    """
+    Root mean square energy of each frame in decibels (re: full scale).
+
+    Parameters
+    ----------
+    frames : numpy array of floats
+        number of frames x samples per frame (see frame_audio())
+
+    Returns
+    -------
+    energy : numpy array of floats
+        energy of each frame (dB; -inf for silent frames)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.voice import frame_energy
+    >>> frame_energy(np.ones((2, 100)) / 10)
+    array([-20., -20.])
+
+    """
+    import numpy as np
+
+    with np.errstate(divide='ignore'):
+        energy = 10 * np.log10(np.einsum('ij,ij->i', frames, frames) /
+                               frames.shape[1])
+
+    return energy
+
+
+def voice_features(data, sample_rate, frame_length=0.04, frame_step=0.01,
+                   min_f0=75, max_f0=500, voicing_threshold=0.45,
+                   silence=40, rolloff=0.85):
+    """
+    Extract voice features from audio data.
+
+    Frame-level measures are computed for all frames at once and
+    summarized over the recording (pitch, HNR, jitter and shimmer
+    over voiced frames only). Voiced frames have a normalized
+    autocorrelation peak (see freq_from_autocorr_batch()) of at least
+    voicing_threshold and energy within silence dB of the loudest frame.
+    Jitter and shimmer are frame-level approximations: mean absolute
+    differences of the periods (1 / F0) and of the peak amplitudes of
+    consecutive voiced frames, relative to their means.
+
+    Parameters
+    ----------
+    data : numpy array of floats
+        audio samples (such as from xio.decode_audio())
+    sample_rate : integer
+        number of samples per second
+    frame_length : float
+        duration of each frame (seconds)
+    frame_step : float
+        duration between the starts of consecutive frames (seconds)
+    min_f0 : float
+        minimum fundamental frequency (Hz)
+    max_f0 : float
+        maximum fundamental frequency (Hz)
+    voicing_threshold : float
+        minimum normalized autocorrelation peak of voiced frames
+    silence : float
+        frames more than silence dB below the loudest frame are unvoiced
+    rolloff : float
+        fraction of spectral energy below the spectral rolloff frequency
+
+    Returns
+    -------
+    features : numpy array of floats
+        features ordered as voice_feature_names
+        (NaN where undefined, such as pitch without voiced frames)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.voice import voice_features
+    >>> sample_rate = 16000
+    >>> t = np.arange(sample_rate) / float(sample_rate)
+    >>> data = 0.5 * np.sin(2 * np.pi * 150 * t)
+    >>> features = voice_features(data, sample_rate)
+    >>> float(np.round(features[10]))
+    150.0
+
+    """
+    import numpy as np
+    from scipy.fftpack import next_fast_len
+
+    from mhealthx.extractors.voice import frame_audio, frame_energy, \
+        voice_feature_names
+    from mhealthx.xtras.frequency_estimator import freq_from_autocorr_batch
+
+    data = np.asarray(data, dtype=np.float64)
+    frames = frame_audio(data, sample_rate, frame_length, frame_step)
+    nsamples = frames.shape[1]
+
+    # Energy and zero-crossing rate of each frame:
+    energy = frame_energy(frames)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / \
+        float(nsamples - 1)
+
+    # Spectral centroid and rolloff of each (Hann-windowed) frame:
+    nfft = next_fast_len(nsamples)
+    power = np.abs(np.fft.rfft(frames * np.hanning(nsamples), nfft,
+                               axis=1))**2
+    frequencies = np.fft.rfftfreq(nfft, 1.0 / sample_rate)
+    total = np.sum(power, axis=1)
+    cumulative = np.cumsum(power, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        centroid = np.dot(power, frequencies) / total
+        spectral_rolloff = frequencies[np.argmax(
+            cumulative >= rolloff * total[:, np.newaxis], axis=1)]
+    spectral = total > 0
+
+    # Pitch, voicing and harmonics-to-noise ratio of each frame:
+    f0, strengths = freq_from_autocorr_batch(frames, sample_rate,
+                                             min_f0, max_f0)
+    with np.errstate(invalid='ignore'):
+        voiced = (strengths >= voicing_threshold) & \
+                 (energy >= np.max(energy) - silence) & \
+                 (f0 >= min_f0) & (f0 <= max_f0)
+    harmonic = np.clip(strengths[voiced], 1e-6, 1 - 1e-6)
+    hnr = 10 * np.log10(harmonic / (1 - harmonic))
+
+    # Jitter and shimmer over consecutive voiced frames:
+    pairs = voiced[1:] & voiced[:-1]
+    periods = 1.0 / f0
+    amplitudes = np.max(np.abs(frames), axis=1)
+    if np.any(pairs):
+        jitter = np.mean(np.abs(np.diff(periods)[pairs])) / \
+            np.mean(periods[voiced])
+        shimmer = np.mean(np.abs(np.diff(amplitudes)[pairs])) / \
+            np.mean(amplitudes[voiced])
+    else:
+        jitter, shimmer = np.nan, np.nan
+
+    features = np.full(len(voice_feature_names), np.nan)
+    features[:2] = [data.size / float(sample_rate), np.mean(voiced)]
+    finite = np.isfinite(energy)
+    if np.any(finite):
+        features[2:4] = [np.mean(energy[finite]), np.std(energy[finite])]
+    features[4:6] = [np.mean(zcr), np.std(zcr)]
+    if np.any(spectral):
+        features[6:10] = [np.mean(centroid[spectral]),
+                          np.std(centroid[spectral]),
+                          np.mean(spectral_rolloff[spectral]),
+                          np.std(spectral_rolloff[spectral])]
+    if np.any(voiced):
+        features[10:13] = [np.mean(f0[voiced]), np.std(f0[voiced]),
+                           np.mean(hnr)]
+    features[13:] = [jitter, shimmer]
+
+    return features
+
+
+def trim_silence(data, sample_rate, frame_length=0.02, frame_step=0.01,
+                 silence=40, padding=0.1):
+    """
+    Trim leading and trailing silence from audio data.
+
+    Frames with energy (see frame_energy()) within silence dB of the
+    loudest frame are active; data are trimmed to the first and last
+    active frames (plus padding), computed for all frames at once.
+    Data without active frames (such as all zeros) are not trimmed.
+
+    Parameters
+    ----------
+    data : numpy array of floats
+        audio samples (such as from xio.decode_audio())
+    sample_rate : integer
+        number of samples per second
+    frame_length : float
+        duration of each frame (seconds)
+    frame_step : float
+        duration between the starts of consecutive frames (seconds)
+    silence : float
+        frames more than silence dB below the loudest frame are silent
+    padding : float
+        duration of silence to keep before and after active frames (seconds)
+
+    Returns
+    -------
+    trimmed : numpy array of floats
+        data[start:end] (a view of data)
+    start : integer
+        index of the first sample kept
+    end : integer
+        index after the last sample kept
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.extractors.voice import trim_silence
+    >>> sample_rate = 16000
+    >>> t = np.arange(sample_rate) / float(sample_rate)
+    >>> tone = 0.5 * np.sin(2 * np.pi * 150 * t)
+    >>> data = np.concatenate((np.zeros(sample_rate), tone, np.zeros(8000)))
+    >>> trimmed, start, end = trim_silence(data, sample_rate, padding=0)
+    >>> start, end
+    (15840, 32160)
+
+    """
+    import numpy as np
+
+    from mhealthx.extractors.voice import frame_audio, frame_energy
+
+    data = np.asarray(data)
+    start = 0
+    end = data.size
+    frame_size = int(round(frame_length * sample_rate))
+    if data.size >= frame_size:
+        frames = frame_audio(data, sample_rate, frame_length, frame_step)
+        energy = frame_energy(frames)
+        active = np.flatnonzero(energy >= np.max(energy) - silence)
+        if active.size and np.isfinite(np.max(energy)):
+            step = max(int(round(frame_step * sample_rate)), 1)
+            pad = int(round(padding * sample_rate))
+            start = int(max(active[0] * step - pad, 0))
+            end = int(min(active[-1] * step + frame_size + pad, data.size))
+
+    trimmed = data[start:end]
+
+    return trimmed, start, end
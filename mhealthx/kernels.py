@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+"""
+Compiled (numba) or vectorized (NumPy) kernels for signal hot paths.
+
+Several feature extractors loop over samples in Python: symbolization and
+transition counting in symbolic dynamic filtering, the segment search in
+pyGait's heel_strikes(), attitude rotation in walk_direction_attitude(),
+and integration in xtras/dead_reckon.py. Each of these loops is available
+here as a kernel with two backends:
+
+    - 'numba': loops compiled at runtime by numba (if installed)
+    - 'numpy': vectorized NumPy equivalents
+
+The backend is chosen by a single switch: set_backend('auto'|'numba'|'numpy')
+or the MHEALTHX_KERNELS environment variable ('auto', the default, uses
+numba when it is installed). compare_backends() runs every kernel with
+each available backend, and with the plain Python loops that the numba
+backend compiles, on the same random inputs and reports the largest
+difference, so the NumPy kernels are checked even without numba.
+
+Authors:
+    - mhealthx contributors, 2026
+
+Copyright 2026,  Sage Bionetworks (http://sagebase.org), Apache v2.0 License
+
+"""
+import os
+
+# Requested backend ('auto', 'numba' or 'numpy'):
+_settings = {'backend': os.environ.get('MHEALTHX_KERNELS', 'auto')}
+
+# Compiled numba kernels, by name (filled on first use):
+_numba_kernels = {}
+
+
+def set_backend(backend='auto'):
+    """
+    Select the kernel backend.
+
+    Parameters
+    ----------
+    backend : string
+        'auto' (numba if installed, else numpy), 'numba' or 'numpy'
+
+    Examples
+    --------
+    >>> from mhealthx.kernels import set_backend, get_backend
+    >>> set_backend('numpy')
+    >>> get_backend()
+    'numpy'
+
+    """
+    if backend not in ('auto', 'numba', 'numpy'):
+        raise IOError("backend should be 'auto', 'numba' or 'numpy'")
+    if backend == 'numba':
+        import numba
+
+    _settings['backend'] = backend
+
+
+def get_backend():
+    """
+    Return the active kernel backend ('numba' or 'numpy').
+
+    Examples
+    --------
+    >>> from mhealthx.kernels import get_backend
+    >>> backend = get_backend()
+
+    """
+    backend = _settings['backend']
+    if backend == 'auto':
+        try:
+            import numba
+        except ImportError:
+            backend = 'numpy'
+        else:
+            backend = 'numba'
+
+    return backend
+
+
+def get_kernel(name, backend=None):
+    """
+    Return a kernel function for the active (or a given) backend.
+
+    Parameters
+    ----------
+    name : string
+        'symbolize', 'count_transitions', 'segment_argmax',
+        'integrate' or 'rotate_with_quaternions'
+    backend : string or None
+        'numba' or 'numpy' (default: get_backend())
+
+    Returns
+    -------
+    kernel : function
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.kernels import get_kernel
+    >>> symbolize = get_kernel('symbolize')
+    >>> symbols = symbolize(np.array([0.1, 0.5, 0.9]), np.array([0.3, 0.6]))
+    >>> symbols
+    array([1, 2, 3])
+
+    """
+    if backend is None:
+        backend = get_backend()
+
+    if backend == 'numba':
+        if name not in _numba_kernels:
+            _compile_numba_kernel(name)
+        kernel = _numba_kernels[name]
+    elif backend == 'numpy':
+        kernel = globals()['_' + name + '_numpy']
+    else:
+        raise IOError("backend should be 'numba' or 'numpy'")
+
+    return kernel
+
+
+# ----------------------------------------------------------------------------
+# NumPy kernels
+# ----------------------------------------------------------------------------
+def _symbolize_numpy(data, partition):
+    """Symbol (1 to len(partition) + 1) of each value: 1 + number of
+    (sorted) partition values less than or equal to it."""
+    import numpy as np
+
+    data = np.asarray(data, dtype=np.float64)
+    partition = np.asarray(partition, dtype=np.float64)
+    symbols = np.searchsorted(partition, data, side='right') + 1
+
+    return symbols.astype(np.int64)
+
+
+def _count_transitions_numpy(symbols, number_of_states):
+    """Counts of transitions [next state, current state] and of current
+    states, from a sequence of symbols (1 to number_of_states)."""
+    import numpy as np
+
+    symbols = np.asarray(symbols, dtype=np.int64) - 1
+    current = symbols[:-1]
+
+    # Code each (next, current) pair as one integer and count codes:
+    codes = symbols[1:] * number_of_states + current
+    morph_counts = np.bincount(codes, minlength=number_of_states**2)
+    morph_counts = morph_counts.reshape(number_of_states, number_of_states)
+    state_counts = np.bincount(current, minlength=number_of_states)
+
+    return morph_counts.astype(np.float64), state_counts.astype(np.float64)
+
+
+def _segment_argmax_numpy(values, boundaries):
+    """Index of the (first) maximum value between each pair of consecutive
+    (strictly increasing) boundaries: values[boundaries[i]:boundaries[i+1]].
+    As with numpy.argmax, the first NaN of a segment is its maximum."""
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64)
+    boundaries = np.asarray(boundaries, dtype=np.int64)
+    if boundaries.size < 2:
+        return np.zeros(0, dtype=np.int64)
+
+    # Maximum of each segment (segmented reduction):
+    starts = boundaries[:-1] - boundaries[0]
+    segment_values = values[boundaries[0]:boundaries[-1]]
+    maxima = np.maximum.reduceat(segment_values, starts)
+
+    # First index of each segment at which its maximum is reached
+    # (maxima propagate NaNs, so a segment with a NaN peaks at a NaN):
+    indices = np.arange(boundaries[0], boundaries[-1])
+    at_max = segment_values == np.repeat(maxima, np.diff(boundaries))
+    at_max |= np.isnan(segment_values)
+    imax = np.minimum.reduceat(np.where(at_max, indices, boundaries[-1]),
+                               starts)
+
+    return imax
+
+
+def _integrate_numpy(data, t):
+    """Running sum of data[i] * (t[i] - t[i-1]), starting at zero,
+    along the last axis (one or more channels)."""
+    import numpy as np
+
+    data = np.asarray(data, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)
+
+    integral = np.zeros(data.shape)
+    np.cumsum(data[..., 1:] * np.diff(t), axis=-1, out=integral[..., 1:])
+
+    return integral
+
+
+def _rotate_with_quaternions_numpy(quaternions, vectors, out=None):
+    """Rotate each vector (N x 3) by the rotation matrix of the
+    corresponding attitude quaternion (N x 4: w, x, y, z),
+    optionally into a preallocated N x 3 output array."""
+    import numpy as np
+
+    q = np.asarray(quaternions, dtype=np.float64)
+    vectors = np.asarray(vectors, dtype=np.float64)
+
+    # Products of quaternion components (N x 4 x 4), then the rotation
+    # matrices (N x 3 x 3) as signed sums of those products:
+    qq = q[:, :, np.newaxis] * q[:, np.newaxis, :]
+    w2, x2, y2, z2 = qq[:, 0, 0], qq[:, 1, 1], qq[:, 2, 2], qq[:, 3, 3]
+    wx, wy, wz = 2 * qq[:, 0, 1], 2 * qq[:, 0, 2], 2 * qq[:, 0, 3]
+    xy, xz, yz = 2 * qq[:, 1, 2], 2 * qq[:, 1, 3], 2 * qq[:, 2, 3]
+
+    rotations = np.empty((q.shape[0], 3, 3))
+    rotations[:, 0, 0] = w2 + x2 - y2 - z2
+    rotations[:, 0, 1] = xy + wz
+    rotations[:, 0, 2] = xz - wy
+    rotations[:, 1, 0] = xy - wz
+    rotations[:, 1, 1] = w2 - x2 + y2 - z2
+    rotations[:, 1, 2] = yz + wx
+    rotations[:, 2, 0] = xz + wy
+    rotations[:, 2, 1] = yz - wx
+    rotations[:, 2, 2] = w2 - x2 - y2 + z2
+
+    rotated = np.einsum('nij,nj->ni', rotations, vectors, out=out)
+
+    return rotated
+
+
+# ----------------------------------------------------------------------------
+# Loop kernels (compiled by numba on first use)
+# ----------------------------------------------------------------------------
+def _loop(name):
+    """Plain Python loop of a kernel, as compiled by the numba backend."""
+    import numpy as np
+
+    if name == 'symbolize':
+        def loop(data, partition):
+            # Binary search of the (sorted) partition for each value,
+            # as np.searchsorted(partition, data, side='right'):
+            symbols = np.empty(data.size, dtype=np.int64)
+            for i in range(data.size):
+                low = 0
+                high = partition.size
+                while low < high:
+                    middle = (low + high) // 2
+                    if partition[middle] <= data[i]:
+                        low = middle + 1
+                    else:
+                        high = middle
+                symbols[i] = low + 1
+            return symbols
+
+    elif name == 'count_transitions':
+        def loop(symbols, number_of_states):
+            morph_counts = np.zeros((number_of_states, number_of_states))
+            state_counts = np.zeros(number_of_states)
+            for i in range(1, symbols.size):
+                current = symbols[i - 1] - 1
+                morph_counts[symbols[i] - 1, current] += 1
+                state_counts[current] += 1
+            return morph_counts, state_counts
+
+    elif name == 'segment_argmax':
+        def loop(values, boundaries):
+            # First maximum of each segment, or its first NaN
+            # (as numpy.argmax):
+            nsegments = max(boundaries.size - 1, 0)
+            imax = np.empty(nsegments, dtype=np.int64)
+            for isegment in range(nsegments):
+                ibest = boundaries[isegment]
+                for i in range(ibest + 1, boundaries[isegment + 1]):
+                    if np.isnan(values[ibest]):
+                        break
+                    if values[i] > values[ibest] or np.isnan(values[i]):
+                        ibest = i
+                imax[isegment] = ibest
+            return imax
+
+    elif name == 'integrate':
+        def loop(data, t):
+            integral = np.zeros(data.shape)
+            for ichannel in range(data.shape[0]):
+                for i in range(1, data.shape[1]):
+                    integral[ichannel, i] = integral[ichannel, i - 1] + \
+                        data[ichannel, i] * (t[i] - t[i - 1])
+            return integral
+
+    elif name == 'rotate_with_quaternions':
+        def loop(q, v, rotated):
+            for i in range(q.shape[0]):
+                w, x, y, z = q[i, 0], q[i, 1], q[i, 2], q[i, 3]
+                vx, vy, vz = v[i, 0], v[i, 1], v[i, 2]
+                rotated[i, 0] = (w**2 + x**2 - y**2 - z**2) * vx + \
+                                (2 * x * y + 2 * w * z) * vy + \
+                                (2 * x * z - 2 * w * y) * vz
+                rotated[i, 1] = (2 * x * y - 2 * w * z) * vx + \
+                                (w**2 - x**2 + y**2 - z**2) * vy + \
+                                (2 * y * z + 2 * w * x) * vz
+                rotated[i, 2] = (2 * x * z + 2 * w * y) * vx + \
+                                (2 * y * z - 2 * w * x) * vy + \
+                                (w**2 - x**2 - y**2 + z**2) * vz
+
+    else:
+        raise IOError("unknown kernel: {0}".format(name))
+
+    return loop
+
+
+def _loop_kernel(name, loop):
+    """Kernel calling a (compiled or plain Python) loop from _loop()."""
+    import numpy as np
+
+    if name == 'symbolize':
+        def kernel(data, partition):
+            return loop(np.asarray(data, dtype=np.float64),
+                        np.asarray(partition, dtype=np.float64))
+
+    elif name == 'count_transitions':
+        def kernel(symbols, number_of_states):
+            return loop(np.asarray(symbols, dtype=np.int64),
+                        number_of_states)
+
+    elif name == 'segment_argmax':
+        def kernel(values, boundaries):
+            return loop(np.asarray(values, dtype=np.float64),
+                        np.asarray(boundaries, dtype=np.int64))
+
+    elif name == 'integrate':
+        def kernel(data, t):
+            data = np.asarray(data, dtype=np.float64)
+            integral = loop(np.atleast_2d(data),
+                            np.asarray(t, dtype=np.float64))
+            return integral.reshape(data.shape)
+
+    elif name == 'rotate_with_quaternions':
+        def kernel(quaternions, vectors, out=None):
+            q = np.asarray(quaternions, dtype=np.float64)
+            if out is None:
+                out = np.empty((q.shape[0], 3))
+            loop(q, np.asarray(vectors, dtype=np.float64), out)
+            return out
+
+    else:
+        raise IOError("unknown kernel: {0}".format(name))
+
+    return kernel
+
+
+def _compile_numba_kernel(name):
+    """Compile a numba kernel and store it in _numba_kernels."""
+    import numba
+
+    _numba_kernels[name] = _loop_kernel(name,
+                                        numba.njit(cache=False)(_loop(name)))
+
+
+# ----------------------------------------------------------------------------
+# Backend equivalence
+# ----------------------------------------------------------------------------
+def compare_backends(size=10000, seed=0):
+    """
+    Run every kernel with each available backend ('numpy', and 'numba'
+    if it is installed) and with the plain Python loops that the numba
+    backend compiles, on the same random inputs.
+
+    Parameters
+    ----------
+    size : integer
+        number of samples of each random input
+    seed : integer
+        random seed
+
+    Returns
+    -------
+    differences : dictionary
+        maximum absolute difference between the outputs of any backend
+        and of the plain Python loop, by kernel name
+
+    Examples
+    --------
+    >>> from mhealthx.kernels import compare_backends
+    >>> differences = compare_backends()
+    >>> bool(max(differences.values()) < 1e-9)
+    True
+
+    """
+    import numpy as np
+
+    backends = ['numpy']
+    try:
+        import numba
+    except ImportError:
+        pass
+    else:
+        backends.append('numba')
+
+    random = np.random.RandomState(seed)
+    data = random.randn(size)
+    nan_data = data.copy()
+    nan_data[random.randint(0, size, size // 100)] = np.nan
+    t = np.cumsum(random.uniform(0.005, 0.015, size))
+    partition = np.sort(random.randn(3))
+    symbols = 1 + random.randint(0, 4, size)
+    boundaries = np.unique(random.randint(0, size, size // 20))
+    quaternions = random.randn(size, 4)
+    quaternions /= np.sqrt(np.sum(quaternions**2, axis=1))[:, np.newaxis]
+    vectors = random.randn(size, 3)
+
+    inputs = {'symbolize': (data, partition),
+              'count_transitions': (symbols, 4),
+              'segment_argmax': (nan_data, boundaries),
+              'integrate': (random.randn(3, size), t),
+              'rotate_with_quaternions': (quaternions, vectors)}
+
+    differences = {}
+    for name, args in inputs.items():
+        reference = _loop_kernel(name, _loop(name))(*args)
+        differences[name] = 0
+        for backend in backends:
+            output = get_kernel(name, backend)(*args)
+            if isinstance(reference, tuple):
+                pairs = zip(reference, output)
+            else:
+                pairs = [(reference, output)]
+            for a, b in pairs:
+                difference = np.max(np.abs(np.asarray(a, dtype=float) -
+                                           np.asarray(b, dtype=float)))
+                differences[name] = max(differences[name], difference)
+
+    return differences
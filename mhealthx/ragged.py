@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+"""
+Ragged arrays: many variable-length records stored in one flat array.
+
+Batch feature extraction works on many records (heel strikes, taps, ...)
+with different numbers of values. A RaggedArray stores all values in one
+contiguous array with offsets marking where each record starts, so that
+per-record statistics can be computed for all records at once with
+segmented (bincount-based) reductions instead of a Python loop.
+
+Authors:
+    - mhealthx contributors, 2026
+
+Copyright 2026,  Sage Bionetworks (http://sagebase.org), Apache v2.0 License
+
+"""
+
+
+class RaggedArray(object):
+    """
+    Variable-length records stored as one flat array plus offsets.
+
+    Parameters
+    ----------
+    values : numpy array
+        values of all records, concatenated
+    offsets : numpy array of integers
+        start of each record in values (plus total number of values)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.ragged import RaggedArray
+    >>> ragged = RaggedArray.from_arrays([[1, 2, 4], [], [3, 7]])
+    >>> ragged.lengths
+    array([3, 0, 2])
+    >>> ragged.diff().mean()
+    array([1.5, nan, 4. ])
+
+    """
+    def __init__(self, values, offsets):
+        import numpy as np
+
+        self.values = np.asarray(values)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if self.offsets[-1] != self.values.size:
+            raise IOError("the last offset should equal the number of values")
+
+    @classmethod
+    def from_arrays(cls, arrays, dtype=None):
+        """
+        Construct a RaggedArray from a list of lists or arrays.
+
+        Parameters
+        ----------
+        arrays : list of lists or numpy arrays
+            values of each record
+        dtype : numpy dtype
+            type of values (default: numpy.float64)
+
+        Returns
+        -------
+        ragged : RaggedArray
+        """
+        import numpy as np
+
+        if dtype is None:
+            dtype = np.float64
+        arrays = [np.asarray(array, dtype=dtype).ravel() for array in arrays]
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum([array.size for array in arrays], out=offsets[1:])
+        if arrays:
+            values = np.concatenate(arrays)
+        else:
+            values = np.zeros(0, dtype=dtype)
+
+        return cls(values, offsets)
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    def __getitem__(self, index):
+        """Values of one record (a view)."""
+        return self.values[self.offsets[index]:self.offsets[index + 1]]
+
+    @property
+    def lengths(self):
+        """Number of values in each record."""
+        import numpy as np
+
+        return np.diff(self.offsets)
+
+    def record_ids(self):
+        """Index of the record of each value."""
+        import numpy as np
+
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def positions(self):
+        """Position of each value within its record."""
+        import numpy as np
+
+        return np.arange(self.values.size) - \
+            np.repeat(self.offsets[:-1], self.lengths)
+
+    def diff(self, lag=1):
+        """
+        Differences between values lag positions apart within each record.
+
+        Parameters
+        ----------
+        lag : integer
+            number of positions between differenced values
+
+        Returns
+        -------
+        differences : RaggedArray
+            max(length - lag, 0) differences for each record
+        """
+        import numpy as np
+
+        lengths = np.maximum(self.lengths - lag, 0)
+        offsets = np.zeros(lengths.size + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        # Index of the first value of each difference:
+        first = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths) + \
+            np.repeat(self.offsets[:-1], lengths)
+        differences = self.values[first + lag] - self.values[first]
+
+        return RaggedArray(differences, offsets)
+
+    def select(self, mask):
+        """
+        Values of each record where mask (one Boolean per value) is True.
+
+        Returns
+        -------
+        selected : RaggedArray
+        """
+        import numpy as np
+
+        mask = np.asarray(mask, dtype=bool)
+        lengths = np.bincount(self.record_ids()[mask], minlength=len(self))
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        return RaggedArray(self.values[mask], offsets)
+
+    def sum(self):
+        """Sum of each record (0 for empty records)."""
+        import numpy as np
+
+        return np.bincount(self.record_ids(), weights=self.values,
+                           minlength=len(self))
+
+    def mean(self):
+        """Mean of each record (NaN for empty records)."""
+        import numpy as np
+
+        lengths = self.lengths
+        means = np.full(len(self), np.nan)
+        nonempty = lengths > 0
+        means[nonempty] = self.sum()[nonempty] / lengths[nonempty]
+
+        return means
+
+    def std(self):
+        """Standard deviation of each record (NaN for empty records)."""
+        import numpy as np
+
+        means = self.mean()
+        deviations = self.values - np.repeat(means, self.lengths)
+        lengths = self.lengths
+        stds = np.full(len(self), np.nan)
+        nonempty = lengths > 0
+        sums = np.bincount(self.record_ids(), weights=deviations**2,
+                           minlength=len(self))
+        stds[nonempty] = np.sqrt(sums[nonempty] / lengths[nonempty])
+
+        return stds
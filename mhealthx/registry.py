@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+"""
+Feature registry: output schemas of feature extractors and feature tables.
+
+Each feature extractor declares its output schema (feature names and
+dtypes) once, with register_features(). A FeatureTable preallocates one
+columnar (structured array) buffer for all records of a feature table,
+and extractors write their values straight into row slots, so that a
+table of many records is one allocation rather than one DataFrame per
+record.
+
+Authors:
+    - mhealthx contributors, 2026
+
+Copyright 2026,  Sage Bionetworks (http://sagebase.org), Apache v2.0 License
+
+"""
+
+# Registered schemas, keyed by extractor name:
+_registry = {}
+
+
+def make_schema(names, dtypes=None, function=None):
+    """
+    Make an output schema without registering it.
+
+    For features whose names are only known at run time (such as
+    openSMILE's, which depend on its configuration file), so that
+    a FeatureTable can be built without changing the registry.
+
+    Parameters
+    ----------
+    names : list of strings
+        feature names, in feature table column order
+    dtypes : list of numpy dtypes
+        dtype of each feature (default: numpy.float64 for all)
+    function : function
+        extractor returning one record's features ordered as names
+
+    Returns
+    -------
+    schema : dictionary
+        'names' (list of strings), 'dtypes' (list of numpy dtypes)
+        and 'function' (extractor function or None)
+
+    Examples
+    --------
+    >>> from mhealthx.registry import make_schema
+    >>> make_schema(['min', 'max'])['names']
+    ['min', 'max']
+
+    """
+    import numpy as np
+
+    names = list(names)
+    if dtypes is None:
+        dtypes = [np.float64] * len(names)
+    if len(dtypes) != len(names):
+        raise IOError("there should be one dtype per feature name")
+
+    return {'names': names,
+            'dtypes': [np.dtype(dtype) for dtype in dtypes],
+            'function': function}
+
+
+def register_features(name, names, dtypes=None, function=None):
+    """
+    Declare the output schema of a feature extractor.
+
+    Parameters
+    ----------
+    name : string
+        name of the extractor (such as 'pyGait')
+    names : list of strings
+        feature names, in feature table column order
+    dtypes : list of numpy dtypes
+        dtype of each feature (default: numpy.float64 for all)
+    function : function
+        extractor returning one record's features ordered as names
+        (or an object with a to_array() method, such as TapFeatures)
+
+    Examples
+    --------
+    >>> from mhealthx.registry import register_features, get_schema
+    >>> register_features('range', ['min', 'max'])
+    >>> get_schema('range')['names']
+    ['min', 'max']
+
+    """
+    from mhealthx.registry import make_schema
+
+    _registry[name] = make_schema(names, dtypes, function)
+
+
+def get_schema(name):
+    """
+    Get the output schema of a registered feature extractor.
+
+    Parameters
+    ----------
+    name : string
+        name of the extractor
+
+    Returns
+    -------
+    schema : dictionary
+        'names' (list of strings), 'dtypes' (list of numpy dtypes)
+        and 'function' (extractor function or None)
+
+    Examples
+    --------
+    >>> from mhealthx.registry import get_schema
+    >>> len(get_schema('tap')['names'])
+    90
+
+    """
+    if name not in _registry:
+        raise IOError("no features registered as '{0}'".format(name))
+
+    return _registry[name]
+
+
+class FeatureTable(object):
+    """
+    Preallocated columnar buffer of one extractor's features for N records.
+
+    Features of unwritten records are NaN (or 0, or empty strings,
+    for integer or string features).
+
+    Parameters
+    ----------
+    name : string
+        name of a registered extractor (see register_features())
+    number_of_records : integer
+        number of records (rows)
+    index : list
+        record IDs (default: 0 to number_of_records - 1)
+    schema : dictionary
+        schema to use instead of the registered one (see make_schema())
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.registry import FeatureTable
+    >>> table = FeatureTable('signal', 3, index=['a', 'b', 'c'])
+    >>> for i in range(3):
+    ...     table.extract(i, np.random.random(100))
+    >>> table.to_frame().shape
+    (3, 17)
+
+    """
+    def __init__(self, name, number_of_records, index=None, schema=None):
+        import numpy as np
+
+        from mhealthx.registry import get_schema
+
+        if schema is None:
+            schema = get_schema(name)
+        self.schema = schema
+        self.names = self.schema['names']
+        self.data = np.zeros(number_of_records,
+                             dtype=list(zip(self.names,
+                                            self.schema['dtypes'])))
+        for feature, dtype in zip(self.names, self.schema['dtypes']):
+            if dtype.kind in 'fc':
+                self.data[feature] = np.nan
+        if index is None:
+            index = np.arange(number_of_records)
+        elif len(index) != number_of_records:
+            raise IOError("there should be one index value per record")
+        self.index = index
+
+    def __len__(self):
+        return self.data.size
+
+    def write(self, irecord, values):
+        """
+        Write one record's features into its row.
+
+        Parameters
+        ----------
+        irecord : integer
+            row of the record
+        values : list or numpy array (or object with a to_array() method)
+            features ordered as the schema's names (None is stored as NaN)
+        """
+        import numpy as np
+
+        if hasattr(values, 'to_array'):
+            values = values.to_array()
+        if len(values) != len(self.names):
+            raise IOError("there should be one value per feature name")
+
+        self.data[irecord] = tuple(np.nan if value is None else value
+                                   for value in values)
+
+    def write_records(self, values, irecords=None):
+        """
+        Write many records' features into their rows, one column at a time.
+
+        For batch extractors that compute features for all records at once
+        (such as tap_features_batch() or gait_batch()).
+
+        Parameters
+        ----------
+        values : numpy array
+            number of records x number of features, ordered as the
+            schema's names
+        irecords : list or numpy array of integers
+            rows of the records (default: all rows, in order)
+        """
+        import numpy as np
+
+        values = np.asarray(values)
+        if values.ndim != 2 or values.shape[1] != len(self.names):
+            raise IOError("there should be one column per feature name")
+        if irecords is None:
+            irecords = np.arange(len(self))
+        if len(irecords) != values.shape[0]:
+            raise IOError("there should be one row of values per record")
+
+        for ifeature, feature in enumerate(self.names):
+            self.data[feature][irecords] = values[:, ifeature]
+
+    def extract(self, irecord, *args, **kwargs):
+        """
+        Run the registered extractor and write its features into a row.
+
+        Parameters
+        ----------
+        irecord : integer
+            row of the record
+        *args, **kwargs
+            arguments of the registered extractor function
+        """
+        function = self.schema['function']
+        if function is None:
+            raise IOError("no extractor function is registered")
+
+        self.write(irecord, function(*args, **kwargs))
+
+    def to_frame(self, index_name=None):
+        """
+        Feature table as a pandas DataFrame (one row per record).
+
+        Parameters
+        ----------
+        index_name : string
+            name of the index (such as 'recordId')
+
+        Returns
+        -------
+        feature_frame : pandas DataFrame
+        """
+        import pandas as pd
+
+        feature_frame = pd.DataFrame(self.data, index=self.index,
+                                     columns=self.names)
+        feature_frame.index.name = index_name
+
+        return feature_frame
+
+
+def _register_builtin_features():
+    """Register the schemas of mhealthx's own feature extractors."""
+    import numpy as np
+
+    from mhealthx.signals import signal_features, signal_feature_names, \
+        accelerometer_signal_quality, accelerometer_quality_gate
+    from mhealthx.extractors.pyGait import gait_features, gait_feature_names
+    from mhealthx.extractors.tapping import compute_tap_features, \
+        tap_feature_names
+    from mhealthx.extractors.voice import voice_features, voice_feature_names
+
+    register_features('signal', signal_feature_names,
+                      [np.int64] + [np.float64] *
+                      (len(signal_feature_names) - 1),
+                      signal_features)
+    register_features('pyGait', gait_feature_names, None, gait_features)
+    register_features('tap', tap_feature_names, None, compute_tap_features)
+    register_features('voice', voice_feature_names, None, voice_features)
+    register_features('quality', ['min_mse', 'vertical'],
+                      [np.float64, 'U1'], accelerometer_signal_quality)
+    register_features('quality_gate',
+                      ['min_mse', 'vertical', 'passed', 'skip_reason'],
+                      [np.float64, 'U1', np.bool_, 'U64'],
+                      accelerometer_quality_gate)
+
+
+_register_builtin_features()
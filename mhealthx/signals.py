@@ -9,12 +9,16 @@ Authors:
 Copyright 2015,  Sage Bionetworks (http://sagebase.org), Apache v2.0 License
 
 """
+from functools import lru_cache
 
 
 def compute_sample_rate(t):
     """
     Compute sample rate.
 
+    (See mhealthx.timing.compute_timing_stats for jitter, gaps and
+    duplicate time points.)
+
     Parameters
     ----------
     t : list
@@ -36,11 +40,9 @@ def compute_sample_rate(t):
     """
     import numpy as np
 
-    deltas = []
-    tprev = t[0]
-    for tnext in t[1::]:
-        deltas.append(tnext - tprev)
-        tprev = tnext
+    t = np.asarray(t, dtype=np.float64)
+
+    deltas = np.diff(t)
     sample_rate = 1 / np.mean(deltas)
 
     duration = t[-1] - t[0]
@@ -48,24 +50,96 @@ def compute_sample_rate(t):
     return sample_rate, duration
 
 
-def butter_lowpass_filter(data, sample_rate, cutoff=10, order=4):
+# Number of second-order-section designs to cache (see butter_lowpass_sos()):
+BUTTER_SOS_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=BUTTER_SOS_CACHE_SIZE)
+def _butter_sos_cache(order, cutoff, sample_rate):
+    """Design a low-pass Butterworth filter as second-order sections."""
+    from scipy.signal import butter
+
+    nyquist = 0.5 * sample_rate
+    normal_cutoff = cutoff / nyquist
+    sos = butter(order, normal_cutoff, btype='low', analog=False,
+                 output='sos')
+
+    return sos
+
+
+def butter_lowpass_sos(sample_rate, cutoff=10, order=4):
+    """
+    Design (or fetch a cached) [order]th order low-pass Butterworth filter
+    as second-order sections, with cut frequency set to [cutoff] Hz.
+
+    Sample rates estimated from timestamps (and cutoffs derived from them)
+    vary slightly from record to record, so the sample rate and cutoff are
+    rounded to 0.01 Hz before the filter is designed. The most recently
+    used BUTTER_SOS_CACHE_SIZE designs are cached by (order, cutoff,
+    sample_rate), so filtering many records (or many channels) recorded
+    at about the same rate reuses one design. The returned array is shared
+    between callers, so do not modify it.
+
+    Parameters
+    ----------
+    sample_rate : float
+        data sample rate
+    cutoff : float
+        filter cutoff
+    order : integer
+        order
+
+    Returns
+    -------
+    sos : numpy array of floats
+        second-order sections of the filter (number of sections x 6)
+
+    Examples
+    --------
+    >>> from mhealthx.signals import butter_lowpass_sos
+    >>> sos = butter_lowpass_sos(100, 5, 4)
+    >>> sos is butter_lowpass_sos(100.001, 5, 4)
+    True
+
+    """
+    from mhealthx.signals import _butter_sos_cache
+
+    sos = _butter_sos_cache(int(order), round(float(cutoff), 2),
+                            round(float(sample_rate), 2))
+
+    return sos
+
+
+def butter_lowpass_filter(data, sample_rate, cutoff=10, order=4,
+                          zero_phase=False, axis=-1):
     """
-    Low-pass filter data by the [order]th order zero lag Butterworth filter
+    Low-pass filter data by the [order]th order Butterworth filter
     whose cut frequency is set to [cutoff] Hz.
 
+    By default the filter is applied once, forward in time (causal, as with
+    scipy.signal.lfilter), so the output lags the input. Set zero_phase to
+    filter forward and backward for a true zero lag response (the effective
+    order is then doubled). The filter design is cached by
+    butter_lowpass_sos(), and data may hold several channels, which are
+    all filtered in one call along the given axis.
+
     After http://stackoverflow.com/questions/25191620/
     creating-lowpass-filter-in-scipy-understanding-methods-and-units
 
     Parameters
     ----------
     data : numpy array of floats
-        time-series data
+        time-series data (one channel, or channels x samples)
     sample_rate : integer
         data sample rate
     cutoff : float
         filter cutoff
     order : integer
         order
+    zero_phase : Boolean
+        filter forward and backward for zero lag?
+    axis : integer
+        axis of data along which to filter (time axis)
 
     Returns
     -------
@@ -74,21 +148,30 @@ def butter_lowpass_filter(data, sample_rate, cutoff=10, order=4):
 
     Examples
     --------
+    >>> import numpy as np
     >>> from mhealthx.signals import butter_lowpass_filter
     >>> data = np.random.random(100)
     >>> sample_rate = 10
-    >>> cutoff = 5
+    >>> cutoff = 4
     >>> order = 4
     >>> y = butter_lowpass_filter(data, sample_rate, cutoff, order)
+    >>> # Filter three channels with zero lag:
+    >>> xyz = np.random.random((3, 100))
+    >>> yxyz = butter_lowpass_filter(xyz, sample_rate, cutoff, order, True)
 
     """
-    from scipy.signal import butter, lfilter
+    import numpy as np
+    from scipy.signal import sosfilt, sosfiltfilt
 
-    nyquist = 0.5 * sample_rate
-    normal_cutoff = cutoff / nyquist
-    b, a = butter(order, normal_cutoff, btype='low', analog=False)
+    from mhealthx.signals import butter_lowpass_sos
+
+    sos = butter_lowpass_sos(sample_rate, cutoff, order)
 
-    y = lfilter(b, a, data)
+    data = np.asarray(data, dtype=np.float64)
+    if zero_phase:
+        y = sosfiltfilt(sos, data, axis=axis)
+    else:
+        y = sosfilt(sos, data, axis=axis)
 
     return y
 
@@ -183,7 +266,7 @@ def autocorrelate(data, unbias=2, normalize=2, plot_test=False):
 
     # Autocorrelation:
     coefficients = correlate(data, data, 'full')
-    coefficients = coefficients[coefficients.size/2:]
+    coefficients = coefficients[coefficients.size // 2:]
     N = coefficients.size
 
     # Plot:
@@ -231,6 +314,87 @@ def autocorrelate(data, unbias=2, normalize=2, plot_test=False):
     return coefficients, N
 
 
+def autocorrelate_batch(datas, unbias=2, normalize=2):
+    """
+    Compute autocorrelate() coefficients for many time series at once.
+
+    All series are zero-padded to one FFT length and transformed together
+    (one 2-D real FFT), and unbiasing and normalization are applied to all
+    rows at once.
+
+    Parameters
+    ----------
+    datas : list of lists or numpy arrays of floats
+        time series data of each record
+    unbias : integer or None
+        unbiased autocorrelation: divide by range (1) or by weighted range (2)
+    normalize : integer or None
+        normalize: divide by 1st coefficient (1) or by maximum abs. value (2)
+
+    Returns
+    -------
+    coefficients : numpy array of floats
+        number of records x maximum number of coefficients
+        (NaN beyond each record's number of coefficients)
+    N : numpy array of integers
+        number of coefficients of each record
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.signals import autocorrelate_batch
+    >>> datas = [np.random.random(100), np.random.random(80)]
+    >>> coefficients, N = autocorrelate_batch(datas)
+    >>> coefficients.shape, N
+    ((2, 100), array([100,  80]))
+
+    """
+    import numpy as np
+    from scipy.fftpack import next_fast_len
+
+    N = np.array([np.size(data) for data in datas], dtype=np.int64)
+    nmax = np.max(N)
+    rows = np.zeros((N.size, nmax))
+    for irow, data in enumerate(datas):
+        rows[irow, :N[irow]] = data
+
+    # Linear autocorrelation of every row through one batched FFT:
+    nfft = next_fast_len(2 * nmax - 1)
+    spectra = np.fft.rfft(rows, nfft, axis=1)
+    spectra *= spectra.conj()
+    coefficients = np.fft.irfft(spectra, nfft, axis=1)[:, :nmax]
+
+    lags = np.arange(nmax)
+    valid = lags < N[:, np.newaxis]
+    coefficients[~valid] = np.nan
+    Ns = N[:, np.newaxis].astype(np.float64)
+
+    # Unbiased:
+    if unbias:
+        if unbias == 1:
+            coefficients /= (Ns - lags)
+        elif unbias == 2:
+            last = coefficients[np.arange(N.size), N - 1][:, np.newaxis]
+            coefficient_ratio = coefficients[:, :1] / last
+            fraction = lags / np.maximum(Ns - 1, 1)
+            coefficients /= coefficient_ratio + \
+                (1 - coefficient_ratio) * fraction
+        else:
+            raise IOError("unbias should be set to 1, 2, or None")
+
+    # Normalize:
+    if normalize:
+        if normalize == 1:
+            coefficients /= np.abs(coefficients[:, :1])
+        elif normalize == 2:
+            maxima = np.nanmax(np.abs(coefficients), axis=1)
+            coefficients /= maxima[:, np.newaxis]
+        else:
+            raise IOError("normalize should be set to 1, 2, or None")
+
+    return coefficients, N
+
+
 def parabolic(f, x):
     """
     Quadratic interpolation for estimating the true position of an
@@ -268,7 +432,7 @@ def parabolic(f, x):
     return xv, yv
 
 
-def compute_interpeak(data, sample_rate):
+def compute_interpeak(data, sample_rate, spectral=None):
     """
     Compute number of samples between signal peaks using the real part of FFT.
 
@@ -278,6 +442,9 @@ def compute_interpeak(data, sample_rate):
         time series data
     sample_rate : float
         sample rate of accelerometer reading (Hz)
+    spectral : SpectralContext or None
+        cached spectra of data (see mhealthx.spectral), to share one FFT
+        with other estimators computed from the same data
 
     Returns
     -------
@@ -292,19 +459,13 @@ def compute_interpeak(data, sample_rate):
     >>> sample_rate = 100
     >>> interpeak = compute_interpeak(data, sample_rate)
     """
-    import numpy as np
-    from scipy.fftpack import rfft, fftfreq
-
-    # Real part of FFT:
-    freqs = fftfreq(data.size, d=1.0/sample_rate)
-    f_signal = rfft(data)
+    from mhealthx.spectral import SpectralContext
 
-    # Maximum non-zero frequency:
-    imax_freq = np.argsort(f_signal)[-2]
-    freq = np.abs(freqs[imax_freq])
+    if spectral is None:
+        spectral = SpectralContext(data, sample_rate)
 
-    # Inter-peak samples:
-    interpeak = np.int(np.round(sample_rate / freq))
+    # Inter-peak samples from the maximum non-zero frequency:
+    interpeak = spectral.interpeak()
 
     return interpeak
 
@@ -607,17 +768,26 @@ def compute_stats(x):
         lower25, upper25, inter50
 
 
-def signal_features(data):
+def signal_features(data, axis=None):
     """
     Extract various features from time series data.
 
+    Multichannel data (such as x, y, z axes) are processed in one
+    vectorized call, with one value per channel for each feature
+    (see signal_feature_matrix()).
+
     Parameters
     ----------
     data : numpy array of floats
-        time series data
+        time series data (one channel, or several channels)
+    axis : integer
+        for multichannel data, the axis of the samples (default: last)
 
     Returns
     -------
+    (For multichannel data, each feature is a numpy array
+    with one value per channel.)
+
     num : integer
         number of elements
     min : integer
@@ -659,32 +829,397 @@ def signal_features(data):
     >>> from mhealthx.signals import signal_features
     >>> data = np.random.random(100)
     >>> num, min, max, rng, avg, std, med, mad, kurt, skew, cvar, lower25, upper25, inter50, rms, entropy, tk_energy = signal_features(data)
+    >>> axyz = np.random.random((3, 100))
+    >>> features = signal_features(axyz)
+    >>> features[4].shape
+    (3,)
 
     """
+    import numpy as np
     from scipy.stats import entropy as scipy_entropy
 
     from mhealthx.signals import compute_stats, root_mean_square, \
-        compute_mean_teagerkaiser_energy
-
-    num, min, max, rng, avg, std, med, mad, kurt, skew, cvar, lower25, \
-    upper25, inter50 = compute_stats(data)
+        compute_mean_teagerkaiser_energy, signal_feature_matrix
+
+    # Multichannel data: all channels at once, one row per channel:
+    if axis is not None or np.ndim(data) > 1:
+        if axis is None:
+            axis = -1
+        data = np.moveaxis(np.asarray(data, dtype=np.float64), axis, -1)
+        matrix = signal_feature_matrix(data.reshape(-1, data.shape[-1]))
+        num, min, max, rng, avg, std, med, mad, kurt, skew, cvar, lower25, \
+        upper25, inter50, rms, entropy, tk_energy = matrix.T
+    else:
+        num, min, max, rng, avg, std, med, mad, kurt, skew, cvar, lower25, \
+        upper25, inter50 = compute_stats(data)
 
-    rms = root_mean_square(data)
+        rms = root_mean_square(data)
 
-    entropy = scipy_entropy(data)
+        entropy = scipy_entropy(data)
 
-    tk_energy = compute_mean_teagerkaiser_energy(data)
+        tk_energy = compute_mean_teagerkaiser_energy(data)
 
     return num, min, max, rng, avg, std, med, mad, kurt, skew, cvar, \
            lower25, upper25, inter50, rms, entropy, tk_energy
 
 
+# Names of the features returned by signal_features(), in order:
+signal_feature_names = ['num', 'min', 'max', 'rng', 'avg', 'std', 'med',
+                        'mad', 'kurt', 'skew', 'cvar', 'lower25', 'upper25',
+                        'inter50', 'rms', 'entropy', 'tk_energy']
+
+
+def sliding_windows(data, window_size, step=1):
+    """
+    Strided (zero-copy, read-only) view of time series data as windows.
+
+    Parameters
+    ----------
+    data : list or numpy array of floats
+        time series data
+    window_size : integer
+        number of samples per window
+    step : integer
+        number of samples between the starts of consecutive windows
+
+    Returns
+    -------
+    windows : numpy array of floats
+        number of windows x window_size view of data
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.signals import sliding_windows
+    >>> data = np.arange(10.0)
+    >>> windows = sliding_windows(data, 4, 3)
+    >>> windows
+    array([[0., 1., 2., 3.],
+           [3., 4., 5., 6.],
+           [6., 7., 8., 9.]])
+
+    """
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim != 1:
+        raise IOError("data should be a one-dimensional array")
+    if window_size > data.size:
+        raise IOError("window_size should not exceed the number of samples")
+
+    windows = sliding_window_view(data, window_size)[::step]
+
+    return windows
+
+
+def windowed_argmax(data, centers, half_width):
+    """
+    Index of the (first) maximum of data in a window around each center.
+
+    Each window spans data[center - half_width:center + half_width],
+    clipped to the start and end of data. All windows are searched
+    in one vectorized argmax over a strided view of data.
+
+    Parameters
+    ----------
+    data : list or numpy array of floats
+        time series data
+    centers : list or numpy array of integers
+        window centers (indices of data)
+    half_width : integer
+        number of samples on either side of each center
+
+    Returns
+    -------
+    indices : numpy array of integers
+        index of the maximum value of data in each window
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.signals import windowed_argmax
+    >>> data = np.array([0, 3, 1, 0, 2, 5, 1, 0, 4, 0])
+    >>> windowed_argmax(data, [2, 6, 9], 2)
+    array([1, 5, 8])
+
+    """
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    data = np.asarray(data, dtype=np.float64)
+    centers = np.asarray(centers, dtype=np.int64)
+    width = 2 * int(half_width)
+    if width < 1:
+        raise IOError("half_width should be a positive integer")
+
+    # Pad both ends so that windows near either end can be full width:
+    pad = np.full(width // 2, -np.inf)
+    padded = np.concatenate((pad, data, pad))
+    windows = sliding_window_view(padded, width)[centers]
+
+    indices = centers - width // 2 + np.argmax(windows, axis=1)
+
+    return indices
+
+
+def signal_feature_matrix(data):
+    """
+    Compute signal_features() for each row of a 2-D array at once.
+
+    Each statistic is computed for all rows in one vectorized call
+    along the last axis, so rows may be windows of a recording
+    (see windowed_signal_features()) or channels of a record.
+
+    Parameters
+    ----------
+    data : numpy array of floats
+        number of rows x number of samples
+
+    Returns
+    -------
+    features : numpy array of floats
+        number of rows x number of features
+        (columns ordered as in signal_feature_names)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.signals import signal_feature_matrix
+    >>> data = np.random.random((3, 100))
+    >>> features = signal_feature_matrix(data)
+    >>> features.shape
+    (3, 17)
+
+    """
+    import numpy as np
+    from scipy import stats
+    from scipy.special import entr
+
+    from mhealthx.signals import signal_feature_names
+
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim != 2:
+        raise IOError("data should be a two-dimensional array")
+
+    features = np.empty((data.shape[0], len(signal_feature_names)))
+    (num, min, max, rng, avg, std, med, mad, kurt, skew, cvar, lower25,
+     upper25, inter50, rms, entropy, tk_energy) = features.T
+
+    num[:] = data.shape[1]
+    np.min(data, axis=1, out=min)
+    np.max(data, axis=1, out=max)
+    np.subtract(max, min, out=rng)
+    np.mean(data, axis=1, out=avg)
+    np.std(data, axis=1, out=std)
+
+    # Quartiles and median from one partition of each row:
+    lower25[:], med[:], upper25[:] = np.percentile(data, [25, 50, 75],
+                                                   axis=1)
+    np.subtract(upper25, lower25, out=inter50)
+    mad[:] = np.median(np.abs(data - med[:, np.newaxis]), axis=1)
+
+    kurt[:] = stats.kurtosis(data, axis=1)
+    skew[:] = stats.skew(data, axis=1)
+    cvar[:] = 100 * std / avg
+
+    demeaned = data - avg[:, np.newaxis]
+    rms[:] = np.sqrt(np.sum(demeaned**2 / data.shape[1], axis=1))
+
+    # Entropy of each row normalized to sum to one (as scipy.stats.entropy):
+    pk = data / np.sum(data, axis=1)[:, np.newaxis]
+    entropy[:] = np.sum(entr(pk), axis=1)
+
+    # Mean Teager-Kaiser energy:
+    tk_energy[:] = np.mean((data**2)[:, 1:-1] - data[:, 2:] * data[:, :-2],
+                           axis=1)
+
+    return features
+
+
+def segmented_signal_features(values, offsets):
+    """
+    Compute signal_features() for each segment of a flat array at once.
+
+    Segments (such as the intertap intervals, tap positions and drifts
+    of one or many tapping records) may differ in length. All segments
+    share one sorted buffer for extrema, median and quartiles, one sorted
+    buffer of absolute deviations for the median absolute deviation,
+    and segmented (bincount-based) sums for the moments, entropy and
+    Teager-Kaiser energy. Empty segments have NaN features (num = 0).
+
+    Parameters
+    ----------
+    values : numpy array of floats
+        values of all segments, concatenated
+    offsets : numpy array of integers
+        start of each segment in values (plus total number of values)
+
+    Returns
+    -------
+    features : numpy array of floats
+        number of segments x number of features
+        (columns ordered as in signal_feature_names)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.signals import segmented_signal_features
+    >>> values = np.random.random(100)
+    >>> offsets = np.array([0, 10, 10, 100])
+    >>> features = segmented_signal_features(values, offsets)
+    >>> features.shape
+    (3, 17)
+
+    """
+    import numpy as np
+    from scipy.special import entr
+
+    from mhealthx.signals import signal_feature_names
+
+    values = np.asarray(values, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if offsets[-1] != values.size:
+        raise IOError("the last offset should equal the number of values")
+    nsegments = offsets.size - 1
+    lengths = np.diff(offsets)
+    starts = offsets[:-1]
+    segment_ids = np.repeat(np.arange(nsegments), lengths)
+    positions = np.arange(values.size) - np.repeat(starts, lengths)
+
+    features = np.full((nsegments, len(signal_feature_names)), np.nan)
+    (num, min, max, rng, avg, std, med, mad, kurt, skew, cvar, lower25,
+     upper25, inter50, rms, entropy, tk_energy) = features.T
+    num[:] = lengths
+
+    full = lengths > 0
+    n = lengths[full].astype(np.float64)
+    first = starts[full]
+    last = offsets[1:][full] - 1
+
+    def segment_sums(weights):
+        return np.bincount(segment_ids, weights=weights,
+                           minlength=nsegments)[full]
+
+    def segment_sort(segment_values):
+        # Sort within segments: rank all values with one sort, then sort
+        # (segment, rank) integer keys (faster than lexsort of both):
+        order = np.argsort(segment_values)
+        ranks = np.empty(values.size, dtype=np.int64)
+        ranks[order] = np.arange(values.size)
+        keys = segment_ids * values.size + ranks
+        keys.sort()
+        return segment_values[order[keys % values.size]]
+
+    def segment_percentile(sorted_values, percent):
+        # Linear interpolation between closest ranks (as numpy.percentile):
+        rank = percent / 100.0 * (n - 1)
+        below = np.floor(rank).astype(np.int64)
+        above = np.minimum(below + 1, lengths[full] - 1)
+        lower = sorted_values[first + below]
+        upper = sorted_values[first + above]
+        return lower + (rank - below) * (upper - lower)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+        # Extrema, median and quartiles from one sort of all segments:
+        sorted_values = segment_sort(values)
+        min[full] = sorted_values[first]
+        max[full] = sorted_values[last]
+        rng[full] = max[full] - min[full]
+        med[full] = segment_percentile(sorted_values, 50)
+        lower25[full] = segment_percentile(sorted_values, 25)
+        upper25[full] = segment_percentile(sorted_values, 75)
+        inter50[full] = upper25[full] - lower25[full]
+
+        # Median absolute deviation:
+        deviations = np.abs(values - np.nan_to_num(med)[segment_ids])
+        sorted_deviations = segment_sort(deviations)
+        mad[full] = segment_percentile(sorted_deviations, 50)
+
+        # Moments (biased, as scipy.stats defaults), with skewness and
+        # kurtosis undefined for (numerically) constant segments:
+        avg[full] = segment_sums(values) / n
+        demeaned = values - np.nan_to_num(avg)[segment_ids]
+        m2 = segment_sums(demeaned**2) / n
+        m3 = segment_sums(demeaned**3) / n
+        m4 = segment_sums(demeaned**4) / n
+        std[full] = np.sqrt(m2)
+        rms[full] = np.sqrt(m2)
+        constant = m2 <= (np.finfo(np.float64).eps * avg[full])**2
+        skew[full] = np.where(constant, np.nan, m3 / m2**1.5)
+        kurt[full] = np.where(constant, np.nan, m4 / m2**2 - 3)
+        cvar[full] = 100 * std[full] / avg[full]
+
+        # Entropy of each segment normalized to sum to one
+        # (as scipy.stats.entropy):
+        totals = np.bincount(segment_ids, weights=values,
+                             minlength=nsegments)
+        entropy[full] = segment_sums(entr(values / totals[segment_ids]))
+
+        # Mean Teager-Kaiser energy over interior values of each segment:
+        interior = (positions > 0) & (positions < lengths[segment_ids] - 1)
+        iinterior = np.nonzero(interior)[0]
+        energies = values[iinterior]**2 - \
+            values[iinterior + 1] * values[iinterior - 1]
+        tk_energy[full] = np.bincount(segment_ids[iinterior],
+                                      weights=energies,
+                                      minlength=nsegments)[full] / (n - 2)
+        tk_energy[lengths < 3] = np.nan
+
+    return features
+
+
+def windowed_signal_features(data, window_size, step=1):
+    """
+    Extract signal_features() from each window of time series data.
+
+    Windows are strided views of data (no copies are made per window),
+    and each feature is computed across all windows in one vectorized call.
+
+    Parameters
+    ----------
+    data : list or numpy array of floats
+        time series data
+    window_size : integer
+        number of samples per window
+    step : integer
+        number of samples between the starts of consecutive windows
+
+    Returns
+    -------
+    features : numpy array of floats
+        number of windows x number of features
+        (columns ordered as in signal_feature_names)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.signals import windowed_signal_features
+    >>> data = np.random.random(1000)
+    >>> features = windowed_signal_features(data, 200, 100)
+    >>> features.shape
+    (9, 17)
+
+    """
+    from mhealthx.signals import sliding_windows, signal_feature_matrix
+
+    windows = sliding_windows(data, window_size, step)
+    features = signal_feature_matrix(windows)
+
+    return features
+
+
 def gravity_min_mse(gx, gy, gz):
     """
     Compute QC score based on gravity acceleration only.
 
     Elias Chaibub-Neto used this to find gross rotations of the phone.
 
+    The mean squared errors of all six axis directions (+/-1 g along x, y
+    and z) are computed together from the mean and mean square of each
+    axis (axes may differ in length), as mean(g**2) -/+ 2 * mean(g) + 1.
+
     Parameters
     ----------
     gx : list or numpy array
@@ -715,22 +1250,19 @@ def gravity_min_mse(gx, gy, gz):
     """
     import numpy as np
 
-    mse1 = np.mean((np.asarray(gx) - 1)**2)
-    mse2 = np.mean((np.asarray(gx) + 1)**2)
-    mse3 = np.mean((np.asarray(gy) - 1)**2)
-    mse4 = np.mean((np.asarray(gy) + 1)**2)
-    mse5 = np.mean((np.asarray(gz) - 1)**2)
-    mse6 = np.mean((np.asarray(gz) + 1)**2)
+    gxyz = [np.asarray(g, dtype=np.float64).ravel() for g in (gx, gy, gz)]
 
-    min_mse = np.min([mse1, mse2, mse3, mse4, mse5, mse6])
-    imin = np.argmin([mse1, mse2, mse3, mse4, mse5, mse6])
+    # Mean of each axis and mean of its squares, then all six errors
+    # (x - 1, x + 1, y - 1, y + 1, z - 1, z + 1):
+    means = np.array([np.sum(g) / g.size for g in gxyz])
+    mean_squares = np.array([np.dot(g, g) / g.size for g in gxyz])
+    mses = np.empty(6)
+    mses[0::2] = mean_squares - 2 * means + 1
+    mses[1::2] = mean_squares + 2 * means + 1
 
-    if imin == 0 or imin == 1:
-        vertical = "x"
-    elif imin == 2 or imin == 3:
-        vertical = "y"
-    else:
-        vertical = "z"
+    imin = np.argmin(mses)
+    min_mse = mses[imin]
+    vertical = "xyz"[imin // 2]
 
     return min_mse, vertical
 
@@ -773,3 +1305,60 @@ def accelerometer_signal_quality(gx, gy, gz):
 
     return min_mse, vertical
 
+
+def accelerometer_quality_gate(gx, gy, gz, max_mse=None):
+    """
+    Decide whether accelerometer data are good enough to extract features.
+
+    Records whose gravity acceleration is far from any axis direction
+    (gross rotations of the phone; see gravity_min_mse()) fail the gate,
+    so that costly feature extraction can be skipped for them.
+
+    Parameters
+    ----------
+    gx : list
+        x-axis gravity acceleration
+    gy : list
+        y-axis gravity acceleration
+    gz : list
+        z-axis gravity acceleration
+    max_mse : float
+        maximum minimum mean squared error to pass the gate
+        (default: None, so that all records pass)
+
+    Returns
+    -------
+    min_mse : float
+        minimum mean squared error
+    vertical : string
+        primary direction of vertical ('x', 'y', or 'z')
+    passed : Boolean
+        good enough to extract features?
+    skip_reason : string
+        why the record failed the gate (empty string if it passed)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.signals import accelerometer_quality_gate
+    >>> gx, gy = 0.1 * np.random.randn(2, 100)
+    >>> gz = -1 + 0.1 * np.random.randn(100)
+    >>> min_mse, vertical, passed, skip_reason = accelerometer_quality_gate(gx, gy, gz, max_mse=0.1)
+    >>> vertical, passed
+    ('z', True)
+
+    """
+    from mhealthx.signals import gravity_min_mse
+
+    min_mse, vertical = gravity_min_mse(gx, gy, gz)
+
+    if max_mse is not None and not min_mse <= max_mse:
+        passed = False
+        skip_reason = "gravity min_mse {0:.4g} > max_mse {1:.4g}".\
+            format(min_mse, max_mse)
+    else:
+        passed = True
+        skip_reason = ''
+
+    return min_mse, vertical, passed, skip_reason
+
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""
+Spectra of a signal computed once and shared by frequency estimators.
+
+compute_interpeak() (in heel_strikes() and walk_direction_preheel()) and
+the autocorrelation estimator in xtras/frequency_estimator.py share one
+FFT, zero-padded to twice the signal length: the autocorrelation needs
+that padding, and the unpadded spectrum that compute_interpeak() ranks
+is every other bin of it.  The harmonic product spectrum estimator
+windows the signal before its FFT, so its spectrum cannot be shared
+and is computed (once) on its own.  A SpectralContext computes each
+spectrum the first time it is asked for and caches the results.
+
+Authors:
+    - mhealthx contributors, 2026
+
+Copyright 2026,  Sage Bionetworks (http://sagebase.org), Apache v2.0 License
+
+"""
+
+
+class SpectralContext(object):
+    """
+    Cached spectra of one signal.
+
+    Unless demean is set, the data are not copied: do not modify them
+    after a spectrum has been computed.
+
+    Parameters
+    ----------
+    data : list or numpy array of floats
+        time series data
+    sample_rate : float
+        sample rate (Hz)
+    pad : Boolean
+        zero-pad transforms to the next fast FFT length?
+    demean : Boolean
+        work on a demeaned copy of the data? (spectra requested with
+        and without demean then share the same cached FFT)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.spectral import SpectralContext
+    >>> t = np.arange(1000) / 100.0
+    >>> data = np.sin(2 * np.pi * 2 * t) + 0.1 * np.random.random(1000)
+    >>> spectral = SpectralContext(data, 100)
+    >>> freq = spectral.peak_frequency()
+    >>> interpeak = spectral.interpeak()
+
+    """
+    def __init__(self, data, sample_rate, pad=True, demean=False):
+        import numpy as np
+        from scipy.fftpack import next_fast_len
+
+        self.data = np.asarray(data, dtype=np.float64)
+        if demean:
+            self.data = self.data - np.mean(self.data)
+        self.demeaned = demean
+        self.sample_rate = sample_rate
+        self.size = self.data.size
+        if pad:
+            self.nfft = next_fast_len(self.size)
+        else:
+            self.nfft = self.size
+        self._cache = {}
+
+    def _demean(self, demean):
+        """Does a demean request still need the mean removed?"""
+        return demean and not self.demeaned
+
+    def _signal(self, window=None, demean=False):
+        """Demeaned and/or windowed (symmetric window) copy of the data."""
+        import numpy as np
+        from scipy.signal import get_window
+
+        x = self.data
+        if demean:
+            x = x - np.mean(x)
+        if window:
+            x = x * get_window(window, self.size, fftbins=False)
+
+        return x
+
+    def spectrum(self, window=None, demean=False, nfft=None):
+        """
+        Complex one-sided spectrum (numpy.fft.rfft) of the data.
+
+        Parameters
+        ----------
+        window : string or None
+            name of a scipy.signal window to apply first (ex: 'blackmanharris')
+        demean : Boolean
+            remove the mean first?
+        nfft : integer or None
+            transform length (default: self.nfft)
+
+        Returns
+        -------
+        spectrum : numpy array of complex numbers
+        """
+        import numpy as np
+
+        if nfft is None:
+            nfft = self.nfft
+        demean = self._demean(demean)
+        key = ('spectrum', window, demean, nfft)
+        if key not in self._cache:
+            self._cache[key] = np.fft.rfft(self._signal(window, demean),
+                                           nfft)
+
+        return self._cache[key]
+
+    def frequencies(self, nfft=None):
+        """Frequencies (Hz) of the spectrum bins."""
+        import numpy as np
+
+        if nfft is None:
+            nfft = self.nfft
+        key = ('frequencies', nfft)
+        if key not in self._cache:
+            self._cache[key] = np.fft.rfftfreq(nfft, 1.0 / self.sample_rate)
+
+        return self._cache[key]
+
+    def magnitude(self, window=None, demean=False):
+        """Magnitude spectrum (absolute value of the spectrum)."""
+        import numpy as np
+
+        demean = self._demean(demean)
+        key = ('magnitude', window, demean)
+        if key not in self._cache:
+            self._cache[key] = np.abs(self.spectrum(window, demean))
+
+        return self._cache[key]
+
+    def power(self, window=None, demean=False):
+        """Power spectrum (squared magnitude of the spectrum)."""
+        demean = self._demean(demean)
+        key = ('power', window, demean)
+        if key not in self._cache:
+            self._cache[key] = self.magnitude(window, demean) ** 2
+
+        return self._cache[key]
+
+    def packed_real(self, demean=False):
+        """
+        Real FFT of the (unpadded) data in scipy.fftpack.rfft's packed
+        layout: [y(0), Re(y(1)), Im(y(1)), ..., Re(y(n/2))].
+
+        Read off the even bins of the cached spectrum zero-padded to
+        2 * size (the one autocorrelation() uses) instead of a second FFT.
+        """
+        import numpy as np
+
+        demean = self._demean(demean)
+        key = ('packed_real', demean)
+        if key not in self._cache:
+            X = self.spectrum(demean=demean, nfft=2 * self.size)[::2]
+            packed = np.empty(self.size)
+            packed[0] = X[0].real
+            interleaved = np.empty(2 * (X.size - 1))
+            interleaved[0::2] = X[1:].real
+            interleaved[1::2] = X[1:].imag
+            packed[1:] = interleaved[:self.size - 1]
+            self._cache[key] = packed
+
+        return self._cache[key]
+
+    def autocorrelation(self, demean=True):
+        """
+        Linear autocorrelation of the data for lags 0 to size - 1,
+        from the cached spectrum zero-padded to 2 * size.
+        """
+        import numpy as np
+
+        demean = self._demean(demean)
+        key = ('autocorrelation', demean)
+        if key not in self._cache:
+            nfft = 2 * self.size
+            X = self.spectrum(demean=demean, nfft=nfft)
+            corr = np.fft.irfft(X.real ** 2 + X.imag ** 2, nfft)[:self.size]
+            self._cache[key] = corr
+
+        return self._cache[key]
+
+    def peak_frequency(self, window=None, demean=True):
+        """Frequency (Hz) of the largest non-zero-frequency magnitude."""
+        import numpy as np
+
+        magnitude = self.magnitude(window, demean)
+        ipeak = 1 + np.argmax(magnitude[1:])
+
+        return self.frequencies()[ipeak]
+
+    def interpeak(self, demean=False):
+        """
+        Number of samples between peaks, from the frequency of the second
+        largest value of the packed real FFT (see compute_interpeak()).
+
+        The two largest values are found with two argmax passes
+        rather than by sorting the spectrum.
+        """
+        import numpy as np
+
+        demean = self._demean(demean)
+        key = ('interpeak', demean)
+        if key not in self._cache:
+            f_signal = self.packed_real(demean)
+
+            # Maximum non-zero frequency (second largest value):
+            imax = np.argmax(f_signal)
+            largest = f_signal[imax]
+            f_signal[imax] = -np.inf
+            imax_freq = np.argmax(f_signal)
+            f_signal[imax] = largest
+
+            freqs = np.fft.fftfreq(self.size, d=1.0 / self.sample_rate)
+            freq = np.abs(freqs[imax_freq])
+
+            # Inter-peak samples:
+            self._cache[key] = int(np.round(self.sample_rate / freq))
+
+        return self._cache[key]
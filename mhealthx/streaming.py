@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+"""
+Streaming statistics: summaries of values that arrive one at a time.
+
+Features of live recordings (such as tap events) can be reported while
+the recording is in progress. The classes below update in constant time
+and memory per value and summarize all values seen so far in constant
+time, with exact moments and approximate (P-squared) quantiles.
+
+Authors:
+    - mhealthx contributors, 2026
+
+Copyright 2026,  Sage Bionetworks (http://sagebase.org), Apache v2.0 License
+
+"""
+
+
+class P2Quantile(object):
+    """
+    Streaming estimate of a quantile with the P-squared algorithm.
+
+    Five markers (minimum, maximum, the quantile and two intermediate
+    quantiles) are moved along piecewise-parabolic estimates as values
+    arrive, without storing the values (Jain and Chlamtac, 1985).
+    The quantile of the first five values is exact
+    (linear interpolation, as numpy.percentile).
+
+    Parameters
+    ----------
+    percent : float
+        percentile to estimate (0 to 100)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.streaming import P2Quantile
+    >>> median = P2Quantile(50)
+    >>> for value in np.random.random(10000):
+    ...     median.update(value)
+    >>> bool(np.abs(median.value() - 0.5) < 0.05)
+    True
+
+    """
+    def __init__(self, percent):
+        self.p = percent / 100.0
+        self.count = 0
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * self.p, 4 * self.p, 2 + 2 * self.p, 4]
+        self.increments = [0, self.p / 2, self.p, (1 + self.p) / 2, 1]
+
+    def update(self, value):
+        """Add one value."""
+        self.count += 1
+        if self.count <= 5:
+            self.heights.append(value)
+            self.heights.sort()
+        else:
+            q = self.heights
+            n = self.positions
+
+            # Cell of the new value (extending the extremes):
+            if value < q[0]:
+                q[0] = value
+                k = 0
+            elif value >= q[4]:
+                q[4] = value
+                k = 3
+            else:
+                k = 0
+                while value >= q[k + 1]:
+                    k += 1
+            for i in range(k + 1, 5):
+                n[i] += 1
+            for i in range(5):
+                self.desired[i] += self.increments[i]
+
+            # Adjust the heights of the three middle markers:
+            for i in range(1, 4):
+                d = self.desired[i] - n[i]
+                if (d >= 1 and n[i + 1] - n[i] > 1) or \
+                   (d <= -1 and n[i - 1] - n[i] < -1):
+                    d = 1 if d > 0 else -1
+                    parabolic = q[i] + d / float(n[i + 1] - n[i - 1]) * \
+                        ((n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) /
+                         float(n[i + 1] - n[i]) +
+                         (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) /
+                         float(n[i] - n[i - 1]))
+                    if q[i - 1] < parabolic < q[i + 1]:
+                        q[i] = parabolic
+                    else:
+                        q[i] += d * (q[i + d] - q[i]) / float(n[i + d] - n[i])
+                    n[i] += d
+
+    def value(self):
+        """Current estimate of the quantile (NaN before any values)."""
+        if self.count == 0:
+            quantile = float('nan')
+        elif self.count <= 5:
+            rank = self.p * (self.count - 1)
+            below = int(rank)
+            above = min(below + 1, self.count - 1)
+            quantile = self.heights[below] + (rank - below) * \
+                (self.heights[above] - self.heights[below])
+        else:
+            quantile = self.heights[2]
+
+        return quantile
+
+
+class RunningStatistics(object):
+    """
+    Streaming signal_features() of values that arrive one at a time.
+
+    Count, extrema, mean, standard deviation, skewness, kurtosis,
+    coefficient of variation, root mean square, entropy and mean
+    Teager-Kaiser energy are exact (moments are updated as in Pebay, 2008).
+    Median, quartiles and median absolute deviation are P-squared
+    estimates (exact for up to five values); the absolute deviation of
+    each value is taken from the median estimate when the value arrives.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.streaming import RunningStatistics
+    >>> statistics = RunningStatistics()
+    >>> for value in np.random.random(100):
+    ...     statistics.update(value)
+    >>> statistics.features().shape
+    (17,)
+
+    """
+    def __init__(self):
+        from mhealthx.streaming import P2Quantile
+
+        self.count = 0
+        self.min = float('inf')
+        self.max = -float('inf')
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.total = 0.0
+        self.total_xlogx = 0.0
+        self.negative = False
+        self.tk_total = 0.0
+        self.previous = []
+        self.head = []
+        self.lower25 = P2Quantile(25)
+        self.median = P2Quantile(50)
+        self.upper25 = P2Quantile(75)
+        self.mad = P2Quantile(50)
+
+    def update(self, value):
+        """Add one value."""
+        import math
+
+        value = float(value)
+        n1 = self.count
+        self.count += 1
+        n = self.count
+
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+        # Central moments:
+        delta = value - self.mean
+        delta_n = delta / n
+        delta_n2 = delta_n * delta_n
+        term1 = delta * delta_n * n1
+        self.mean += delta_n
+        self.m4 += term1 * delta_n2 * (n * n - 3 * n + 3) + \
+            6 * delta_n2 * self.m2 - 4 * delta_n * self.m3
+        self.m3 += term1 * delta_n * (n - 2) - 3 * delta_n * self.m2
+        self.m2 += term1
+
+        # Sums for entropy of values normalized to sum to one:
+        self.total += value
+        if value > 0:
+            self.total_xlogx += value * math.log(value)
+        elif value < 0:
+            self.negative = True
+
+        # Teager-Kaiser energy of the previous value:
+        if len(self.previous) == 2:
+            self.tk_total += self.previous[1]**2 - value * self.previous[0]
+        self.previous = (self.previous + [value])[-2:]
+
+        # Quantile sketches:
+        if n <= 5:
+            self.head.append(value)
+        self.lower25.update(value)
+        self.median.update(value)
+        self.upper25.update(value)
+        self.mad.update(abs(value - self.median.value()))
+
+    def features(self):
+        """
+        Features of all values so far, ordered as signal_feature_names.
+
+        Returns
+        -------
+        features : numpy array of floats
+            (NaN where undefined, such as for no values)
+        """
+        import numpy as np
+
+        from mhealthx.signals import signal_feature_names
+
+        features = np.full(len(signal_feature_names), np.nan)
+        features[0] = self.count
+        n = float(self.count)
+        if self.count:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                std = np.sqrt(self.m2 / n)
+                constant = self.m2 / n <= (np.finfo(np.float64).eps *
+                                           self.mean)**2
+                med = self.median.value()
+                if self.count <= 5:
+                    mad = np.median(np.abs(np.array(self.head) - med))
+                else:
+                    mad = self.mad.value()
+                if self.negative:
+                    entropy = -np.inf
+                else:
+                    entropy = np.log(self.total) - \
+                        self.total_xlogx / self.total
+                if self.count >= 3:
+                    tk_energy = self.tk_total / (n - 2)
+                else:
+                    tk_energy = np.nan
+                features[1:] = [self.min,
+                                self.max,
+                                self.max - self.min,
+                                self.mean,
+                                std,
+                                med,
+                                mad,
+                                np.nan if constant else
+                                n * self.m4 / self.m2**2 - 3,
+                                np.nan if constant else
+                                np.sqrt(n) * self.m3 / self.m2**1.5,
+                                100 * std / self.mean,
+                                self.lower25.value(),
+                                self.upper25.value(),
+                                self.upper25.value() - self.lower25.value(),
+                                std,
+                                entropy,
+                                tk_energy]
+
+        return features
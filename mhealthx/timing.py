@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+"""
+Timing functions to characterize and regularize sample times.
+
+Time stamps of mobile sensor readings (such as iOS deviceMotion) jitter,
+repeat, and sometimes skip. These functions summarize sample timing in one
+pass and resample all channels of a record (or a batch of records) onto a
+uniform time grid, which FFT- and filter-based extractors assume.
+
+Authors:
+    - mhealthx contributors, 2026
+
+Copyright 2026,  Sage Bionetworks (http://sagebase.org), Apache v2.0 License
+
+"""
+
+
+def compute_timing_stats(t, gap_factor=2.0):
+    """
+    Compute sample rate, duration, jitter, gaps and duplicates of time points.
+
+    All statistics are computed from a single vector of time differences.
+
+    Parameters
+    ----------
+    t : list or numpy array of floats
+        time points
+    gap_factor : float
+        a time difference greater than gap_factor times the median
+        time difference is considered a gap
+
+    Returns
+    -------
+    sample_rate : float
+        sample rate (inverse of the mean time difference)
+    duration : float
+        duration of time series
+    jitter : float
+        standard deviation of time differences (s)
+    igaps : numpy array of integers
+        indices i such that a gap follows time point i
+    iduplicates : numpy array of integers
+        indices of time points not later than their predecessor
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.timing import compute_timing_stats
+    >>> t = np.array([0, 0.01, 0.02, 0.02, 0.03, 0.08, 0.09])
+    >>> sample_rate, duration, jitter, igaps, iduplicates = compute_timing_stats(t)
+    >>> igaps, iduplicates
+    (array([4]), array([3]))
+
+    """
+    import numpy as np
+
+    t = np.asarray(t, dtype=np.float64)
+    if t.size < 2:
+        raise IOError("there should be at least two time points")
+
+    deltas = np.diff(t)
+    mean_delta = np.mean(deltas)
+
+    sample_rate = 1 / mean_delta
+    duration = t[-1] - t[0]
+    jitter = np.std(deltas)
+
+    igaps = np.flatnonzero(deltas > gap_factor * np.median(deltas))
+    iduplicates = np.flatnonzero(deltas <= 0) + 1
+
+    return sample_rate, duration, jitter, igaps, iduplicates
+
+
+def resample_uniform(t, data, sample_rate=None, out=None):
+    """
+    Linearly interpolate all channels of a record onto a uniform time grid.
+
+    Time points that are not later than every preceding time point
+    (duplicates or out-of-order readings) are dropped before interpolation.
+    Interpolation indices and weights are computed once and shared by
+    all channels.
+
+    Parameters
+    ----------
+    t : list or numpy array of floats
+        time points
+    data : list or numpy array of floats
+        one channel, or channels x samples
+    sample_rate : float
+        sample rate of the uniform grid (if None, the mean sample rate)
+    out : numpy array of floats
+        optional output array (channels x grid points, or grid points
+        for one channel), for example a view of a preallocated buffer
+
+    Returns
+    -------
+    t_uniform : numpy array of floats
+        uniformly spaced time points, starting at t[0]
+    resampled : numpy array of floats
+        data interpolated at t_uniform (same number of dimensions as data)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.timing import resample_uniform
+    >>> t = np.array([0, 0.011, 0.019, 0.019, 0.032, 0.04])
+    >>> axyz = np.random.random((3, 6))
+    >>> t_uniform, ruxyz = resample_uniform(t, axyz, sample_rate=100)
+    >>> ruxyz.shape
+    (3, 5)
+
+    """
+    import numpy as np
+
+    from mhealthx.timing import uniform_grid_size
+
+    t = np.asarray(t, dtype=np.float64)
+    data = np.asarray(data, dtype=np.float64)
+    one_channel = data.ndim == 1
+    if one_channel:
+        data = data[np.newaxis, :]
+    if data.shape[-1] != t.size:
+        raise IOError("data and t should have the same number of samples")
+
+    # Keep only time points later than all preceding time points:
+    keep = np.ones(t.size, dtype=bool)
+    keep[1:] = t[1:] > np.maximum.accumulate(t)[:-1]
+    if not keep.all():
+        t = t[keep]
+        data = data[:, keep]
+    if t.size < 2:
+        raise IOError("there should be at least two increasing time points")
+
+    if not sample_rate:
+        sample_rate = (t.size - 1) / (t[-1] - t[0])
+    npoints = uniform_grid_size(t[-1] - t[0], sample_rate)
+    t_uniform = t[0] + np.arange(npoints) / np.float64(sample_rate)
+
+    # Interpolation indices and weights, shared by all channels:
+    iright = np.clip(np.searchsorted(t, t_uniform, side='right'),
+                     1, t.size - 1)
+    ileft = iright - 1
+    weights = (t_uniform - t[ileft]) / (t[iright] - t[ileft])
+    np.clip(weights, 0, 1, out=weights)
+
+    if out is None:
+        out = np.empty((data.shape[0], npoints))
+    elif one_channel:
+        out = out[np.newaxis, :]
+    left = data[:, ileft]
+    np.subtract(data[:, iright], left, out=out)
+    out *= weights
+    out += left
+
+    if one_channel:
+        resampled = out[0]
+    else:
+        resampled = out
+
+    return t_uniform, resampled
+
+
+def uniform_grid_size(duration, sample_rate):
+    """
+    Number of uniformly spaced time points spanning a duration.
+
+    Parameters
+    ----------
+    duration : float
+        duration of time series (s)
+    sample_rate : float
+        sample rate of the uniform grid
+
+    Returns
+    -------
+    npoints : integer
+        number of grid points
+
+    Examples
+    --------
+    >>> from mhealthx.timing import uniform_grid_size
+    >>> uniform_grid_size(0.04, 100)
+    5
+
+    """
+    import numpy as np
+
+    # Tolerate rounding error in duration * sample_rate:
+    npoints = int(np.floor(duration * sample_rate + 1e-9)) + 1
+
+    return npoints
+
+
+def resample_uniform_records(ts, datas, sample_rate):
+    """
+    Resample a ragged batch of records onto uniform time grids.
+
+    All records are interpolated into one preallocated buffer;
+    each record's output is a view of that buffer.
+
+    Parameters
+    ----------
+    ts : list of lists or numpy arrays of floats
+        time points for each record
+    datas : list of numpy arrays of floats
+        data for each record (one channel, or channels x samples;
+        all records should have the same number of channels)
+    sample_rate : float
+        sample rate of the uniform grids
+
+    Returns
+    -------
+    t_uniforms : list of numpy arrays of floats
+        uniformly spaced time points for each record
+    resampled : list of numpy arrays of floats
+        resampled data for each record (views of buffer)
+    buffer : numpy array of floats
+        channels x total grid points: all records' resampled data
+    offsets : numpy array of integers
+        start of each record in buffer (plus total number of grid points)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.timing import resample_uniform_records
+    >>> ts = [np.array([0, 0.011, 0.019, 0.032]), np.array([5, 5.012, 5.02])]
+    >>> datas = [np.random.random((3, 4)), np.random.random((3, 3))]
+    >>> t_uniforms, resampled, buffer, offsets = resample_uniform_records(ts, datas, 100)
+    >>> offsets
+    array([0, 4, 7])
+
+    """
+    import numpy as np
+
+    from mhealthx.timing import resample_uniform, uniform_grid_size
+
+    ts = [np.asarray(t, dtype=np.float64) for t in ts]
+    datas = [np.asarray(data, dtype=np.float64) for data in datas]
+    one_channel = datas[0].ndim == 1
+    nchannels = 1 if one_channel else datas[0].shape[0]
+
+    # Preallocate one buffer for all records:
+    sizes = [uniform_grid_size(t.max() - t[0], sample_rate) for t in ts]
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    buffer = np.empty((nchannels, offsets[-1]))
+
+    t_uniforms = []
+    resampled = []
+    for irecord, t in enumerate(ts):
+        view = buffer[:, offsets[irecord]:offsets[irecord + 1]]
+        if one_channel:
+            view = view[0]
+        t_uniform, view = resample_uniform(t, datas[irecord], sample_rate,
+                                           out=view)
+        t_uniforms.append(t_uniform)
+        resampled.append(view)
+
+    return t_uniforms, resampled, buffer, offsets
@@ -703,6 +703,259 @@ def convert_audio_file(old_file, new_file, command='ffmpeg',
     return new_file
 
 
+def audio_sample_rate(audio_file, command='ffprobe'):
+    """
+    Get the sample rate of the (first) audio stream of an audio file.
+
+    Parameters
+    ----------
+    audio_file : string
+        full path to the input audio file (such as .m4a)
+    command : string
+        ffprobe executable
+
+    Returns
+    -------
+    sample_rate : integer
+        number of samples per second
+
+    Examples
+    --------
+    >>> from mhealthx.xio import audio_sample_rate
+    >>> audio_file = '/Users/arno/mhealthx_cache/mhealthx/feature_files/test.m4a'
+    >>> sample_rate = audio_sample_rate(audio_file)
+
+    """
+    import subprocess
+
+    process = subprocess.Popen([command, '-v', 'error',
+                                '-select_streams', 'a:0',
+                                '-show_entries', 'stream=sample_rate',
+                                '-of', 'default=noprint_wrappers=1:nokey=1',
+                                audio_file],
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    output, errors = process.communicate()
+    try:
+        sample_rate = int(output.decode('utf-8').split()[0])
+    except (IndexError, ValueError):
+        raise IOError("'{0}' could not read the sample rate of {1}: "
+                      "{2}".format(command, audio_file,
+                                   errors.decode('utf-8', 'replace').strip()))
+
+    return sample_rate
+
+
+def decode_audio(audio_file, sample_rate=16000, command='ffmpeg'):
+    """
+    Decode an audio file into a mono numpy array, without temporary files.
+
+    ffmpeg decodes (and resamples) the audio file to mono 16-bit samples
+    written to stdout, which are read straight into a numpy buffer.
+
+    Parameters
+    ----------
+    audio_file : string
+        full path to the input audio file (such as .m4a)
+    sample_rate : integer or None
+        number of samples per second of the decoded audio
+        (None: the audio file's own sample rate, from ffprobe,
+        which is expected alongside the ffmpeg command)
+    command : string
+        ffmpeg executable
+
+    Returns
+    -------
+    data : numpy array of float32
+        mono audio samples (from -1 to 1)
+    sample_rate : integer
+        number of samples per second
+
+    Examples
+    --------
+    >>> from mhealthx.xio import decode_audio
+    >>> audio_file = '/Users/arno/mhealthx_cache/mhealthx/feature_files/test.m4a'
+    >>> data, sample_rate = decode_audio(audio_file, 16000)
+    >>> data, sample_rate = decode_audio(audio_file, None)
+
+    """
+    import os
+    import subprocess
+    import numpy as np
+
+    from mhealthx.xio import audio_sample_rate
+
+    if not os.path.isfile(audio_file):
+        raise IOError("{0} does not exist.".format(audio_file))
+    if sample_rate is None:
+        sample_rate = audio_sample_rate(audio_file, os.path.join(
+            os.path.dirname(command), 'ffprobe'))
+
+    process = subprocess.Popen([command, '-nostdin', '-v', 'error',
+                                '-i', audio_file, '-f', 's16le',
+                                '-acodec', 'pcm_s16le', '-ac', '1',
+                                '-ar', str(int(sample_rate)), '-'],
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    output, errors = process.communicate()
+    if process.returncode != 0:
+        raise IOError("'{0}' could not decode {1}: {2}".format(
+            command, audio_file, errors.decode('utf-8', 'replace').strip()))
+
+    data = np.frombuffer(output, dtype='<i2').astype(np.float32)
+    data /= 32768
+
+    return data, sample_rate
+
+
+def decode_audio_files(audio_files, sample_rate=16000, command='ffmpeg',
+                       number_of_workers=None):
+    """
+    Decode many audio files into mono numpy arrays with a pool of workers.
+
+    Parameters
+    ----------
+    audio_files : list of strings
+        full paths to the input audio files
+    sample_rate : integer
+        number of samples per second of the decoded audio
+    command : string
+        ffmpeg executable
+    number_of_workers : integer
+        number of concurrent ffmpeg processes (default: CPU count)
+
+    Returns
+    -------
+    datas : list of numpy arrays of float32
+        mono audio samples of each audio file (None if it could not
+        be decoded)
+    sample_rate : integer
+        number of samples per second
+
+    Examples
+    --------
+    >>> from mhealthx.xio import decode_audio_files
+    >>> audio_files = ['/desk/a.m4a', '/desk/b.m4a']
+    >>> datas, sample_rate = decode_audio_files(audio_files, 16000)
+
+    """
+    import multiprocessing
+    from multiprocessing.pool import ThreadPool
+
+    from mhealthx.xio import decode_audio
+
+    def decode(audio_file):
+        try:
+            data, rate = decode_audio(audio_file, sample_rate, command)
+        except IOError:
+            import traceback; traceback.print_exc()
+            data = None
+        return data
+
+    if number_of_workers is None:
+        number_of_workers = multiprocessing.cpu_count()
+    number_of_workers = max(1, min(number_of_workers, len(audio_files)))
+
+    # Each worker waits on its ffmpeg process:
+    pool = ThreadPool(number_of_workers)
+    try:
+        datas = pool.map(decode, audio_files)
+    finally:
+        pool.close()
+        pool.join()
+
+    return datas, sample_rate
+
+
+def trim_audio_file(audio_file, row, file_append='.wav',
+                    sample_rate=None, command='ffmpeg', silence=40,
+                    padding=0.1):
+    """
+    Trim leading and trailing silence from an audio file into a .wav file.
+
+    The original audio file (such as .m4a) is decoded once, in memory
+    (see decode_audio()), trimmed (see extractors.voice.trim_silence())
+    and written, at its original level, as the one mono .wav file for
+    openSMILE (in place of convert_audio_file()). By default the audio
+    keeps its own sample rate; set sample_rate to resample it, which
+    changes openSMILE's features. The trimmed boundaries are recorded
+    in the row, so that features of a trimmed file can be traced back
+    to (and reproduced from) the original recording.
+
+    Parameters
+    ----------
+    audio_file : string
+        full path to the input audio file
+    row : pandas Series
+        row of the audio file (such as from read_file_from_synapse_table())
+    file_append : string
+        append to audio_file for the full path of the .wav audio file
+    sample_rate : integer or None
+        number of samples per second of the .wav audio file
+        (None: the sample rate of audio_file)
+    command : string
+        ffmpeg executable
+    silence : float
+        frames more than silence dB below the loudest frame are silent
+    padding : float
+        duration of silence to keep before and after active frames (seconds)
+
+    Returns
+    -------
+    row : pandas Series
+        row with the boundaries of the trimmed audio (in seconds from the
+        start of the original audio) as 'trim_start' and 'trim_end'
+    trimmed_file : string
+        full path to the trimmed .wav audio file (None if not decoded)
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from mhealthx.xio import trim_audio_file
+    >>> audio_file = '/desk/temp/audio_audio.m4a'
+    >>> row = pd.Series({'a':[1], 'b':[2], 'c':[3]})
+    >>> row, trimmed_file = trim_audio_file(audio_file, row)
+
+    """
+    import os
+    import numpy as np
+
+    from mhealthx.xio import decode_audio, write_wav
+    from mhealthx.extractors.voice import trim_silence
+
+    trimmed_file = None
+    trim_start, trim_end = np.nan, np.nan
+    if audio_file and os.path.isfile(audio_file):
+        try:
+            data, sample_rate = decode_audio(audio_file, sample_rate,
+                                             command)
+        except IOError as e:
+            import traceback; traceback.print_exc()
+            print("filename = ", audio_file)
+        else:
+            trimmed, start, end = trim_silence(data, sample_rate,
+                                               silence=silence,
+                                               padding=padding)
+            trim_start = start / float(sample_rate)
+            trim_end = end / float(sample_rate)
+
+            # Keep the original level (write_wav() scales to amplitude):
+            if trimmed.size:
+                amplitude = min(int(round(np.max(np.abs(trimmed)) *
+                                          32768)), 32767)
+            else:
+                amplitude = 0
+            trimmed_file = write_wav(trimmed, audio_file, file_append,
+                                     sample_rate, amplitude)
+
+    # Record the trimmed boundaries in (a copy of) the row:
+    row = row.copy()
+    row['trim_start'] = trim_start
+    row['trim_end'] = trim_end
+
+    return row, trimmed_file
+
+
 def write_wav(data, file_stem, file_append,
               sample_rate=44100, amplitude=32700):
     """
@@ -713,10 +966,15 @@ def write_wav(data, file_stem, file_append,
     and    http://codingmess.blogspot.com/2008/07/
                   how-to-make-simple-wav-file-with-python.html
 
+    Data are scaled (by the maximum absolute value over all channels)
+    and converted to 16-bit samples in one step, and all frames
+    (interleaved channels) are written in one call.
+
     Parameters
     ----------
     data : list or array of floats or integers
-        input data to convert to audio file
+        input data to convert to audio file: one channel, or
+        channels x samples (such as x, y, z accelerometer axes)
     file_stem : string
         stem of file name of output audio file (including absolute path)
     file_append : string
@@ -744,18 +1002,27 @@ def write_wav(data, file_stem, file_append,
     >>> data /= np.max(np.abs(data))
     >>> #data = resample(data, sample_rate/framerate)
     >>> wav_file = write_wav(data, file_stem, file_append, sample_rate, amplitude)
+    >>> axyz = np.random.randn(3, 1000)
+    >>> wav_file = write_wav(axyz, file_stem, file_append, 100, amplitude)
     """
     import os
     import numpy as np
     import wave
-    import struct
+
+    # Frames (samples x channels), scaled to amplitude:
+    data = np.array(data, dtype=np.float64, ndmin=2)
+    frames = data.T
+    peak = np.max(np.abs(frames)) if frames.size else 0
+    if peak > 0:
+        frames = frames * (amplitude / peak)
+    samples = np.round(frames).astype('<i2')
 
     wav_file = file_stem + file_append
-    wavfile = wave.open(wav_file, "w")
-    nchannels = 1
+    wavfile = wave.open(wav_file, "wb")
+    nchannels = samples.shape[1]
     sampwidth = 2
-    framerate = sample_rate
-    nframes = len(data)
+    framerate = int(sample_rate)
+    nframes = samples.shape[0]
     comptype = "NONE"
     compname = "not compressed"
     wavfile.setparams((nchannels,
@@ -764,24 +1031,174 @@ def write_wav(data, file_stem, file_append,
                        nframes,
                        comptype,
                        compname))
-
-    data = np.asarray(data)
-    data /= np.max(np.abs(data))
-    data *= amplitude
-    data = np.round(data)
-    for x in data:
-        value = struct.pack('i', x)
-        wavfile.writeframesraw(value)
-
-    wavfile.writeframes('')
+    wavfile.writeframes(samples.tobytes())
     wavfile.close()
 
     if not os.path.isfile(wav_file):
-        raise IOError("{0} has not been written.".format(filename))
+        raise IOError("{0} has not been written.".format(wav_file))
 
     return wav_file
 
 
+def write_openSMILE_batch_config(config, audio_files, output_files,
+                                 instance_names, batch_config,
+                                 output_option='csvoutput'):
+    """
+    Write an openSMILE configuration file that processes many audio files.
+
+    SMILExtract reads one input file per run. This writes one
+    configuration file with a copy of the given configuration's
+    components for each audio file, so that a single SMILExtract run
+    processes all of them:
+
+        - included files (\\{...} lines) are inlined
+        - each component instance (except the shared data memory) and
+          each data memory level is renamed with a per-file prefix
+          ('f0_', 'f1_', ...)
+        - command-line options (\\cm[...]) are replaced by each file's
+          input file, output file and instance name, or by their defaults
+
+    Parameters
+    ----------
+    config : string
+        openSMILE configuration file
+    audio_files : list of strings
+        full paths to the input audio files
+    output_files : list of strings
+        output file of each audio file
+    instance_names : list of strings
+        instance name (output row name) of each audio file
+    batch_config : string
+        output configuration file
+    output_option : string
+        command-line option of the configuration's output file
+        (such as 'csvoutput' for SMILExtract's -csvoutput flag)
+
+    Returns
+    -------
+    batch_config : string
+        output configuration file
+
+    Examples
+    --------
+    >>> import os
+    >>> import tempfile
+    >>> from mhealthx.xio import write_openSMILE_batch_config
+    >>> config = os.path.join('/software', 'openSMILE-2.1.0', 'config', 'IS13_ComParE.conf')
+    >>> audio_files = ['/desk/a.wav', '/desk/b.wav']
+    >>> output_files = ['/desk/a.csv', '/desk/b.csv']
+    >>> batch_config = os.path.join(tempfile.mkdtemp(), 'batch.conf')
+    >>> batch_config = write_openSMILE_batch_config(config, audio_files, output_files, ['a', 'b'], batch_config)
+
+    """
+    import os
+    import re
+
+    if not len(audio_files) == len(output_files) == len(instance_names):
+        raise IOError("there should be one output file and instance name "
+                      "per audio file")
+
+    def read_lines(config_file):
+        # Lines of a configuration file, with included files inlined
+        # (paths relative to the including file) and comments removed:
+        lines = []
+        with open(config_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                include = re.match(r'\\{(.+)\}$', line)
+                if include:
+                    lines.extend(read_lines(os.path.join(
+                        os.path.dirname(config_file), include.group(1))))
+                elif line and not line.startswith((';', '//', '#', '%')):
+                    lines.append(line)
+        return lines
+
+    # Component manager lines, and the lines of each component's section:
+    manager_lines = []
+    sections = []
+    lines = manager_lines
+    for line in read_lines(config):
+        header = re.match(r'\[\s*([^:\]]+?)\s*:\s*([^\]]+?)\s*\]$', line)
+        if header:
+            if header.group(2) == 'cComponentManager':
+                lines = manager_lines
+            else:
+                lines = []
+                sections.append((header.group(1), header.group(2), lines))
+        else:
+            lines.append(line)
+
+    # Component instances, and the shared ones (the data memory):
+    instance_pattern = r'instance\[([^\]]+)\]\.(\w+)\s*=\s*(.*)$'
+    instances = [re.match(instance_pattern, line).groups()
+                 for line in manager_lines
+                 if re.match(instance_pattern, line)]
+    shared = set(name for name, option, value in instances
+                 if option == 'type' and value == 'cDataMemory')
+    options = [line for line in manager_lines
+               if not re.match(instance_pattern, line)]
+
+    def rename(prefix, names):
+        # Prefix each (';' or ',' separated) component or level name:
+        return ';'.join(name.strip() if name.strip() in shared
+                        else prefix + name.strip()
+                        for name in re.split('[;,]', names))
+
+    def substitute(line, values):
+        # Replace command-line options \cm[long(short){default}:text]:
+        def value(match):
+            long_name, short_name, default = match.groups()
+            if long_name in values:
+                return values[long_name]
+            elif short_name in values:
+                return values[short_name]
+            return default or ''
+        return re.sub(r'\\cm\[([^\](){:]+)(?:\(([^)]*)\))?'
+                      r'(?:\{([^}]*)\})?(?::[^\]]*)?\]', value, line)
+
+    # Manager section: shared instances once, others once per audio file:
+    batch_lines = ['[componentInstances:cComponentManager]'] + options
+    for name, option, value in instances:
+        if name in shared:
+            batch_lines.append('instance[{0}].{1} = {2}'.format(name, option,
+                                                                value))
+    for ifile in range(len(audio_files)):
+        prefix = 'f{0}_'.format(ifile)
+        for name, option, value in instances:
+            if name not in shared:
+                batch_lines.append('instance[{0}{1}].{2} = {3}'.format(
+                    prefix, name, option, value))
+
+    # Component sections: shared ones once, others once per audio file:
+    for name, ctype, lines in sections:
+        if name in shared:
+            batch_lines.extend([''] + ['[{0}:{1}]'.format(name, ctype)] +
+                               [substitute(line, {}) for line in lines])
+    for ifile, audio_file in enumerate(audio_files):
+        prefix = 'f{0}_'.format(ifile)
+        values = {'inputfile': audio_file, 'I': audio_file,
+                  output_option: output_files[ifile],
+                  'instname': instance_names[ifile],
+                  'N': instance_names[ifile], 'appendcsv': '0'}
+        for name, ctype, lines in sections:
+            if name in shared:
+                continue
+            batch_lines.extend(['', '[{0}{1}:{2}]'.format(prefix, name,
+                                                          ctype)])
+            for line in lines:
+                line = substitute(line, values)
+                option = re.match(r'([^=]+?)\s*=\s*(.*)$', line)
+                if option and option.group(1).endswith(('dmLevel', 'Recp')):
+                    line = '{0} = {1}'.format(option.group(1),
+                                              rename(prefix, option.group(2)))
+                batch_lines.append(line)
+
+    with open(batch_config, 'w') as f:
+        f.write('\n'.join(batch_lines) + '\n')
+
+    return batch_config
+
+
 def concatenate_tables_vertically(tables, output_csv_file=None):
     """
     Vertically concatenate multiple table files or pandas DataFrames
@@ -49,14 +49,13 @@ def velocity_from_acceleration(ax, ay, az, t):
     >>> vx, vy, vz = velocity_from_acceleration(ax, ay, az, t)
 
     """
-    vx = [0]
-    vy = [0]
-    vz = [0]
-    for i in range(1, len(ax)):
-        dt = t[i] - t[i-1]
-        vx.append(vx[i-1] + ax[i] * dt)
-        vy.append(vy[i-1] + ay[i] * dt)
-        vz.append(vz[i-1] + az[i] * dt)
+    import numpy as np
+
+    from mhealthx.kernels import get_kernel
+
+    # Rectangle-rule integration of all three axes at once:
+    integrate = get_kernel('integrate')
+    vx, vy, vz = integrate(np.vstack((ax, ay, az)), t)
 
     return vx, vy, vz
 
@@ -104,14 +103,11 @@ def position_from_velocity(vx, vy, vz, t):
     """
     import numpy as np
 
-    x = [0]
-    y = [0]
-    z = [0]
-    for i in range(1, len(vx)):
-        dt = t[i] - t[i-1]
-        x.append(x[i-1] + vx[i] * dt)
-        y.append(y[i-1] + vy[i] * dt)
-        z.append(z[i-1] + vz[i] * dt)
+    from mhealthx.kernels import get_kernel
+
+    # Rectangle-rule integration of all three axes at once:
+    integrate = get_kernel('integrate')
+    x, y, z = integrate(np.vstack((vx, vy, vz)), t)
 
     dx = np.sum(x)
     dy = np.sum(y)
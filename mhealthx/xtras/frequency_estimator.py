@@ -6,7 +6,7 @@ https://github.com/endolith/waveform-analyzer
 """
 
 
-def freq_from_autocorr(signal, fs):
+def freq_from_autocorr(signal, fs, spectral=None):
     """
     Estimate frequency using autocorrelation.
 
@@ -25,6 +25,8 @@ def freq_from_autocorr(signal, fs):
         time series data
     fs : integer
         sample rate
+    spectral : SpectralContext or None
+        cached spectra of signal (see mhealthx.spectral)
 
     Returns
     -------
@@ -33,20 +35,20 @@ def freq_from_autocorr(signal, fs):
 
     """
     import numpy as np
-    from scipy.signal import fftconvolve
-    from matplotlib.mlab import find
 
     from mhealthx.signals import parabolic
+    from mhealthx.spectral import SpectralContext
 
-    # Calculate autocorrelation (same thing as convolution, but with one input
-    # reversed in time), and throw away the negative lags:
-    signal -= np.mean(signal) # Remove DC offset
-    corr = fftconvolve(signal, signal[::-1], mode='full')
-    corr = corr[len(corr)/2:]
+    if spectral is None:
+        spectral = SpectralContext(signal, fs)
+
+    # Autocorrelation of the demeaned signal for non-negative lags,
+    # from its (cached, zero-padded) power spectrum:
+    corr = spectral.autocorrelation(demean=True)
 
     # Find the first low point:
     d = np.diff(corr)
-    start = find(d > 0)[0]
+    start = np.flatnonzero(d > 0)[0]
 
     # Find the next peak after the low point (other than 0 lag).  This bit is
     # not reliable for long signals, due to the desired peak occurring between
@@ -58,7 +60,7 @@ def freq_from_autocorr(signal, fs):
     return frequency
 
 
-def freq_from_hps(signal, fs):
+def freq_from_hps(signal, fs, spectral=None):
     """
     Estimate frequency using harmonic product spectrum.
 
@@ -73,6 +75,8 @@ def freq_from_hps(signal, fs):
         time series data
     fs : integer
         sample rate
+    spectral : SpectralContext or None
+        cached spectra of signal (see mhealthx.spectral)
 
     Returns
     -------
@@ -81,18 +85,16 @@ def freq_from_hps(signal, fs):
 
     """
     import numpy as np
-    from scipy.signal import blackmanharris, decimate
+    from scipy.signal import decimate
 
     from mhealthx.signals import parabolic
+    from mhealthx.spectral import SpectralContext
 
-    N = len(signal)
-    signal -= np.mean(signal) # Remove DC offset
-
-    # Compute Fourier transform of windowed signal:
-    windowed = signal * blackmanharris(len(signal))
+    if spectral is None:
+        spectral = SpectralContext(signal, fs)
 
-    # Get spectrum:
-    X = np.log(abs(np.fft.rfft(windowed)))
+    # Spectrum of the demeaned, windowed signal (zero-padded to a fast length):
+    X = np.log(spectral.magnitude(window='blackmanharris', demean=True))
 
     # Downsample sum logs of spectra instead of multiplying:
     hps = np.copy(X)
@@ -105,6 +107,85 @@ def freq_from_hps(signal, fs):
     i_interp = parabolic(hps, i_peak)[0]
 
     # Convert to equivalent frequency:
-    frequency = fs * i_interp / N # Hz
+    frequency = fs * i_interp / spectral.nfft # Hz
 
     return frequency
+
+
+def freq_from_autocorr_batch(frames, fs, min_freq=75, max_freq=500):
+    """
+    Estimate the frequency of each row of frames using autocorrelation.
+
+    As freq_from_autocorr(), for many frames at once: autocorrelations
+    of all (demeaned) rows come from one batched FFT, and the highest
+    autocorrelation peak within the lags of min_freq to max_freq
+    is interpolated for all rows at once.
+
+    Parameters
+    ----------
+    frames : numpy array of floats
+        number of frames x number of samples (see signals.sliding_windows())
+    fs : integer
+        sample rate
+    min_freq : float
+        minimum frequency to search (Hz)
+    max_freq : float
+        maximum frequency to search (Hz)
+
+    Returns
+    -------
+    frequencies : numpy array of floats
+        frequency of each frame (Hz)
+    strengths : numpy array of floats
+        autocorrelation peak of each frame, normalized by its zero lag
+        (about 0 to 1; NaN for frames of constant data)
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from mhealthx.signals import sliding_windows
+    >>> from mhealthx.xtras.frequency_estimator import freq_from_autocorr_batch
+    >>> fs = 16000
+    >>> signal = np.sin(2 * np.pi * 200 * np.arange(fs) / float(fs))
+    >>> frames = sliding_windows(signal, 640, 160)
+    >>> frequencies, strengths = freq_from_autocorr_batch(frames, fs)
+    >>> np.allclose(frequencies, 200, rtol=0.01)
+    True
+
+    """
+    import numpy as np
+    from scipy.fftpack import next_fast_len
+
+    from mhealthx.signals import parabolic
+
+    frames = np.asarray(frames, dtype=np.float64)
+    nframes, n = frames.shape
+
+    # Lags of the highest and lowest frequencies (leaving room to
+    # interpolate each peak between its neighbors):
+    min_lag = max(int(np.floor(fs / float(max_freq))), 1)
+    max_lag = min(int(np.ceil(fs / float(min_freq))), n - 2)
+    if min_lag > max_lag:
+        raise IOError("frames are too short for the frequency range")
+
+    # Autocorrelation of each demeaned frame for non-negative lags:
+    demeaned = frames - np.mean(frames, axis=1)[:, np.newaxis]
+    nfft = next_fast_len(2 * n - 1)
+    spectra = np.fft.rfft(demeaned, nfft, axis=1)
+    corr = np.fft.irfft(spectra.real**2 + spectra.imag**2, nfft,
+                        axis=1)[:, :max_lag + 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr /= corr[:, :1]
+
+        # Interpolate the highest peak in the lag range of each frame
+        # (the biased autocorrelation favors the fundamental over its
+        # multiples; the peak strength is unbiased):
+        i_peak = np.argmax(corr[:, min_lag:max_lag + 1], axis=1) + min_lag
+        flat = corr.ravel()
+        i_interp, strengths = parabolic(flat, np.arange(nframes) *
+                                        corr.shape[1] + i_peak)
+        i_interp -= np.arange(nframes) * corr.shape[1]
+        frequencies = fs / i_interp
+        strengths *= n / (n - i_interp)
+
+    return frequencies, strengths